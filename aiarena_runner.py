@@ -25,11 +25,14 @@ import random
 import shutil
 import stat
 import subprocess
-import threading
 from typing import TYPE_CHECKING
 
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from . import container_backend, match_phases, results_summary, supervisor
+
 logger = logging.getLogger('test_lab')
 
 if TYPE_CHECKING:
@@ -361,6 +364,23 @@ def _past_version_volume_mounts(
     return mounts
 
 
+def _image_lines(dockerfile: str) -> list[str]:
+    """Return override lines running a controller in the image built from *dockerfile*.
+
+    The image is tagged by content (``image_cache.py``), so compose only
+    builds it when no match has built it before.
+    """
+    if not dockerfile:
+        return []
+    from . import image_cache
+    return [
+        '    build:',
+        '      context: .',
+        f'      dockerfile: {dockerfile}',
+        f'    image: {image_cache.use_image(dockerfile, AIARENA_DIR)}',
+    ]
+
+
 def _write_compose_override(
     run_dir: str,
     *,
@@ -388,8 +408,9 @@ def _write_compose_override(
     - A past version (cached source + symlink mounts + optional Dockerfile)
 
     When the test bot or opponent has a custom ``dockerfile`` set, the
-    corresponding controller's image is replaced with a build directive
-    so pre-installed dependencies are available.
+    corresponding controller's image is replaced with a cached image
+    built from it (``_image_lines``) so pre-installed dependencies are
+    available.
 
     *source_override* is passed through to ``_test_bot_volume_mounts``
     for branch-based testing.
@@ -402,12 +423,7 @@ def _write_compose_override(
         'services:',
         '  bot_controller1:',
     ]
-    if test_bot.dockerfile:
-        lines += [
-            '    build:',
-            '      context: .',
-            f'      dockerfile: {test_bot.dockerfile}',
-        ]
+    lines += _image_lines(test_bot.dockerfile)
     lines.append('    volumes:')
     lines += _test_bot_volume_mounts(test_bot, test_bot_aiarena_name, source_override=source_override)
     lines += get_patch_volume_mounts(
@@ -425,12 +441,7 @@ def _write_compose_override(
     dockerfile = test_bot.dockerfile
     if is_past_version:
         assert past_version_cache_path is not None
-        if dockerfile:
-            lines += [
-                '    build:',
-                '      context: .',
-                f'      dockerfile: {dockerfile}',
-            ]
+        lines += _image_lines(dockerfile)
         lines += ['    volumes:']
         lines += _past_version_volume_mounts(test_bot, bot2_name, past_version_cache_path)
         lines += get_patch_volume_mounts(
@@ -439,12 +450,7 @@ def _write_compose_override(
         )
     elif is_mirror:
         assert mirror_aiarena_name is not None
-        if dockerfile:
-            lines += [
-                '    build:',
-                '      context: .',
-                f'      dockerfile: {dockerfile}',
-            ]
+        lines += _image_lines(dockerfile)
         lines += ['    volumes:']
         lines += _test_bot_volume_mounts(test_bot, mirror_aiarena_name, source_override=source_override)
         lines += get_patch_volume_mounts(
@@ -457,12 +463,7 @@ def _write_compose_override(
         effective_dockerfile = bot2_dockerfile
         if not effective_dockerfile and bot2_type != 'python':
             effective_dockerfile = 'Dockerfile.proxy_fwd'
-        if effective_dockerfile:
-            lines += [
-                '    build:',
-                '      context: .',
-                f'      dockerfile: {effective_dockerfile}',
-            ]
+        lines += _image_lines(effective_dockerfile)
         lines.append('    volumes:')
         if opponent_bot is not None:
             lines += _opponent_volume_mounts(opponent_bot, bot2_name)
@@ -915,24 +916,37 @@ def _write_matches_file(
     bot2_race: str,
     bot2_type: str,
     map_name: str,
+    batch_map_names: tuple[str, ...] = (),
 ) -> None:
-    """Write the aiarena matches file for a single match.
+    """Write the aiarena matches file for a match (and its batch).
 
     Format: Bot1ID,Bot1Name,Bot1Race,Bot1Type,Bot2ID,Bot2Name,Bot2Race,Bot2Type,Map
     Bot ID and Bot Name are the same (the directory name).
+
+    *batch_map_names* adds one line per batched match, played in order
+    after the first (``ROUNDS_PER_RUN = -1`` runs every line).
     """
-    line = (
-        f"{bot1_name},{bot1_name},{bot1_race},{bot1_type},"
-        f"{bot2_name},{bot2_name},{bot2_race},{bot2_type},"
-        f"{map_name}"
-    )
     matches_path = os.path.join(run_dir, 'matches')
     with open(matches_path, 'w') as f:
-        f.write(line + '\n')
+        for line_map in (map_name, *batch_map_names):
+            f.write(
+                f"{bot1_name},{bot1_name},{bot1_race},{bot1_type},"
+                f"{bot2_name},{bot2_name},{bot2_race},{bot2_type},"
+                f"{line_map}\n"
+            )
+
+
+def _count_matches_in_file(run_dir: str) -> int:
+    """Return the number of matches listed in a run directory's matches file."""
+    try:
+        with open(os.path.join(run_dir, 'matches')) as f:
+            return max(1, sum(1 for line in f if line.strip()))
+    except OSError:
+        return 1
 
 
-def _parse_results(run_dir: str) -> dict | None:
-    """Parse results.json and return the first result entry, or None.
+def _parse_results(run_dir: str) -> list[dict]:
+    """Parse results.json and return its result entries in match order.
 
     Expected format (written by aiarena proxy_controller):
     {
@@ -952,11 +966,9 @@ def _parse_results(run_dir: str) -> dict | None:
         with open(results_path) as f:
             data = json.load(f)
         results = data.get('results', [])
-        if results:
-            return results[0]
     except (OSError, json.JSONDecodeError):
-        pass
-    return None
+        return []
+    return sorted(results, key=lambda r: r.get('match') or 0)
 
 
 def _map_result_to_match(aiarena_result: str) -> str:
@@ -977,6 +989,25 @@ def get_run_dir(match_id: int) -> str:
     return os.path.join(AIARENA_RUNS_DIR, str(match_id))
 
 
+def stop_aiarena_match(match_id: int) -> None:
+    """Stop a running aiarena match and remove its containers.
+
+    A match in a warm pool slot only has its bot controllers and proxy
+    removed.  The match supervisor then sees the containers exit.
+    """
+    from . import warm_pool
+
+    run_dir = get_run_dir(match_id)
+    if not os.path.isdir(run_dir):
+        return
+    warm_slot = warm_pool.get_match_slot(run_dir)
+    if warm_slot is not None:
+        # Leave the slot's SC2 controller running for the next match.
+        warm_pool.stop_match(warm_slot)
+        return
+    container_backend.get_backend().remove_stack(f'aiarena_{match_id}', run_dir)
+
+
 def get_replay_path(match_id: int) -> str | None:
     """Return the path to the replay file for a match, or None."""
     replay_dir = os.path.join(get_run_dir(match_id), 'replays')
@@ -1029,6 +1060,7 @@ def start_aiarena_match(
     opponent_build: str = '',
     friendly_race: str = '',
     opponent_race_override: str = '',
+    batch: list[Match] | tuple = (),
 ) -> None:
     """Launch an aiarena match in a background thread.
 
@@ -1047,7 +1079,11 @@ def start_aiarena_match(
     Each match gets its own run directory under ``aiarena/runs/<match_id>/``
     so multiple matches can run concurrently without conflicting.
 
-    The match record should already exist with status 'Pending'.
+    *batch* lists further matches (``batch_leader`` = *match*) with the
+    same configuration except the map.  They are played one after
+    another in this match's compose stack; see ``_collect_and_save_result``.
+
+    The match record should already exist and have been enqueued.
     """
     if map_name is None:
         map_name = random.choice(AIARENA_MAP_LIST)
@@ -1104,6 +1140,7 @@ def start_aiarena_match(
         bot2_race=opponent_race_code,
         bot2_type=opponent_type,
         map_name=map_name,
+        batch_map_names=tuple(m.map_name for m in batch),
     )
 
     _write_compose_override(
@@ -1125,12 +1162,7 @@ def start_aiarena_match(
     log_file_path = os.path.join(run_dir, 'compose_output.log')
 
     def _launch():
-        thread = threading.Thread(
-            target=_run_docker_match,
-            args=(run_dir, match_id, log_file_path),
-            daemon=True,
-        )
-        thread.start()
+        _run_docker_match(run_dir, match_id, log_file_path)
 
     from . import match_queue
     match_queue.enqueue(match_id, _launch)
@@ -1145,6 +1177,7 @@ def start_past_version_match(
     source_override: str | None = None,
     friendly_build: str = '',
     friendly_race: str = '',
+    batch: list[Match] | tuple = (),
 ) -> None:
     """Launch a match of the current test bot vs a past version.
 
@@ -1156,6 +1189,9 @@ def start_past_version_match(
     worktree for branch-based testing).
 
     *friendly_race* overrides the test bot's race in the matches file.
+
+    *batch* lists further matches played in the same stack (see
+    ``start_aiarena_match``).
     """
     from . import bot_versions
 
@@ -1198,6 +1234,7 @@ def start_past_version_match(
         bot2_race=test_bot_race,  # past version has same race
         bot2_type=test_bot_type,
         map_name=map_name,
+        batch_map_names=tuple(m.map_name for m in batch),
     )
 
     _write_compose_override(
@@ -1215,163 +1252,174 @@ def start_past_version_match(
     log_file_path = os.path.join(run_dir, 'compose_output.log')
 
     def _launch():
-        thread = threading.Thread(
-            target=_run_docker_match,
-            args=(run_dir, match_id, log_file_path),
-            daemon=True,
-        )
-        thread.start()
+        _run_docker_match(run_dir, match_id, log_file_path)
 
     from . import match_queue
     match_queue.enqueue(match_id, _launch)
 
 
 def _run_docker_match(run_dir: str, match_id: int, log_file_path: str) -> None:
-    """Run a Docker match in the current thread.  Shared by both start functions.
+    """Hand a Docker match to the match supervisor.  Shared by both start functions.
 
-    Docker compose is launched via ``Popen`` so the child process persists
-    even if the Django dev-server auto-reloads (which kills daemon threads).
-    A PID file is written so that ``collect_match_result`` can reconcile
-    matches whose monitoring thread was lost.
+    Returns immediately; the supervisor (``supervisor.py``) starts the
+    containers, polls them and records the result.
     """
-    compose_down_cmd = [
-        'docker', 'compose',
-        '-f', 'docker-compose.yml',
-        '-f', 'docker-compose.override.yml',
-        '-p', f'aiarena_{match_id}', 'down',
-        '--rmi', 'local',
-    ]
+    supervisor.submit(_AiarenaMatchJob(run_dir, match_id, log_file_path))
 
-    pid_file = os.path.join(run_dir, 'docker.pid')
-    proc: subprocess.Popen | None = None
-    log_file = None
 
-    logger.info('Match %d: starting docker compose in %s', match_id, run_dir)
+class _AiarenaMatchJob(supervisor.MatchJob):
+    """Supervisor job for one aiarena match (or batch of matches).
 
-    try:
-        log_file = open(log_file_path, 'w')
-        # Use CREATE_NEW_PROCESS_GROUP so docker compose is not killed when
-        # the parent Python process exits (e.g. Django dev-server reload).
-        creation_flags = 0
-        if os.name == 'nt':
-            creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
-
-        proc = subprocess.Popen(
-            [
-                'docker', 'compose',
-                '-f', 'docker-compose.yml',
-                '-f', 'docker-compose.override.yml',
-                '-p', f'aiarena_{match_id}',
-                'up', '--build', '--abort-on-container-exit',
-            ],
-            cwd=run_dir,
-            stdout=log_file,
-            stderr=subprocess.STDOUT,
-            creationflags=creation_flags,
+    The containers are run by the configured container backend
+    (``container_backend.py``).  With the compose CLI, docker compose is
+    launched via ``Popen`` so the child process persists even if the
+    Django dev-server auto-reloads, and a PID file is written so that
+    ``collect_match_result`` can reconcile matches whose supervisor was
+    lost.
+
+    When a warm pool slot is free (``warm_pool.py``) the match is played
+    against its already running SC2 controller instead of a fresh stack.
+    """
+
+    def __init__(self, run_dir: str, match_id: int, log_file_path: str):
+        # A batch gets the two-hour allowance per match.
+        super().__init__(match_id, supervisor.MATCH_TIMEOUT * _count_matches_in_file(run_dir))
+        self.run_dir = run_dir
+        self.log_file_path = log_file_path
+        self.pid_file = os.path.join(run_dir, 'docker.pid')
+        self.backend = container_backend.get_backend()
+        self.warm_slot: int | None = None
+        self.handle = None
+
+    def start(self) -> None:
+        from . import warm_pool
+
+        match_id = self.match_id
+        match_phases.record(match_id, launched=None)
+        self.warm_slot = warm_pool.claim_slot(match_id)
+        if self.warm_slot is not None:
+            warm_pool.load_match(self.warm_slot, self.run_dir)
+            project = warm_pool.get_project_name(self.warm_slot)
+            stack_dir = warm_pool.get_slot_dir(self.warm_slot)
+            services = warm_pool.MATCH_SERVICES
+            logger.info('Match %d: starting containers in warm slot %d (%s backend)', match_id, self.warm_slot, self.backend.name)
+        else:
+            project = f'aiarena_{match_id}'
+            stack_dir = self.run_dir
+            services = ()
+            logger.info('Match %d: starting containers in %s (%s backend)', match_id, self.run_dir, self.backend.name)
+        self.handle = self.backend.start_stack(
+            project, stack_dir, self.log_file_path,
+            services=services, pid_file=self.pid_file,
         )
 
-        # Persist PID so recovery can find the process later.
-        with open(pid_file, 'w') as f:
-            f.write(str(proc.pid))
+    def poll(self) -> container_backend.RunResult | None:
+        return self.backend.poll(self.handle)
 
-        logger.info('Match %d: docker compose started (pid %d)', match_id, proc.pid)
+    def stop(self) -> None:
+        if self.handle is not None:
+            self.backend.stop(self.handle)
 
-        # Block until the process finishes (or the thread is killed).
-        proc.wait(timeout=7200)
-        log_file.close()
+    def finish(self, run_result: container_backend.RunResult | None) -> None:
+        from . import warm_pool
 
-        logger.info('Match %d: docker compose exited with code %d', match_id, proc.returncode)
+        match_id = self.match_id
+        match_failed = True
+        try:
+            if run_result is None:
+                _mark_batch_crashed(match_id, 'LaunchFailed')
+            elif run_result.timed_out:
+                logger.warning('Match %d: containers timed out after %dh', match_id, self.timeout // 3600)
+                _mark_batch_crashed(match_id, 'Timeout')
+            else:
+                logger.info(
+                    'Match %d: containers exited with code %s after %.0fs',
+                    match_id, run_result.exit_code, run_result.seconds,
+                )
+                match_phases.record(match_id, game_end=run_result.finished_at.timestamp())
+                match_failed = run_result.exit_code != 0
+                if self.warm_slot is not None:
+                    warm_pool.collect_artifacts(self.warm_slot, self.run_dir)
+                _collect_and_save_result(self.run_dir, match_id, run_result.exit_code)
 
-        _collect_and_save_result(run_dir, match_id)
+        except Exception:
+            logger.exception('Match %d: unexpected error collecting the result', match_id)
+            match_failed = True
+            _mark_batch_crashed(match_id)
 
-    except subprocess.TimeoutExpired:
-        logger.warning('Match %d: docker compose timed out after 2h', match_id)
-        if proc is not None:
+        finally:
+            # Always attempt cleanup, but never let it affect match results.
             try:
-                proc.terminate()
+                if self.warm_slot is not None:
+                    warm_pool.release_slot(self.warm_slot, self.run_dir, failed=match_failed, match_id=match_id)
+                else:
+                    self.backend.remove_stack(f'aiarena_{match_id}', self.run_dir)
             except Exception:
                 pass
-        if log_file is not None:
-            try:
-                log_file.close()
-            except Exception:
-                pass
-        from .models import Match as MatchModel
-        try:
-            match_obj = MatchModel.objects.get(id=match_id)
-            match_obj.result = 'Crash'
-            match_obj.end_timestamp = timezone.now()
-            match_obj.save()
-        except MatchModel.DoesNotExist:
-            pass
-
-    except Exception:
-        logger.exception('Match %d: unexpected error in _run_docker_match', match_id)
-        if log_file is not None:
+            # Remove PID file after cleanup.
             try:
-                log_file.close()
-            except Exception:
+                os.remove(self.pid_file)
+            except OSError:
                 pass
-        from .models import Match as MatchModel
-        try:
-            match_obj = MatchModel.objects.get(id=match_id)
-            match_obj.result = 'Crash'
-            match_obj.end_timestamp = timezone.now()
-            match_obj.save()
-        except MatchModel.DoesNotExist:
-            pass
-
-    finally:
-        # Always attempt cleanup, but never let it affect match results.
-        try:
-            subprocess.run(
-                compose_down_cmd,
-                cwd=run_dir,
-                capture_output=True,
-                timeout=120,
-            )
-        except Exception:
-            pass
-        # Remove PID file after cleanup.
-        try:
-            os.remove(pid_file)
-        except OSError:
-            pass
-
-        # Decrement the active count and start any queued matches.
-        try:
-            from . import match_queue
-            match_queue.notify_match_finished()
-        except Exception:
-            logger.exception('Match %d: error notifying queue after completion', match_id)
+            match_phases.record(match_id, teardown_done=None)
 
 
-def _collect_and_save_result(run_dir: str, match_id: int) -> None:
-    """Parse results.json and update the Match record in the database.
+def _collect_and_save_result(run_dir: str, match_id: int, exit_code: int | None = None) -> None:
+    """Parse results.json and update the Match records in the database.
 
-    Extracted from ``_run_docker_match`` so it can also be called by the
+    Extracted from ``_AiarenaMatchJob`` so it can also be called by the
     stale-match recovery path (``collect_match_result``).
+
+    For a batch, the n-th entry of results.json belongs to the n-th line
+    of the matches file: the leader (*match_id*) first, then its batch
+    members by id.  Members get their own run directory holding their
+    replay and a copy of the logs so replay/log links keep working.
     """
-    aiarena_result = _parse_results(run_dir)
-    logger.info('Match %d: parsed results: %s', match_id, aiarena_result)
+    aiarena_results = _parse_results(run_dir)
+    logger.info('Match %d: parsed results: %s', match_id, aiarena_results)
 
     from .models import Match as MatchModel
-    try:
-        match_obj = MatchModel.objects.get(id=match_id)
-    except MatchModel.DoesNotExist:
+    batch = list(
+        MatchModel.objects.filter(Q(id=match_id) | Q(batch_leader_id=match_id))
+        .select_related('test_bot')
+        .order_by('id')
+    )
+    if not batch or batch[0].id != match_id:
         logger.error('Match %d: Match record not found in DB after game finished', match_id)
         return
+    if len(batch) > 1:
+        _distribute_batch_artifacts(run_dir, batch[1:])
+
+    with transaction.atomic():
+        for index, match_obj in enumerate(batch):
+            aiarena_result = aiarena_results[index] if index < len(aiarena_results) else None
+            _save_match_result(match_obj, aiarena_result, exit_code)
+        results_summary.refresh_groups({match_obj.test_group_id for match_obj in batch})
+
+
+def _save_match_result(match_obj: Match, aiarena_result: dict | None, exit_code: int | None = None) -> None:
+    """Record one parsed results.json entry (None = no result) on a Match."""
+    match_id = match_obj.id
+    if match_obj.status == 'Cancelled':
+        logger.info('Match %d: cancelled, not recording a result', match_id)
+        return
 
     if aiarena_result:
         result_type = aiarena_result.get('type', 'Error')
         game_steps = aiarena_result.get('game_steps', 0)
         match_obj.result = _map_result_to_match(result_type)
+        match_obj.failure_kind = 'Crash' if match_obj.result == 'Crash' else ''
         if game_steps > 0:
             match_obj.duration_in_game_time = _game_steps_to_seconds(game_steps)
     else:
         match_obj.result = 'Crash'
+        match_obj.failure_kind = 'NoResult'
 
-    match_obj.end_timestamp = timezone.now()
+    now = timezone.now()
+    match_obj.status = 'Finished'
+    match_obj.end_timestamp = now
+    match_obj.finished_at = now
+    match_obj.exit_code = exit_code
 
     # Try to extract the test bot's resolved race from its stderr log
     if match_obj.test_bot:
@@ -1388,6 +1436,46 @@ def _collect_and_save_result(run_dir: str, match_id: int) -> None:
     )
 
 
+def _distribute_batch_artifacts(run_dir: str, members: list[Match]) -> None:
+    """Give each batch member a run directory with its replay and the logs.
+
+    Replays are assigned in the order they were written; when their count
+    doesn't match the batch they all stay with the leader.
+    """
+    replays = sorted(
+        glob.glob(os.path.join(run_dir, 'replays', '*.SC2Replay')),
+        key=os.path.getmtime,
+    )
+    assign_replays = len(replays) == len(members) + 1
+    for index, member in enumerate(members, start=1):
+        member_dir = get_run_dir(member.id)
+        try:
+            os.makedirs(os.path.join(member_dir, 'replays'), exist_ok=True)
+            if assign_replays:
+                shutil.move(replays[index], os.path.join(member_dir, 'replays'))
+            log_path = os.path.join(run_dir, 'compose_output.log')
+            if os.path.isfile(log_path):
+                shutil.copy2(log_path, member_dir)
+            logs_dir = os.path.join(run_dir, 'logs')
+            if os.path.isdir(logs_dir):
+                shutil.copytree(logs_dir, os.path.join(member_dir, 'logs'), dirs_exist_ok=True)
+        except OSError:
+            logger.exception('Match %d: could not copy batch artifacts', member.id)
+
+
+def _mark_batch_crashed(match_id: int, failure_kind: str = 'Crash') -> None:
+    """Mark a match and its batch members (unless cancelled) as crashed."""
+    from .models import Match as MatchModel
+    now = timezone.now()
+    with transaction.atomic():
+        MatchModel.objects.filter(
+            Q(id=match_id) | Q(batch_leader_id=match_id),
+        ).exclude(status='Cancelled').update(
+            result='Crash', status='Finished', failure_kind=failure_kind, end_timestamp=now, finished_at=now,
+        )
+        results_summary.refresh_for_matches([match_id])
+
+
 def _is_process_running(pid: int) -> bool:
     """Check whether a process with the given PID is still alive."""
     if os.name == 'nt':
@@ -1409,13 +1497,14 @@ def _is_process_running(pid: int) -> bool:
 
 
 def collect_match_result(match_id: int) -> str | None:
-    """Check a pending match and collect its result if docker has finished.
+    """Check a running match and collect its result if docker has finished.
 
     Returns the new result string, or ``None`` if the match is still
     running or has no run directory.
 
-    This is the recovery path for matches whose monitoring daemon thread
-    was killed (e.g. by a Django dev-server reload).
+    This is the recovery path for matches no supervisor is watching
+    (e.g. after a Django dev-server reload); see
+    ``scheduler.reconcile_stale_matches``.
     """
     run_dir = get_run_dir(match_id)
     if not os.path.isdir(run_dir):
@@ -1433,9 +1522,20 @@ def collect_match_result(match_id: int) -> str | None:
         except (ValueError, OSError):
             pass
 
+    from . import warm_pool
+    backend = container_backend.get_backend()
+    warm_slot = warm_pool.get_match_slot(run_dir)
+    if warm_slot is not None:
+        project, services = warm_pool.get_project_name(warm_slot), warm_pool.MATCH_SERVICES
+    else:
+        project, services = f'aiarena_{match_id}', ()
+    if backend.is_running(project, services):
+        return None  # still running
+
     # Process is no longer running (or never started).  Try to collect results.
     results_path = os.path.join(run_dir, 'results.json')
     log_path = os.path.join(run_dir, 'compose_output.log')
+    backend.collect_exited(project, log_path, services)
 
     # If the log file is empty and results are empty, docker never ran.
     log_size = 0
@@ -1444,22 +1544,17 @@ def collect_match_result(match_id: int) -> str | None:
     except OSError:
         pass
 
+    if warm_slot is not None:
+        warm_pool.collect_artifacts(warm_slot, run_dir)
+
     _collect_and_save_result(run_dir, match_id)
 
-    # Clean up: docker compose down
+    # Clean up: release the warm slot or remove the stack
     try:
-        subprocess.run(
-            [
-                'docker', 'compose',
-                '-f', 'docker-compose.yml',
-                '-f', 'docker-compose.override.yml',
-                '-p', f'aiarena_{match_id}', 'down',
-                '--rmi', 'local',
-            ],
-            cwd=run_dir,
-            capture_output=True,
-            timeout=120,
-        )
+        if warm_slot is not None:
+            warm_pool.release_slot(warm_slot, run_dir, match_id=match_id)
+        else:
+            backend.remove_stack(project, run_dir)
     except Exception:
         pass
 
@@ -1474,26 +1569,3 @@ def collect_match_result(match_id: int) -> str | None:
         return MatchModel.objects.get(id=match_id).result
     except MatchModel.DoesNotExist:
         return None
-
-
-def check_stale_pending_matches() -> dict[int, str]:
-    """Scan for pending aiarena matches whose docker process has finished.
-
-    Returns a dict of ``{match_id: new_result}`` for matches that were
-    recovered.  Matches still running are left alone.
-    """
-    from .models import Match as MatchModel
-
-    recovered: dict[int, str] = {}
-    pending = MatchModel.objects.filter(result='Pending')
-
-    for match_obj in pending:
-        run_dir = get_run_dir(match_obj.id)
-        if not os.path.isdir(run_dir):
-            continue  # not an aiarena match, or run dir was cleaned up
-
-        result = collect_match_result(match_obj.id)
-        if result is not None:
-            recovered[match_obj.id] = result
-
-    return recovered
@@ -0,0 +1,732 @@
+"""Container backends that run match containers.
+
+Matches are described the way ``docker compose`` sees them: a
+single-container match is a ``docker compose run`` command line against
+a compose file, and an aiarena match is a run directory holding
+``docker-compose.yml`` and the generated ``docker-compose.override.yml``.
+Two backends execute them:
+
+- ``ComposeCliBackend`` forks the ``docker compose`` CLI.  It is the
+  default, and the fallback whenever the Engine API is unavailable.
+- ``DockerEngineBackend`` talks to the Docker Engine API through the
+  optional ``docker`` package.  It reads the same compose files itself
+  and creates, starts and removes the containers directly.  One docker
+  event subscription reports every container exit, and a container's
+  log is fetched once, into the match log file, when its match ends.
+  Exit codes and timings come from the container state instead of the
+  CLI's exit status.
+
+``SystemConfig.container_backend`` selects the backend and
+``get_backend()`` returns it.  Containers created by the Engine backend
+carry the usual compose labels and names, so ``docker compose down``
+and the resource sampler treat them like compose-created ones.
+"""
+
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import yaml
+from django.utils import timezone
+
+logger = logging.getLogger('test_lab')
+
+# Compose files of an aiarena stack directory, in merge order.
+STACK_FILES = ('docker-compose.yml', 'docker-compose.override.yml')
+
+# Seconds a container gets to stop before it is killed.
+_STOP_TIMEOUT = 10
+
+# Exit events kept for containers that are not polled for.
+_MAX_TRACKED_EXITS = 1000
+
+# Seconds before a failed docker event stream is followed again.
+_EVENTS_RETRY_DELAY = 60
+
+_VARIABLE_RE = re.compile(r'\$\{(\w+)(?::?-([^}]*))?\}|\$(\w+)')
+_VOLUME_RE = re.compile(r'^(.*?):(/[^:]*)(?::(\w+))?$')
+
+
+@dataclass
+class RunResult:
+    """Outcome of running a match's containers.
+
+    *exit_code* is None when the run timed out or the code is unknown.
+    """
+    exit_code: int | None
+    started_at: datetime
+    finished_at: datetime
+    timed_out: bool = False
+
+    @property
+    def seconds(self) -> float:
+        return (self.finished_at - self.started_at).total_seconds()
+
+
+@dataclass
+class RunHandle:
+    """A match started by a backend, passed back to ``poll`` and ``stop``."""
+    log_path: str
+    started_at: datetime
+    process: subprocess.Popen | None = None          # compose CLI
+    containers: list = field(default_factory=list)  # Engine API
+    remove_on_exit: bool = False                     # Engine API one-off run
+
+
+@dataclass
+class ComposeRun:
+    """A ``docker compose run`` invocation, parsed from its CLI arguments."""
+    cwd: str
+    compose_files: list[str]
+    project: str
+    service: str
+    environment: list[str] = field(default_factory=list)
+    volumes: list[str] = field(default_factory=list)
+    command: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_command(cls, command: list[str], cwd: str) -> 'ComposeRun':
+        """Parse a command built by ``views`` or ``match_queue``.
+
+        Understands ``-f``/``-p`` before ``run`` and ``-e``/``-v`` and
+        bare flags (``--rm``, ``--no-deps``) after it; everything after
+        the service name is the command.
+        """
+        args = list(command)
+        if args[:2] != ['docker', 'compose'] or 'run' not in args:
+            raise ValueError(f'not a docker compose run command: {command!r}')
+        compose_files: list[str] = []
+        project = ''
+        index = 2
+        while args[index] != 'run':
+            if args[index] == '-f':
+                compose_files.append(args[index + 1])
+                index += 2
+            elif args[index] == '-p':
+                project = args[index + 1]
+                index += 2
+            else:
+                index += 1
+        index += 1
+        environment: list[str] = []
+        volumes: list[str] = []
+        while index < len(args) and args[index].startswith('-'):
+            if args[index] in ('-e', '-v'):
+                (environment if args[index] == '-e' else volumes).append(args[index + 1])
+                index += 2
+            else:
+                index += 1
+        if index >= len(args):
+            raise ValueError(f'no service in docker compose run command: {command!r}')
+        return cls(
+            cwd=cwd,
+            compose_files=compose_files or ['docker-compose.yml'],
+            project=project or os.path.basename(os.path.normpath(cwd)),
+            service=args[index],
+            environment=environment,
+            volumes=volumes,
+            command=args[index + 1:],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Compose file loading (the subset of compose used by test_lab)
+# ---------------------------------------------------------------------------
+
+def _load_env_file(directory: str) -> dict[str, str]:
+    env: dict[str, str] = {}
+    try:
+        with open(os.path.join(directory, '.env')) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    env[key.strip()] = value.strip()
+    except OSError:
+        pass
+    return env
+
+
+def _substitute(value, env: dict[str, str]):
+    """Replace ``${VAR}``, ``${VAR:-default}`` and ``$VAR`` in every string of *value*."""
+    if isinstance(value, str):
+        def _replace(var_match):
+            name = var_match.group(1) or var_match.group(3)
+            return env.get(name) or var_match.group(2) or ''
+        return _VARIABLE_RE.sub(_replace, value)
+    if isinstance(value, list):
+        return [_substitute(item, env) for item in value]
+    if isinstance(value, dict):
+        return {key: _substitute(item, env) for key, item in value.items()}
+    return value
+
+
+def _env_dict(environment) -> dict[str, str]:
+    """Normalise a compose ``environment`` (list of ``K=V`` or dict) to a dict."""
+    if not environment:
+        return {}
+    if isinstance(environment, dict):
+        return {key: '' if value is None else str(value) for key, value in environment.items()}
+    env: dict[str, str] = {}
+    for item in environment:
+        key, _, value = str(item).partition('=')
+        env[key] = value
+    return env
+
+
+def _split_volume(volume: str) -> tuple[str, str, str]:
+    """Split ``host:container[:mode]`` (the host may contain a drive colon)."""
+    volume_match = _VOLUME_RE.match(volume)
+    if not volume_match:
+        raise ValueError(f'unsupported volume: {volume!r}')
+    return volume_match.group(1), volume_match.group(2), volume_match.group(3) or ''
+
+
+def _merge_volumes(base: list[str], extra: list[str]) -> list[str]:
+    """Merge volume lists; a later mount of the same container path wins."""
+    merged: dict[str, str] = {}
+    for volume in [*base, *extra]:
+        merged[_split_volume(volume)[1]] = volume
+    return list(merged.values())
+
+
+def load_compose_services(directory: str, compose_files) -> dict[str, dict]:
+    """Return the merged service definitions of *compose_files* in *directory*.
+
+    Variables are taken from the shell environment and the directory's
+    ``.env``.  Later files override earlier ones key by key, with
+    ``environment`` merged by name and ``volumes`` by container path.
+    """
+    env = {**_load_env_file(directory), **os.environ}
+    services: dict[str, dict] = {}
+    for filename in compose_files:
+        path = os.path.join(directory, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path) as f:
+            data = _substitute(yaml.safe_load(f) or {}, env)
+        for name, service in (data.get('services') or {}).items():
+            merged = services.setdefault(name, {})
+            for key, value in (service or {}).items():
+                if key == 'volumes':
+                    merged['volumes'] = _merge_volumes(merged.get('volumes', []), value or [])
+                elif key == 'environment':
+                    merged['environment'] = {**_env_dict(merged.get('environment')), **_env_dict(value)}
+                else:
+                    merged[key] = value
+    return services
+
+
+def _resolve_volume(volume: str, directory: str) -> str:
+    """Make a relative host path in a volume absolute (relative to *directory*)."""
+    host, container, mode = _split_volume(volume)
+    if host.startswith('.'):
+        host = os.path.normpath(os.path.join(directory, host)).replace('\\', '/')
+    return f'{host}:{container}:{mode}' if mode else f'{host}:{container}'
+
+
+def _parse_docker_time(value: str) -> datetime | None:
+    """Parse a Docker API timestamp (RFC 3339 with nanoseconds)."""
+    if not value or value.startswith('0001-'):
+        return None
+    value = value.replace('Z', '+00:00')
+    value = re.sub(r'(\.\d{6})\d+', r'\1', value)
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+
+class ContainerBackend:
+    """Interface of a container backend.
+
+    Starting returns a ``RunHandle`` at once; the caller then polls it
+    until the match has finished.  Nothing blocks for the length of a
+    game, so one supervisor can watch any number of matches.
+    """
+
+    name = ''
+
+    def start_service(self, command: list[str], cwd: str, log_path: str) -> RunHandle:
+        """Start a ``docker compose run`` command line."""
+        raise NotImplementedError
+
+    def start_stack(
+        self, project: str, directory: str, log_path: str,
+        services: tuple[str, ...] = (), pid_file: str | None = None,
+    ) -> RunHandle:
+        """Bring up the stack in *directory*; it ends when its first container exits.
+
+        With *services* only those services are started (their
+        dependencies are expected to be running already).  *pid_file*
+        receives the PID of a CLI process so recovery can find it.
+        """
+        raise NotImplementedError
+
+    def poll(self, handle: RunHandle) -> RunResult | None:
+        """Return the result once the match has finished, else None."""
+        raise NotImplementedError
+
+    def stop(self, handle: RunHandle) -> None:
+        """Stop a match that is still running (e.g. on timeout)."""
+        raise NotImplementedError
+
+    def remove_stack(
+        self, project: str, directory: str, services: tuple[str, ...] = (),
+        compose_files: tuple[str, ...] = STACK_FILES,
+    ) -> None:
+        """Stop and remove a project's containers (only *services* if given)."""
+        raise NotImplementedError
+
+    def is_running(self, project: str, services: tuple[str, ...] = ()) -> bool:
+        """Return True if the backend knows the project is still playing.
+
+        The CLI backend cannot tell; its callers use the PID file.
+        """
+        return False
+
+    def collect_exited(self, project: str, log_path: str, services: tuple[str, ...] = ()) -> bool:
+        """Write the logs of a finished project's containers to *log_path*.
+
+        Used when the process supervising them was lost.  Returns True if
+        logs were written.
+        """
+        return False
+
+    def list_projects(self) -> dict[str, dict[str, str]] | None:
+        """Return ``{project: {service: state}}`` for every compose container.
+
+        One call to the daemon covers all matches; *state* is docker's
+        container state (``running``, ``exited``, ...).  Returns None if
+        docker can't be queried.
+        """
+        raise NotImplementedError
+
+
+class ComposeCliBackend(ContainerBackend):
+    """Runs matches by forking the ``docker compose`` CLI."""
+
+    name = 'Compose'
+
+    def start_service(self, command, cwd, log_path):
+        with open(log_path, 'w') as log:
+            proc = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=log)
+        return RunHandle(log_path=log_path, started_at=timezone.now(), process=proc)
+
+    def start_stack(self, project, directory, log_path, services=(), pid_file=None):
+        command = [
+            'docker', 'compose',
+            '-f', STACK_FILES[0],
+            '-f', STACK_FILES[1],
+            '-p', project,
+            'up', '--abort-on-container-exit',
+        ]
+        if services:
+            command += ['--no-deps', *services]
+
+        # Use CREATE_NEW_PROCESS_GROUP so docker compose is not killed when
+        # the parent Python process exits (e.g. Django dev-server reload).
+        creation_flags = 0
+        if os.name == 'nt':
+            creation_flags = subprocess.CREATE_NEW_PROCESS_GROUP
+
+        with open(log_path, 'w') as log:
+            proc = subprocess.Popen(
+                command,
+                cwd=directory,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                creationflags=creation_flags,
+            )
+        if pid_file:
+            with open(pid_file, 'w') as f:
+                f.write(str(proc.pid))
+        logger.info('%s: docker compose started (pid %d)', project, proc.pid)
+        return RunHandle(log_path=log_path, started_at=timezone.now(), process=proc)
+
+    def poll(self, handle):
+        exit_code = handle.process.poll()
+        if exit_code is None:
+            return None
+        return RunResult(exit_code, handle.started_at, timezone.now())
+
+    def stop(self, handle):
+        try:
+            handle.process.terminate()
+        except Exception:
+            pass
+
+    def remove_stack(self, project, directory, services=(), compose_files=STACK_FILES):
+        command = ['docker', 'compose']
+        for filename in compose_files:
+            command += ['-f', filename]
+        command += ['-p', project]
+        if services:
+            command += ['rm', '--force', '--stop', *services]
+        else:
+            command += ['down', '--remove-orphans']
+        subprocess.run(command, cwd=directory, capture_output=True, timeout=120)
+
+    def list_projects(self):
+        try:
+            ps = subprocess.run(
+                [
+                    'docker', 'ps', '--all',
+                    '--filter', 'label=com.docker.compose.project',
+                    '--format', '{{.Label "com.docker.compose.project"}}\t'
+                                '{{.Label "com.docker.compose.service"}}\t{{.State}}',
+                ],
+                capture_output=True, text=True, timeout=30,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if ps.returncode != 0:
+            return None
+        projects: dict[str, dict[str, str]] = {}
+        for line in ps.stdout.splitlines():
+            parts = line.split('\t')
+            if len(parts) == 3:
+                projects.setdefault(parts[0], {})[parts[1]] = parts[2]
+        return projects
+
+
+def _log_prefixes(containers: list) -> list[str]:
+    """Return the compose-style log prefix of each of *containers*."""
+    if len(containers) < 2:
+        return [''] * len(containers)
+    labels = [f'{c.labels.get("com.docker.compose.service", c.name)}-1' for c in containers]
+    width = max(len(label) for label in labels)
+    return [f'{label:<{width}}  | ' for label in labels]
+
+
+class DockerEngineBackend(ContainerBackend):
+    """Runs matches through the Docker Engine API (``docker`` package).
+
+    Container exits come from a single ``die`` event subscription shared
+    by all matches (``_follow_exits``), so a running match costs no API
+    calls per poll and the thread count doesn't grow with matches.  If
+    the event stream can't be followed, ``poll`` falls back to reloading
+    the containers.  Container output is written to the match log when
+    the match ends (image build output as it happens).
+    """
+
+    name = 'Engine'
+
+    def __init__(self, client):
+        self.client = client
+        # Exit codes of containers that died, by container id.
+        self._exits: dict[str, int | None] = {}
+        self._exits_lock = threading.Lock()
+        self._events_thread: threading.Thread | None = None
+        # Unix time the event stream is (re)read from, so no exit is missed.
+        self._events_since = int(time.time())
+        # After the stream fails, it is not retried before this (monotonic) time.
+        self._events_retry_at = 0.0
+
+    # -- helpers ------------------------------------------------------------
+
+    @staticmethod
+    def _labels(project: str, service: str, oneoff: bool) -> dict[str, str]:
+        return {
+            'com.docker.compose.project': project,
+            'com.docker.compose.service': service,
+            'com.docker.compose.oneoff': 'True' if oneoff else 'False',
+            'com.docker.compose.container-number': '1',
+        }
+
+    def _project_containers(self, project: str, services: tuple[str, ...] = ()) -> list:
+        containers = self.client.containers.list(
+            all=True, filters={'label': f'com.docker.compose.project={project}'},
+        )
+        if services:
+            containers = [
+                c for c in containers
+                if c.labels.get('com.docker.compose.service') in services
+            ]
+        return containers
+
+    def _image(self, project: str, service_name: str, service: dict, directory: str, log) -> str:
+        """Return the image of a service, building or pulling it when missing.
+
+        Like compose, a service with both ``build`` and ``image`` is only
+        built when that image doesn't exist yet (see ``image_cache.py``).
+        """
+        import docker
+
+        build = service.get('build')
+        image = service.get('image')
+        if image:
+            try:
+                self.client.images.get(image)
+                return image
+            except docker.errors.ImageNotFound:
+                if not build:
+                    log.write(f'Pulling {image}\n')
+                    self.client.images.pull(image)
+                    return image
+        if isinstance(build, str):
+            build = {'context': build}
+        context = os.path.normpath(os.path.join(directory, build.get('context', '.')))
+        tag = image or f'{project}-{service_name}'
+        _, build_log = self.client.images.build(
+            path=context, dockerfile=build.get('dockerfile', 'Dockerfile'), tag=tag, rm=True,
+        )
+        for entry in build_log:
+            if entry.get('stream'):
+                log.write(entry['stream'])
+        log.flush()
+        return tag
+
+    def _create(
+        self, project: str, service_name: str, service: dict, image: str, directory: str,
+        name: str, oneoff: bool, network: str | None = None,
+        environment=(), volumes=(), command=(),
+    ):
+        for stale in self.client.containers.list(all=True, filters={'name': f'^/{name}$'}):
+            stale.remove(force=True)
+        env = {**_env_dict(service.get('environment')), **_env_dict(environment)}
+        binds = [
+            _resolve_volume(v, directory)
+            for v in _merge_volumes(service.get('volumes') or [], list(volumes))
+        ]
+        service_command = service.get('command')
+        kwargs = {
+            'command': list(command) or service_command or None,
+            'name': name,
+            'environment': env,
+            'volumes': binds,
+            'working_dir': service.get('working_dir'),
+            'labels': self._labels(project, service_name, oneoff),
+            'detach': True,
+        }
+        if service.get('network_mode'):
+            kwargs['network_mode'] = service['network_mode']
+        elif network:
+            kwargs['network'] = network
+            kwargs['networking_config'] = {
+                network: self.client.api.create_endpoint_config(aliases=[service_name]),
+            }
+        return self.client.containers.create(image, **kwargs)
+
+    def _ensure_network(self, project: str) -> str:
+        name = f'{project}_default'
+        if not self.client.networks.list(names=[name]):
+            self.client.networks.create(
+                name,
+                driver='bridge',
+                labels={'com.docker.compose.project': project, 'com.docker.compose.network': 'default'},
+            )
+        return name
+
+    @staticmethod
+    def _write_logs(containers: list, log_path: str, mode: str) -> None:
+        """Write the output of *containers* to *log_path*, prefixed like compose."""
+        with open(log_path, mode) as log:
+            for prefix, container in zip(_log_prefixes(containers), containers):
+                try:
+                    output = container.logs().decode('utf-8', errors='replace')
+                except Exception:
+                    logger.warning('Could not read the log of container %s', container.name)
+                    continue
+                for line in output.splitlines():
+                    log.write(prefix + line + '\n')
+
+    def _watch_exits(self) -> bool:
+        """Make sure the exit event subscription is running; False if it can't be."""
+        with self._exits_lock:
+            if self._events_thread is None or not self._events_thread.is_alive():
+                if time.monotonic() < self._events_retry_at:
+                    return False
+                self._events_thread = threading.Thread(
+                    target=self._follow_exits, name='docker-events', daemon=True,
+                )
+                self._events_thread.start()
+            return self._events_thread.is_alive()
+
+    def _follow_exits(self) -> None:
+        """Record the exit code of every compose container that dies (event thread)."""
+        try:
+            events = self.client.events(
+                since=self._events_since, decode=True,
+                filters={'type': 'container', 'event': 'die', 'label': 'com.docker.compose.project'},
+            )
+            for event in events:
+                exit_code = event.get('Actor', {}).get('Attributes', {}).get('exitCode')
+                with self._exits_lock:
+                    self._exits[event.get('id', '')] = int(exit_code) if exit_code is not None else None
+                    # Exits nobody polls for (e.g. warm pool controllers) must not pile up.
+                    while len(self._exits) > _MAX_TRACKED_EXITS:
+                        del self._exits[next(iter(self._exits))]
+                    self._events_since = max(self._events_since, int(event.get('time', 0)) - 1)
+        except Exception:
+            logger.warning('Docker event stream ended; polling container states instead', exc_info=True)
+        self._events_retry_at = time.monotonic() + _EVENTS_RETRY_DELAY
+
+    def _end(self, handle: RunHandle, exited) -> None:
+        """Stop the containers still running, write their logs and drop one-off ones."""
+        for container in handle.containers:
+            if container is not exited:
+                try:
+                    container.stop(timeout=_STOP_TIMEOUT)
+                except Exception:
+                    pass
+        self._write_logs(handle.containers, handle.log_path, 'a')
+        with self._exits_lock:
+            for container in handle.containers:
+                self._exits.pop(container.id, None)
+        if handle.remove_on_exit:
+            for container in handle.containers:
+                try:
+                    container.remove(force=True)
+                except Exception:
+                    pass
+
+    # -- interface ----------------------------------------------------------
+
+    def start_service(self, command, cwd, log_path):
+        run = ComposeRun.from_command(command, cwd)
+        service = load_compose_services(cwd, run.compose_files)[run.service]
+        with open(log_path, 'w') as log:
+            image = self._image(run.project, run.service, service, cwd, log)
+        container = self._create(
+            run.project, run.service, service, image, cwd,
+            name=f'{run.project}-{run.service}-run', oneoff=True,
+            environment=run.environment, volumes=run.volumes, command=run.command,
+        )
+        self._watch_exits()
+        container.start()
+        return RunHandle(
+            log_path=log_path, started_at=timezone.now(),
+            containers=[container], remove_on_exit=True,
+        )
+
+    def start_stack(self, project, directory, log_path, services=(), pid_file=None):
+        definitions = load_compose_services(directory, STACK_FILES)
+        names = list(services) or list(definitions)
+        network = self._ensure_network(project)
+        containers = []
+        with open(log_path, 'w') as log:
+            for service_name in names:
+                service = definitions[service_name]
+                image = self._image(project, service_name, service, directory, log)
+                containers.append(self._create(
+                    project, service_name, service, image, directory,
+                    name=f'{project}-{service_name}-1', oneoff=False, network=network,
+                ))
+        self._watch_exits()
+        for container in containers:
+            container.start()
+        logger.info('%s: started %d container(s) via the Engine API', project, len(containers))
+        return RunHandle(log_path=log_path, started_at=timezone.now(), containers=containers)
+
+    def poll(self, handle):
+        # Like ``--abort-on-container-exit``: the first exit ends the match.
+        exited = exit_code = None
+        if self._watch_exits():
+            with self._exits_lock:
+                exited = next((c for c in handle.containers if c.id in self._exits), None)
+                if exited is not None:
+                    exit_code = self._exits[exited.id]
+            if exited is None:
+                return None
+            # One call, once the match is over, for the exact timings.
+            try:
+                exited.reload()
+            except Exception:
+                pass
+        else:
+            for container in handle.containers:
+                container.reload()
+                if container.status in ('exited', 'dead'):
+                    exited = container
+                    break
+            if exited is None:
+                return None
+        self._end(handle, exited)
+        state = exited.attrs.get('State', {})
+        return RunResult(
+            state.get('ExitCode') if exit_code is None else exit_code,
+            _parse_docker_time(state.get('StartedAt', '')) or handle.started_at,
+            _parse_docker_time(state.get('FinishedAt', '')) or timezone.now(),
+        )
+
+    def stop(self, handle):
+        self._end(handle, None)
+
+    def remove_stack(self, project, directory, services=(), compose_files=STACK_FILES):
+        for container in self._project_containers(project, services):
+            container.remove(force=True)
+        if services:
+            return
+        for network in self.client.networks.list(names=[f'{project}_default']):
+            network.remove()
+
+    def is_running(self, project, services=()):
+        containers = self._project_containers(project, services)
+        return bool(containers) and all(c.status == 'running' for c in containers)
+
+    def collect_exited(self, project, log_path, services=()):
+        containers = self._project_containers(project, services)
+        if not containers or self.is_running(project, services):
+            return False
+        self._write_logs(containers, log_path, 'w')
+        return True
+
+    def list_projects(self):
+        try:
+            containers = self.client.containers.list(
+                all=True, filters={'label': 'com.docker.compose.project'},
+            )
+        except Exception:
+            return None
+        projects: dict[str, dict[str, str]] = {}
+        for container in containers:
+            project = container.labels.get('com.docker.compose.project', '')
+            service = container.labels.get('com.docker.compose.service', container.name)
+            projects.setdefault(project, {})[service] = container.status
+        return projects
+
+
+_cli_backend = ComposeCliBackend()
+_engine_backend: DockerEngineBackend | None = None
+_engine_unavailable_logged = False
+_engine_lock = threading.Lock()
+
+
+def _get_engine_backend() -> DockerEngineBackend | None:
+    """Return the Engine API backend, or None if it can't be used."""
+    global _engine_backend, _engine_unavailable_logged
+    with _engine_lock:
+        if _engine_backend is not None:
+            return _engine_backend
+        try:
+            import docker
+            client = docker.from_env()
+            client.ping()
+        except Exception as exc:
+            if not _engine_unavailable_logged:
+                logger.warning('Docker Engine API unavailable (%s); using the docker compose CLI', exc)
+                _engine_unavailable_logged = True
+            return None
+        _engine_backend = DockerEngineBackend(client)
+        return _engine_backend
+
+
+def get_backend() -> ContainerBackend:
+    """Return the backend selected by ``SystemConfig.container_backend``."""
+    from .models import SystemConfig
+
+    if SystemConfig.load().container_backend == SystemConfig.ContainerBackend.Engine:
+        engine = _get_engine_backend()
+        if engine is not None:
+            return engine
+    return _cli_backend
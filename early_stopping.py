@@ -0,0 +1,187 @@
+"""Sequential early stopping (SPRT) for test groups.
+
+When a group's test suite has ``early_stopping`` enabled, the scheduler
+runs a sequential probability ratio test on the group's results after
+every pass.  The test decides between
+
+- H0: win rate = baseline - margin (the change made the bot worse)
+- H1: win rate = baseline + margin (the change made the bot better)
+
+where the baseline is the suite's ``sprt_target_win_rate`` or, when that
+is empty, the win rate of the previous group for the same test bot,
+branch and suite.  Each finished game scores 1 (Victory), 0.5 (Tie) or
+0 (Defeat); crashes are ignored.  Once the log-likelihood ratio crosses
+a bound, the decision is stored on the TestGroup and its remaining
+``'Queued'`` matches are cancelled.
+
+The scheduler calls ``evaluate_active_groups`` every pass; a group is
+only evaluated again once its ``TestGroup.version`` (bumped whenever one
+of its matches gets a result) or its suite's SPRT settings changed, and
+only written when its SPRT state changed.
+"""
+
+import logging
+import math
+
+from . import match_queue, results_summary
+
+logger = logging.getLogger('test_lab')
+
+GAME_SCORES = {'Victory': 1.0, 'Tie': 0.5, 'Defeat': 0.0}
+
+# A previous group needs at least this many scored games to be a baseline.
+MIN_BASELINE_GAMES = 5
+
+# Hypothesis win rates are clamped to this range so the log terms stay finite.
+_MIN_RATE = 0.01
+_MAX_RATE = 0.99
+
+# What each active group was last evaluated at: {group_id: state key}.
+_evaluated: dict[int, tuple] = {}
+
+
+def _clamp(rate: float) -> float:
+    return min(_MAX_RATE, max(_MIN_RATE, rate))
+
+
+def get_group_scores(group_id: int) -> list[float]:
+    """Return the score of every finished, non-crashed game in a group."""
+    from .models import Match
+    results = Match.objects.filter(
+        test_group_id=group_id, result__in=list(GAME_SCORES),
+    ).values_list('result', flat=True)
+    return [GAME_SCORES[r] for r in results]
+
+
+def get_baseline_win_rate(group) -> float | None:
+    """Return the baseline win rate for *group*, or None if there is none.
+
+    Uses the suite's target rate when set; otherwise the most recent
+    earlier group for the same test bot, branch and suite with at least
+    ``MIN_BASELINE_GAMES`` scored games.
+    """
+    from .models import Match, TestGroup
+
+    suite = group.test_suite
+    if suite is not None and suite.sprt_target_win_rate is not None:
+        return suite.sprt_target_win_rate
+
+    test_bot_id = (
+        Match.objects.filter(test_group_id=group.id)
+        .values_list('test_bot_id', flat=True)
+        .first()
+    )
+    previous_groups = (
+        TestGroup.objects
+        .filter(
+            id__lt=group.id, branch=group.branch, test_suite=group.test_suite,
+            match__test_bot_id=test_bot_id,
+        )
+        .exclude(id=-1)
+        .distinct()
+        .order_by('-id')
+        .values_list('id', flat=True)[:10]
+    )
+    for previous_id in previous_groups:
+        scores = get_group_scores(previous_id)
+        if len(scores) >= MIN_BASELINE_GAMES:
+            return sum(scores) / len(scores)
+    return None
+
+
+def sprt_bounds(error_rate: float) -> tuple[float, float]:
+    """Return the ``(lower, upper)`` LLR bounds for equal alpha and beta."""
+    alpha = beta = min(0.49, max(1e-6, error_rate))
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def log_likelihood_ratio(scores: list[float], p0: float, p1: float) -> float:
+    """Return the LLR of H1 (win rate *p1*) over H0 (win rate *p0*)."""
+    win_term = math.log(p1 / p0)
+    loss_term = math.log((1 - p1) / (1 - p0))
+    return sum(s * win_term + (1 - s) * loss_term for s in scores)
+
+
+def evaluate_group(group) -> str:
+    """Update the group's SPRT state and cancel its queue if decided.
+
+    Returns the decision (a ``TestGroup.SprtResult`` value) or ``''``.
+    """
+    from .models import TestGroup
+
+    suite = group.test_suite
+    if suite is None or not suite.early_stopping:
+        return ''
+
+    baseline = get_baseline_win_rate(group)
+    if baseline is None:
+        return ''
+
+    p0 = _clamp(baseline - suite.sprt_margin)
+    p1 = _clamp(baseline + suite.sprt_margin)
+    if p0 >= p1:
+        return ''
+
+    llr = log_likelihood_ratio(get_group_scores(group.id), p0, p1)
+    lower, upper = sprt_bounds(suite.sprt_error_rate)
+
+    decision = ''
+    if llr >= upper:
+        decision = TestGroup.SprtResult.Better
+    elif llr <= lower:
+        decision = TestGroup.SprtResult.Worse
+
+    if (group.sprt_llr, group.sprt_baseline_win_rate, group.sprt_result) != (llr, baseline, decision):
+        group.sprt_llr = llr
+        group.sprt_baseline_win_rate = baseline
+        group.sprt_result = decision
+        group.save(update_fields=['sprt_llr', 'sprt_baseline_win_rate', 'sprt_result'])
+        results_summary.touch_groups([group.id])
+        group.version += 1
+
+    if decision:
+        cancelled = match_queue.cancel_queued_matches(group.id)
+        logger.info(
+            'Test group %d: SPRT decided %s (LLR %.2f, baseline %.0f%%); cancelled %d queued match(es)',
+            group.id, decision, llr, baseline * 100, cancelled,
+        )
+    return decision
+
+
+def evaluate_active_groups() -> dict[int, str]:
+    """Run the SPRT for every undecided early-stopping group with open matches.
+
+    Groups unchanged since their last evaluation are skipped.  Returns
+    ``{test_group_id: decision}`` for groups decided this pass.
+    """
+    from .models import TestGroup
+
+    groups = (
+        TestGroup.objects
+        .filter(
+            test_suite__early_stopping=True, sprt_result='',
+            match__status__in=('Queued', 'Running'),
+        )
+        .select_related('test_suite')
+        .distinct()
+    )
+    decided: dict[int, str] = {}
+    active: set[int] = set()
+    for group in groups:
+        active.add(group.id)
+        suite = group.test_suite
+        settings = (suite.sprt_target_win_rate, suite.sprt_margin, suite.sprt_error_rate)
+        if _evaluated.get(group.id) == (group.version, *settings):
+            continue
+        try:
+            decision = evaluate_group(group)
+        except Exception:
+            logger.exception('Test group %d: SPRT evaluation failed', group.id)
+            continue
+        # Keyed after the evaluation: saving the SPRT state bumps the version itself.
+        _evaluated[group.id] = (group.version, *settings)
+        if decision:
+            decided[group.id] = decision
+    for group_id in set(_evaluated) - active:
+        del _evaluated[group_id]
+    return decided
@@ -0,0 +1,207 @@
+"""Content-addressed cache of the images built for matches.
+
+Bots with a custom ``dockerfile`` (and non-Python opponents, which use
+``Dockerfile.proxy_fwd``) run in an image built from a Dockerfile in
+``aiarena/``.  Every such image is tagged with a hash of the Dockerfile
+and the files it copies in, e.g. ``test_lab/proxy_fwd:3f2a9c1d4b5e``:
+
+- compose files give the service both its ``build`` and that ``image``,
+  so ``docker compose`` builds the image the first time it is missing
+  and reuses it for every later match, whatever the project name,
+- changing the Dockerfile or a copied file changes the tag, so the next
+  match builds a fresh image instead of running a stale one,
+- the last use of each tag is recorded in ``aiarena/image_cache.json``
+  and only the ``MAX_CACHED_IMAGES`` most recently used are kept; older
+  ones are removed with ``docker image rm`` (images still used by a
+  container are left alone) by the scheduler's periodic pass
+  (``scheduler.collect_image_garbage``), never in a match launch.
+
+The web and scheduler processes both record uses, so the usage file is
+only read and rewritten while holding an OS lock on
+``image_cache.json.lock``, and written through a unique temporary file.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('test_lab')
+
+IMAGE_REPOSITORY = 'test_lab'
+
+# Number of image tags kept; the least recently used beyond this are removed.
+MAX_CACHED_IMAGES = 10
+
+_lock = threading.Lock()
+
+
+def _get_usage_path() -> str:
+    from .aiarena_runner import AIARENA_DIR
+    return os.path.join(AIARENA_DIR, 'image_cache.json')
+
+
+def _copy_sources(dockerfile_text: str) -> list[str]:
+    """Return the context paths (or globs) a Dockerfile's COPY/ADD lines read."""
+    sources: list[str] = []
+    text = re.sub(r'\\\r?\n', ' ', dockerfile_text)
+    for line in text.splitlines():
+        parts = line.strip().split(None, 1)
+        if len(parts) < 2 or parts[0].upper() not in ('COPY', 'ADD'):
+            continue
+        args = parts[1].strip()
+        if args.startswith('['):
+            try:
+                tokens = json.loads(args)
+            except ValueError:
+                continue
+        else:
+            tokens = args.split()
+        flags = [t for t in tokens if t.startswith('--')]
+        if any(flag.startswith('--from') for flag in flags):
+            continue  # copied from another stage or image, not the context
+        paths = [t for t in tokens if not t.startswith('--')]
+        sources += [p for p in paths[:-1] if '://' not in p]
+    return sources
+
+
+def _hash_path(digest, path: str, context_dir: str) -> None:
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                _hash_path(digest, os.path.join(root, filename), context_dir)
+        return
+    digest.update(os.path.relpath(path, context_dir).replace('\\', '/').encode())
+    try:
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    except OSError:
+        digest.update(b'?')
+
+
+def get_image_tag(dockerfile: str, context_dir: str) -> str:
+    """Return the content-hashed tag for *dockerfile* built in *context_dir*.
+
+    *dockerfile* is relative to *context_dir*.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(os.path.join(context_dir, dockerfile), 'rb') as f:
+            dockerfile_bytes = f.read()
+    except OSError:
+        dockerfile_bytes = b''
+    digest.update(dockerfile_bytes)
+    for source in _copy_sources(dockerfile_bytes.decode('utf-8', errors='replace')):
+        matches = sorted(glob.glob(os.path.join(context_dir, source.lstrip('/'))))
+        for path in matches or [os.path.join(context_dir, source)]:
+            _hash_path(digest, path, context_dir)
+
+    name = os.path.basename(dockerfile).lower().replace('dockerfile', '').strip('._-')
+    name = re.sub(r'[^a-z0-9_.-]+', '_', name) or 'image'
+    return f'{IMAGE_REPOSITORY}/{name}:{digest.hexdigest()[:12]}'
+
+
+def use_image(dockerfile: str, context_dir: str) -> str:
+    """Return the tag for *dockerfile* and record that a match is using it.
+
+    The images beyond ``MAX_CACHED_IMAGES`` are removed later by
+    ``collect_garbage``.
+    """
+    tag = get_image_tag(dockerfile, context_dir)
+    with _usage_lock():
+        usage = _load_usage()
+        usage[tag] = time.time()
+        _save_usage(usage)
+    return tag
+
+
+def collect_garbage(keep: int | None = None) -> list[str]:
+    """Remove the images beyond the *keep* most recently used (default
+    ``MAX_CACHED_IMAGES``).  Returns the removed tags.
+    """
+    if keep is None:
+        keep = MAX_CACHED_IMAGES
+    with _usage_lock():
+        usage = _load_usage()
+        stale = sorted(usage, key=usage.get, reverse=True)[keep:]
+    removed = []
+    for tag in stale:
+        try:
+            result = subprocess.run(
+                ['docker', 'image', 'rm', tag],
+                capture_output=True, text=True, timeout=120,
+            )
+        except (OSError, subprocess.SubprocessError):
+            logger.exception('Could not remove image %s', tag)
+            continue
+        if result.returncode == 0 or 'No such image' in result.stderr:
+            removed.append(tag)
+        else:
+            logger.info('Keeping image %s: %s', tag, result.stderr.strip())
+    if removed:
+        with _usage_lock():
+            usage = _load_usage()
+            for tag in removed:
+                usage.pop(tag, None)
+            _save_usage(usage)
+        logger.info('Removed %d unused match image(s): %s', len(removed), removed)
+    return removed
+
+
+def _load_usage() -> dict[str, float]:
+    try:
+        with open(_get_usage_path()) as f:
+            usage = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return usage if isinstance(usage, dict) else {}
+
+
+def _save_usage(usage: dict[str, float]) -> None:
+    path = _get_usage_path()
+    with tempfile.NamedTemporaryFile(
+        'w', dir=os.path.dirname(path), prefix='image_cache.', suffix='.tmp', delete=False,
+    ) as f:
+        json.dump(usage, f, indent=2, sort_keys=True)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+@contextmanager
+def _usage_lock():
+    """Hold the usage file's lock, in this process and across processes."""
+    lock_path = f'{_get_usage_path()}.lock'
+    with _lock, open(lock_path, 'a+b') as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            while True:
+                try:
+                    # Retries for about 10s before raising.
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
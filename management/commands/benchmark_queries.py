@@ -0,0 +1,202 @@
+"""Check that the lab's hot queries stay index-backed and fast.
+
+Usage::
+
+    python test_lab/quickstart/manage.py benchmark_queries
+    python test_lab/quickstart/manage.py benchmark_queries --matches 200000 --budget-ms 20
+
+Seeds a synthetic match history inside a transaction, runs each hot
+query shape (queue drain, slot ledger, group cancel, map selection,
+results pivot and Maps tab group limits, building-timing plugin)
+against it, then rolls everything back.  A query fails if its plan
+contains a full table scan or its median run time is over the budget.
+"""
+
+import random
+import re
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.utils import timezone
+
+from ... import results_summary
+from ...models import CustomBot, GroupOpponentSummary, Match, MatchEvent, TestGroup
+
+RACES = ('Protoss', 'Terran', 'Zerg')
+BUILDS = ('Air', 'Macro', 'Power', 'Rush', 'Timing')
+DIFFICULTIES = ('Hard', 'VeryHard', 'CheatInsane')
+MAPS = ('MapA', 'MapB', 'MapC', 'MapD', 'MapE', 'MapF')
+MATCHES_PER_GROUP = 50
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _hot_queries(test_bot_id: int, test_group_id: int) -> list[tuple[str, object]]:
+    """Return ``(name, queryset)`` for each hot query shape, as issued by the app."""
+    return [
+        ('queue drain (match_queue)', Match.objects.filter(
+            status='Queued', queued_at__isnull=False, batch_leader__isnull=True,
+        ).order_by('id')),
+        ('slot ledger (match_queue)', Match.objects.filter(status='Running', batch_leader__isnull=True)),
+        ('cancel queued (match_queue)', Match.objects.filter(test_group_id=test_group_id, status='Queued')),
+        ('get_least_used_map (views)', Match.objects.filter(
+            test_bot_id=test_bot_id, opponent_race='Zerg', opponent_build='Macro',
+            opponent_difficulty='CheatInsane', result__in=['Victory', 'Defeat'],
+            test_group_id__gte=0, reused_from__isnull=True,
+        ).order_by('-id').values_list('id', flat=True)[:15]),
+        ('pivot group limit (views)', GroupOpponentSummary.objects.exclude(test_group_id=-1).filter(
+            test_bot_id=test_bot_id,
+        ).values_list('test_group_id', flat=True).distinct().order_by('-test_group_id')[:10]),
+        ('maps group limit (views)', Match.objects.exclude(test_group_id=-1).values_list(
+            'test_group_id', flat=True,
+        ).distinct().order_by('-test_group_id')[:10]),
+        ('building timing (plugin)', MatchEvent.objects.filter(type='Building').filter(
+            match__test_group_id=test_group_id,
+        ).values('match__test_group_id', 'match_id', 'message')),
+    ]
+
+
+def _is_index_backed(plan: str, vendor: str) -> bool:
+    """Return False if *plan* scans a whole table."""
+    if vendor == 'sqlite':
+        # "SCAN match" is a table scan; "SCAN match USING INDEX ..." is not.
+        return not any(
+            re.search(r'\bSCAN \w+$', line.strip()) for line in plan.splitlines()
+        )
+    if vendor == 'mysql':
+        return '"access_type": "ALL"' not in plan
+    if vendor == 'postgresql':
+        return 'Seq Scan' not in plan
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic match history (rolled back afterwards) and check that the '
+        'hot queries are index-backed and within a latency budget.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--matches', type=int, default=50000,
+            help='Number of synthetic matches to seed (default: 50000).',
+        )
+        parser.add_argument(
+            '--budget-ms', type=float, default=50.0,
+            help='Maximum median run time per query, in milliseconds (default: 50).',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Runs per query; the median is compared to the budget (default: 5).',
+        )
+
+    def handle(self, *args, **options):
+        using = router.db_for_write(Match)
+        failures = []
+        try:
+            with transaction.atomic(using=using):
+                test_bot_id, test_group_id = self._seed(options['matches'], using)
+                failures = self._run(test_bot_id, test_group_id, using, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        if failures:
+            raise CommandError(f'{len(failures)} hot query check(s) failed: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot queries are index-backed and within budget.'))
+
+    def _seed(self, count: int, using: str) -> tuple[int, int]:
+        """Insert *count* synthetic matches with summaries and events.  Returns a test bot and group id."""
+        rng = random.Random(0)
+        started = time.perf_counter()
+        bots = [
+            CustomBot.objects.using(using).create(name=f'benchmark_bot_{i}', race=rng.choice(RACES))
+            for i in range(3)
+        ]
+        first_group = (TestGroup.objects.using(using).order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        group_ids = list(range(first_group, first_group + max(1, count // MATCHES_PER_GROUP)))
+        TestGroup.objects.using(using).bulk_create(
+            [TestGroup(id=group_id, description='benchmark') for group_id in group_ids]
+        )
+
+        now = timezone.now()
+        matches = []
+        for i in range(count):
+            finished = i < count - 200
+            result = rng.choice(('Victory', 'Defeat', 'Tie', 'Crash')) if finished else rng.choice(('Queued', 'Pending'))
+            status = 'Finished' if finished else ('Queued' if result == 'Queued' else 'Running')
+            matches.append(Match(
+                test_group_id=group_ids[i // MATCHES_PER_GROUP % len(group_ids)],
+                test_bot=rng.choice(bots),
+                start_timestamp=now - timedelta(minutes=count - i),
+                map_name=rng.choice(MAPS),
+                opponent_race=rng.choice(RACES),
+                opponent_build=rng.choice(BUILDS),
+                opponent_difficulty=rng.choice(DIFFICULTIES),
+                result=result,
+                status=status,
+                queued_at=now,
+                duration_in_game_time=rng.randint(120, 1500) if finished else None,
+            ))
+        Match.objects.using(using).bulk_create(matches, batch_size=2000)
+
+        match_ids = list(
+            Match.objects.using(using).filter(test_group_id__in=group_ids).values_list('id', flat=True)
+        )
+        MatchEvent.objects.using(using).bulk_create([
+            MatchEvent(match_id=match_id, type=event_type, message=rng.choice(('Barracks', 'Gateway')),
+                       game_timestamp=rng.uniform(30, 300))
+            for match_id in rng.sample(match_ids, min(len(match_ids), count // 5))
+            for event_type in ('Building', 'Unit')
+        ], batch_size=2000)
+
+        cells = []
+        rows = Match.objects.using(using).filter(test_group_id__in=group_ids).order_by('id').values(
+            'test_group_id', *results_summary.MATCH_FIELDS,
+        )
+        by_group: dict[int, list] = {}
+        for row in rows:
+            by_group.setdefault(row['test_group_id'], []).append(row)
+        for group_id, group_matches in by_group.items():
+            group_cells, _maps = results_summary.summarize(group_matches)
+            cells += [GroupOpponentSummary(test_group_id=group_id, **cell) for cell in group_cells]
+        GroupOpponentSummary.objects.using(using).bulk_create(cells, batch_size=2000)
+
+        self.stdout.write(
+            f'Seeded {count} matches in {len(group_ids)} test groups '
+            f'({time.perf_counter() - started:.1f}s, rolled back afterwards).'
+        )
+        return bots[0].id, group_ids[len(group_ids) // 2]
+
+    def _run(self, test_bot_id: int, test_group_id: int, using: str, options) -> list[str]:
+        from django.db import connections
+
+        vendor = connections[using].vendor
+        explain_format = 'JSON' if vendor == 'mysql' else None
+        failures = []
+        for name, queryset in _hot_queries(test_bot_id, test_group_id):
+            queryset = queryset.using(using)
+            plan = queryset.explain(format=explain_format)
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            median_ms = statistics.median(timings)
+
+            problems = []
+            if not _is_index_backed(plan, vendor):
+                problems.append('full table scan')
+            if median_ms > options['budget_ms']:
+                problems.append(f'over budget ({options["budget_ms"]:.0f} ms)')
+            status = self.style.ERROR('FAIL') if problems else self.style.SUCCESS('ok')
+            self.stdout.write(f'{status:>4}  {name:<32} {median_ms:8.2f} ms  {"; ".join(problems)}')
+            if problems:
+                failures.append(name)
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+        return failures
@@ -0,0 +1,21 @@
+"""Rebuild the precomputed cells of the Test Groups results pivot.
+
+Usage::
+
+    python test_lab/quickstart/manage.py rebuild_results_summary
+"""
+
+from django.core.management.base import BaseCommand
+
+from ... import results_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the results summary tables (results_summary.py) of every '
+        'test group from its matches.'
+    )
+
+    def handle(self, *args, **options):
+        groups = results_summary.rebuild()
+        self.stdout.write(f'Rebuilt the results summary of {groups} test group(s).')
@@ -0,0 +1,62 @@
+"""Run the match scheduler until interrupted.
+
+Usage::
+
+    python test_lab/quickstart/manage.py run_scheduler
+    python test_lab/quickstart/manage.py run_scheduler --once
+"""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ... import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the match scheduler: start queued matches as soon as capacity '
+        'frees up and reconcile stale matches on a timer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds between queue drains (default: 2).',
+        )
+        parser.add_argument(
+            '--reconcile-interval', type=float, default=30.0,
+            help='Seconds between stale-match reconciliation passes (default: 30).',
+        )
+        parser.add_argument(
+            '--sample-interval', type=float, default=10.0,
+            help='Seconds between CPU/memory samples of running matches (default: 10).',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Run a single reconcile + drain pass and exit.',
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            started = scheduler.tick()
+            self.stdout.write(f'Started {started} queued match(es).')
+            return
+
+        stop_event = threading.Event()
+
+        def _stop(signum, frame):
+            stop_event.set()
+            scheduler.wake()
+
+        signal.signal(signal.SIGINT, _stop)
+        signal.signal(signal.SIGTERM, _stop)
+
+        self.stdout.write('Match scheduler running. Press Ctrl+C to stop.')
+        scheduler.run(
+            poll_interval=options['poll_interval'],
+            reconcile_interval=options['reconcile_interval'],
+            sample_interval=options['sample_interval'],
+            stop_event=stop_event,
+        )
@@ -0,0 +1,127 @@
+"""Timestamped startup and teardown phases of a match.
+
+``Match.phases`` maps a phase name to the Unix time the match reached it.
+The host records when the match was queued and launched and when its
+containers were torn down; the runner scripts record the phases inside
+the container (``runner/run_docker.sh`` and ``runner/match_report.py``)
+and report them with the result.  Phases that don't apply to a match
+(e.g. extension builds for a non-Python bot) are simply missing.
+
+The breakdown shown on the results and run-match pages is the time
+between consecutive recorded phases, labelled by the later phase, so
+the phases always add up to the match's wall-clock time.
+"""
+
+import logging
+import statistics
+import time
+
+logger = logging.getLogger('test_lab')
+
+# (phase, label of the interval that ends at it), in the order they happen.
+PHASES = [
+    ('queued', ''),
+    ('launched', 'Queue wait'),
+    ('container_up', 'Container start'),
+    ('deps_installed', 'Dependencies'),
+    ('extensions_built', 'Extensions'),
+    ('sc2_launched', 'SC2 launch'),
+    ('game_created', 'Game setup'),
+    ('first_step', 'Bot start'),
+    ('game_end', 'Game'),
+    ('teardown_done', 'Teardown'),
+]
+PHASE_NAMES = [name for name, _label in PHASES]
+PHASE_LABELS = [label for _name, label in PHASES[1:]]
+
+# Startup is measured from launch until the bot's first step.
+STARTUP_FROM = 'launched'
+STARTUP_TO = 'first_step'
+
+
+def clean(phases) -> dict[str, float]:
+    """Return the known phases of *phases* with numeric timestamps."""
+    if not isinstance(phases, dict):
+        return {}
+    return {
+        name: float(value) for name, value in phases.items()
+        if name in PHASE_NAMES and isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+def record(match_id: int, phases: dict | None = None, **timestamps) -> None:
+    """Merge phase timestamps into ``Match.phases``.
+
+    Keyword arguments record a phase at the given Unix time, or now when
+    the value is None.  Unknown phase names are ignored.
+    """
+    from . import results_summary
+    from .models import Match
+
+    now = time.time()
+    new = clean(phases)
+    new.update({name: now if value is None else value for name, value in timestamps.items()})
+    new = clean(new)
+    if not new:
+        return
+    try:
+        row = Match.objects.filter(id=match_id).values_list('phases', 'test_group_id').first()
+        if row is None:
+            return
+        current, test_group_id = row
+        Match.objects.filter(id=match_id).update(phases={**clean(current), **new})
+        # The results page shows the phases, so its cached row is stale.
+        results_summary.touch_groups([test_group_id])
+    except Exception:
+        logger.exception('Match %d: could not record phases %s', match_id, sorted(new))
+
+
+def breakdown(phases) -> list[tuple[str, float]]:
+    """Return ``(label, seconds)`` for each interval between recorded phases."""
+    phases = clean(phases)
+    intervals = []
+    previous = None
+    for name, label in PHASES:
+        if name not in phases:
+            continue
+        if previous is not None:
+            intervals.append((label, max(0.0, phases[name] - previous)))
+        previous = phases[name]
+    return intervals
+
+
+def startup_seconds(phases) -> float | None:
+    """Return the seconds from launch to the bot's first step, if both were recorded."""
+    phases = clean(phases)
+    if STARTUP_FROM in phases and STARTUP_TO in phases:
+        return max(0.0, phases[STARTUP_TO] - phases[STARTUP_FROM])
+    return None
+
+
+def summary(phases) -> str:
+    """Return the breakdown as one line, e.g. ``Queue wait 3s · Dependencies 41s``."""
+    return ' · '.join(f'{label} {seconds:.0f}s' for label, seconds in breakdown(phases))
+
+
+def group_trends(phases_by_group: dict[int, list]) -> dict[int, dict]:
+    """Summarise the phases of each test group's matches.
+
+    *phases_by_group* maps a test group id to its matches' ``phases``.
+    Returns ``{group_id: {'startup': median startup seconds or None,
+    'summary': median seconds per phase as one line}}``.
+    """
+    trends = {}
+    for group_id, all_phases in phases_by_group.items():
+        startups = [s for s in map(startup_seconds, all_phases) if s is not None]
+        per_label: dict[str, list[float]] = {}
+        for phases in all_phases:
+            for label, seconds in breakdown(phases):
+                per_label.setdefault(label, []).append(seconds)
+        trends[group_id] = {
+            'startup': statistics.median(startups) if startups else None,
+            'summary': ' · '.join(
+                f'{label} {statistics.median(per_label[label]):.0f}s'
+                for label in PHASE_LABELS if label in per_label
+            ),
+        }
+    return trends
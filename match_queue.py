@@ -1,31 +1,62 @@
 """Match queue — enforces the max-concurrent-custom-bots limit.
 
-Matches that cannot start immediately are saved in the DB with result
+Matches that cannot start immediately are saved in the DB with status
 ``'Queued'`` and launched automatically when capacity becomes available.
 
-The database is the source of truth:
-- **Running** = ``result='Pending'`` with ``start_timestamp`` in the last 24 h.
-- **Queued**  = ``result='Queued'``.
+The database is the source of truth, through ``Match.status``:
+- **Queued**  — handed to ``enqueue()`` (``queued_at`` set), waiting for
+  capacity.  Rows created but not yet enqueued have no ``queued_at``.
+- **Running** — launched (``launched_at`` set); ``result='Pending'``.
+- **Finished** — a result was recorded (``finished_at`` set).
+- **Cancelled** — dropped before finishing (early stopping or a
+  superseded test group); never overwritten by a result.
+
+``result`` mirrors the Queued/Pending/Cancelled states for display.
+
+Bot-vs-bot matches can be batched into one compose stack; batch members
+follow their ``batch_leader``'s state and take no slot of their own.
+
+Queued matches start in priority order: interactive (ad-hoc) matches
+first, then ticket and backfill test groups sharing slots by weighted
+fair share, so one large suite can't block everything behind it.
+
+Queued matches of a branch whose prewarm (``prewarm.py``) is still
+running are held until it finishes.
+
+Running matches are mirrored in an in-memory slot ledger that is updated
+when matches launch and finish and re-synced from the DB every
+``LEDGER_SYNC_SECONDS``, so capacity checks don't query per match.
 
 Each running match consumes "custom bot slots":
 - vs Blizzard AI or replay test (built-in AI) → 1 slot (one CPU core)
 - vs custom bot or vs past version → 2 slots (two CPU cores)
 
+With resource-aware scheduling enabled, matches are instead admitted by
+packing their measured CPU and memory footprints (``resource_usage.py``)
+against the host's cores and RAM; the slot limit is only a fallback.
+
 Launcher closures are held in memory for the current process.  If the
 server restarts (e.g. Django dev-server reload), launchers are
 reconstructed from the Match record and on-disk state when the queue
 is next drained.
+
+When the scheduler daemon (``scheduler.py``) is running it owns the
+queue: other processes only mark new matches ``'Queued'`` and the
+scheduler rebuilds their launchers from disk and starts them.
 """
 
+import json
 import logging
 import os
-import subprocess
 import threading
+import time
+from collections import defaultdict, deque
 from collections.abc import Callable
-from datetime import timedelta
 
 from django.utils import timezone
 
+from .models import TestGroup
+
 logger = logging.getLogger('test_lab')
 
 # In-memory registry of queued match launchers.
@@ -33,6 +64,31 @@ logger = logging.getLogger('test_lab')
 _queued_launchers: dict[int, Callable[[], None]] = {}
 _queue_lock = threading.Lock()
 
+# Matches whose Docker process is being watched by a thread in this
+# process.  Stale-match reconciliation skips them.
+_monitored_matches: set[int] = set()
+
+# Slot ledger: running matches known to this process, keyed by match id.
+# Updated on launch and finish, and re-synced from the DB periodically
+# (other processes and stale-match recovery also change match state).
+_running_matches: dict = {}
+_ledger_synced_at: float | None = None
+_ledger_lock = threading.Lock()
+LEDGER_SYNC_SECONDS = 30.0
+
+# Match fields needed for slot cost and footprint estimates.
+_LEDGER_FIELDS = (
+    'test_group_id', 'test_bot_id', 'opponent_bot_id', 'opponent_commit_hash',
+    'replay_takeover_game_loop',
+)
+
+# Relative share of free slots per priority class (interactive matches
+# are not weighted — they always start first).
+PRIORITY_WEIGHTS = {
+    TestGroup.Priority.TICKET: 3,
+    TestGroup.Priority.BACKFILL: 1,
+}
+
 
 def match_custom_bot_cost(match) -> int:
     """Return how many custom bot slots a match consumes.
@@ -46,14 +102,56 @@ def match_custom_bot_cost(match) -> int:
     return 1
 
 
-def get_running_custom_bot_count() -> int:
-    """Return the total custom bot slots used by running matches."""
+# ---------------------------------------------------------------------------
+# Slot ledger — in-memory view of the running matches, so capacity checks
+# don't rescan the Match table.
+# ---------------------------------------------------------------------------
+
+def _load_running_matches() -> dict:
+    """Return ``{match_id: Match}`` for running matches (one query)."""
     from .models import Match
-    cutoff = timezone.now() - timedelta(hours=24)
     running = Match.objects.filter(
-        result='Pending', start_timestamp__gte=cutoff,
-    ).only('opponent_bot_id', 'opponent_commit_hash')
-    return sum(match_custom_bot_cost(m) for m in running)
+        status='Running', batch_leader__isnull=True,
+    ).only(*_LEDGER_FIELDS)
+    return {m.id: m for m in running}
+
+
+def sync_ledger(force: bool = True) -> None:
+    """Reload the slot ledger from the DB.
+
+    With *force* False, only reloads when the ledger is older than
+    ``LEDGER_SYNC_SECONDS``.
+    """
+    global _running_matches, _ledger_synced_at
+    now = time.monotonic()
+    if not force and _ledger_synced_at is not None and now - _ledger_synced_at < LEDGER_SYNC_SECONDS:
+        return
+    running = _load_running_matches()
+    with _ledger_lock:
+        _running_matches = running
+        _ledger_synced_at = now
+
+
+def _ledger_add(match) -> None:
+    with _ledger_lock:
+        _running_matches[match.id] = match
+
+
+def _ledger_remove(match_id: int) -> None:
+    with _ledger_lock:
+        _running_matches.pop(match_id, None)
+
+
+def _get_running_matches() -> list:
+    """Return the running matches from the ledger, syncing it if stale."""
+    sync_ledger(force=False)
+    with _ledger_lock:
+        return list(_running_matches.values())
+
+
+def get_running_custom_bot_count() -> int:
+    """Return the total custom bot slots used by running matches."""
+    return sum(match_custom_bot_cost(m) for m in _get_running_matches())
 
 
 def get_max_concurrent() -> int:
@@ -62,12 +160,71 @@ def get_max_concurrent() -> int:
     return SystemConfig.load().max_concurrent_custom_bots
 
 
-def has_capacity(cost: int = 1) -> bool:
-    """Return True if a match with the given cost can be started now."""
-    limit = get_max_concurrent()
-    if limit <= 0:
-        return True
-    return get_running_custom_bot_count() + cost <= limit
+class _Capacity:
+    """Capacity available for one enqueue or drain pass.
+
+    Loads the config (and footprint estimates, when resource-aware
+    scheduling is on) once, then tracks matches started during the pass
+    in memory.
+    """
+
+    def __init__(self):
+        from . import resource_usage
+        from .models import SystemConfig
+
+        config = SystemConfig.load()
+        self.limit = config.max_concurrent_custom_bots
+        self.host = None
+        self.estimates: dict = {}
+        if config.resource_aware_scheduling:
+            self.host = resource_usage.get_host_capacity(config)
+            if self.host is not None:
+                self.estimates = resource_usage.load_footprint_estimates()
+
+        running = _get_running_matches()
+        self.slots_used = sum(match_custom_bot_cost(m) for m in running)
+        self.footprint_used = resource_usage.Footprint()
+        if self.host is not None:
+            for m in running:
+                self.footprint_used += resource_usage.estimate_footprint(m, self.estimates)
+
+    def fits(self, match=None) -> bool:
+        """Return True if *match* can start (any match, when None)."""
+        from . import resource_usage
+
+        if self.host is not None:
+            used = self.footprint_used
+            # Always admit when idle so an oversized match can't stall the queue.
+            if used.cpu_cores <= 0 and used.memory_mb <= 0:
+                return True
+            if match is None:
+                return used.cpu_cores < self.host.cpu_cores and used.memory_mb < self.host.memory_mb
+            needed = used + resource_usage.estimate_footprint(match, self.estimates)
+            return needed.fits_within(self.host)
+
+        if self.limit <= 0:
+            return True
+        cost = match_custom_bot_cost(match) if match is not None else 1
+        return self.slots_used + cost <= self.limit
+
+    def add(self, match) -> None:
+        """Account for *match* having started."""
+        from . import resource_usage
+
+        self.slots_used += match_custom_bot_cost(match)
+        if self.host is not None:
+            self.footprint_used += resource_usage.estimate_footprint(match, self.estimates)
+
+
+def has_capacity(match=None) -> bool:
+    """Return True if *match* can be started now.
+
+    With *match* None, returns True if there is room for the cheapest
+    possible match.  Uses measured footprints when resource-aware
+    scheduling is enabled and the host capacity is known; otherwise
+    counts custom bot slots against ``max_concurrent_custom_bots``.
+    """
+    return _Capacity().fits(match)
 
 
 def enqueue(match_id: int, launcher: Callable[[], None]) -> bool:
@@ -75,119 +232,272 @@ def enqueue(match_id: int, launcher: Callable[[], None]) -> bool:
 
     *launcher* is a zero-arg callable that actually starts the Docker
     process (called in the current thread if capacity is available, or
-    deferred if not).
+    deferred if not, or while the match's branch is being prewarmed).
 
-    The match record is expected to already exist with ``result='Pending'``.
-    We flip it to Queued first so the DB count is accurate during the
-    capacity check, then flip back to Pending if we launch immediately.
+    The match record is expected to already exist (status ``'Queued'``
+    without ``queued_at``).  It is stamped as queued, and flipped to
+    Running if launched immediately.
 
     Returns ``True`` if the match was started immediately, ``False`` if
     it was queued.
     """
+    from . import match_phases, prewarm, results_summary, scheduler
     from .models import Match
 
+    match_phases.record(match_id, queued=None)
+    # The new match gets its cell on the results page.
+    results_summary.refresh_for_matches([match_id])
+    queued_at = timezone.now()
+
+    if not scheduler.owns_queue():
+        # The scheduler process launches it from the on-disk state.
+        _set_batch_status(match_id, 'Queued', queued_at=queued_at)
+        logger.info('Match %d: queued for the scheduler', match_id)
+        return False
+
     with _queue_lock:
-        # Temporarily mark Queued so it doesn't count as running
         try:
-            match = Match.objects.get(id=match_id)
-            match.result = 'Queued'
-            match.save()
+            match = Match.objects.only(*_LEDGER_FIELDS).get(id=match_id)
         except Match.DoesNotExist:
             return False
+        # The ledger may have picked the match up as running already.
+        _ledger_remove(match_id)
 
-        cost = match_custom_bot_cost(match)
-        if has_capacity(cost):
-            match.result = 'Pending'
-            match.save()
+        capacity = _Capacity()
+        if capacity.fits(match) and not prewarm.is_held(match):
+            _set_batch_status(match_id, 'Running', queued_at=queued_at)
+            _ledger_add(match)
             launcher()
             return True
 
+        _set_batch_status(match_id, 'Queued', queued_at=queued_at)
         _queued_launchers[match_id] = launcher
-        logger.info('Match %d: queued (at capacity, %d custom bot slots used)', match_id, get_running_custom_bot_count())
+        logger.info('Match %d: queued (%d custom bot slots used)', match_id, capacity.slots_used)
         return False
 
 
-def notify_match_finished() -> None:
+def _set_batch_status(match_id: int, status: str, **fields) -> None:
+    """Set the status of a match and of the matches batched with it.
+
+    Batch members (``batch_leader`` set) run in their leader's compose
+    stack, so they share its Queued/Running state but never take a slot
+    or get launched on their own.  Extra *fields* are updated as well.
+    """
+    from django.db.models import Q
+    from . import results_summary
+    from .models import Match
+    updates = {'status': status, 'result': 'Pending' if status == 'Running' else status, **fields}
+    if status == 'Running':
+        updates['launched_at'] = timezone.now()
+    matches = Match.objects.filter(Q(id=match_id) | Q(batch_leader_id=match_id))
+    matches.update(**updates)
+    results_summary.touch_groups(set(matches.values_list('test_group_id', flat=True)))
+
+
+def monitor_started(match_id: int) -> None:
+    """Record that a thread in this process is watching *match_id*."""
+    _monitored_matches.add(match_id)
+
+
+def get_monitored_match_ids() -> set[int]:
+    """Return the ids of matches watched by a thread in this process."""
+    return set(_monitored_matches)
+
+
+def notify_match_finished(match_id: int | None = None) -> None:
     """Called when a match completes. Drains the queue if capacity opened up."""
-    with _queue_lock:
-        _drain_unlocked()
+    if match_id is not None:
+        _monitored_matches.discard(match_id)
+        _ledger_remove(match_id)
+    drain_queue()
+
+
+def cancel_queued_matches(test_group_id: int) -> int:
+    """Cancel the queued matches of a test group.
+
+    Their launchers are dropped on the next drain.  Returns the number of
+    matches cancelled.
+    """
+    from . import results_summary
+    from .models import Match
+    now = timezone.now()
+    cancelled = Match.objects.filter(test_group_id=test_group_id, status='Queued').update(
+        status='Cancelled', result='Cancelled', end_timestamp=now, finished_at=now,
+    )
+    if cancelled:
+        results_summary.refresh_groups([test_group_id])
+    return cancelled
+
+
+def cancel_running_matches(test_group_id: int) -> list[int]:
+    """Cancel the running matches of a test group and stop their containers.
+
+    The matches are marked ``'Cancelled'`` first so the match supervisor
+    doesn't record a crash when its containers go away; the containers
+    are then brought down in a background thread.  Returns the ids of
+    the cancelled matches.
+    """
+    from . import results_summary
+    from .models import Match
+
+    running = list(
+        Match.objects.filter(test_group_id=test_group_id, status='Running')
+        .only('id', 'opponent_bot_id', 'opponent_commit_hash')
+    )
+    if not running:
+        return []
+    now = timezone.now()
+    Match.objects.filter(id__in=[m.id for m in running], status='Running').update(
+        status='Cancelled', result='Cancelled', end_timestamp=now, finished_at=now,
+    )
+    for match in running:
+        _ledger_remove(match.id)
+    results_summary.refresh_groups([test_group_id])
+    threading.Thread(
+        target=_stop_match_containers, args=(running,),
+        daemon=True, name=f'stop-group-{test_group_id}',
+    ).start()
+    return [m.id for m in running]
+
+
+def _stop_match_containers(matches: list) -> None:
+    """Stop and remove the containers of each of *matches*."""
+    from . import aiarena_runner, container_backend
+    from .views import AIARENA_COMPOSE_PATH
+
+    for match in matches:
+        try:
+            if match.opponent_bot_id or match.opponent_commit_hash:
+                aiarena_runner.stop_aiarena_match(match.id)
+            else:
+                container_backend.get_backend().remove_stack(
+                    f'match_{match.id}', AIARENA_COMPOSE_PATH,
+                    compose_files=('docker-compose.vs_computer.yml',),
+                )
+            logger.info('Match %d: containers stopped', match.id)
+        except Exception:
+            logger.exception('Match %d: could not stop containers', match.id)
 
 
 def drain_queue() -> int:
     """Start as many queued matches as current capacity allows.
 
-    Returns the number of matches started.
+    Does nothing outside the scheduler process while a scheduler is
+    running.  Returns the number of matches started.
     """
+    from . import scheduler
+
+    if not scheduler.owns_queue():
+        return 0
     with _queue_lock:
         return _drain_unlocked()
 
 
+def _pick_next_group(queues: dict, running_per_group: dict, priorities: dict):
+    """Return the test group whose queued match should start next.
+
+    Interactive groups always go first.  Other groups share slots in
+    proportion to ``PRIORITY_WEIGHTS``: the group with the fewest running
+    matches per unit of weight wins, ties going to the higher class and
+    then the oldest queued match.
+    """
+    def _key(group_id):
+        priority = priorities[group_id]
+        oldest_id = queues[group_id][0].id
+        if priority == TestGroup.Priority.INTERACTIVE:
+            return (0, 0.0, priority, oldest_id)
+        share = running_per_group.get(group_id, 0) / PRIORITY_WEIGHTS.get(priority, 1)
+        return (1, share, priority, oldest_id)
+
+    return min(queues, key=_key)
+
+
 def _drain_unlocked() -> int:
     """Start queued matches while capacity allows.  Caller must hold _queue_lock.
 
-    First processes matches that still have in-memory launchers, then
-    rebuilds launchers for any remaining DB-queued matches (handles
-    server restarts / dev-server reloads).
-    """
-    started = 0
+    Matches are picked by priority class and weighted fair share across
+    test groups (see ``_pick_next_group``), oldest first within a group.
+    In-memory launchers are used when available; otherwise launchers
+    are rebuilt from DB and on-disk state (handles server restarts /
+    dev-server reloads and matches queued by other processes).
 
-    # 1) Drain matches that have in-memory launchers
+    Capacity comes from the slot ledger, so a full drain runs a fixed
+    number of queries plus one update per match started.
+    """
+    from . import prewarm
     from .models import Match as _Match
-    while _queued_launchers and has_capacity():
-        match_id, launcher = next(iter(_queued_launchers.items()))
-        try:
-            m = _Match.objects.get(id=match_id)
-            cost = match_custom_bot_cost(m)
-        except _Match.DoesNotExist:
+
+    started = 0
+    capacity = _Capacity()
+    if not capacity.fits():
+        return started
+
+    queued = list(
+        _Match.objects
+        .filter(status='Queued', queued_at__isnull=False, batch_leader__isnull=True)
+        .select_related('test_group', 'opponent_bot', 'test_bot', 'replay_test')
+        .order_by('id')
+    )
+
+    # Forget launchers whose match is no longer queued (cancelled, deleted).
+    queued_ids = {m.id for m in queued}
+    for match_id in list(_queued_launchers):
+        if match_id not in queued_ids:
             del _queued_launchers[match_id]
+
+    # Matches of a branch whose prewarm is still running wait for it.
+    held = prewarm.get_held_branches()
+
+    queues: dict[int, deque] = defaultdict(deque)
+    priorities: dict[int, int] = {}
+    for match_obj in queued:
+        if held and (match_obj.test_bot_id, match_obj.test_group.branch) in held:
             continue
-        if not has_capacity(cost):
+        queues[match_obj.test_group_id].append(match_obj)
+        priorities[match_obj.test_group_id] = match_obj.test_group.priority
+
+    running_per_group: dict[int, int] = defaultdict(int)
+    for running in _get_running_matches():
+        running_per_group[running.test_group_id] += 1
+
+    while queues:
+        group_id = _pick_next_group(queues, running_per_group, priorities)
+        match_obj = queues[group_id][0]
+        if not capacity.fits(match_obj):
             break
-        del _queued_launchers[match_id]
-        if _start_queued_match(match_id, launcher):
-            started += 1
+        queues[group_id].popleft()
+        if not queues[group_id]:
+            del queues[group_id]
 
-    # 2) Pick up DB-queued matches that lost their in-memory launcher
-    if has_capacity():
-        orphaned = (
-            _Match.objects
-            .filter(result='Queued')
-            .exclude(id__in=list(_queued_launchers.keys()))
-            .select_related('opponent_bot', 'test_bot', 'replay_test')
-            .order_by('id')
-        )
-        for match_obj in orphaned:
-            cost = match_custom_bot_cost(match_obj)
-            if not has_capacity(cost):
-                break
-            launcher = _rebuild_launcher(match_obj)
-            if launcher is None:
-                logger.warning('Match %d: cannot rebuild launcher, skipping', match_obj.id)
-                continue
-            if _start_queued_match(match_obj.id, launcher):
-                started += 1
+        launcher = _queued_launchers.pop(match_obj.id, None) or _rebuild_launcher(match_obj)
+        if launcher is None:
+            logger.warning('Match %d: cannot rebuild launcher, skipping', match_obj.id)
+            continue
+        if _start_queued_match(match_obj, launcher):
+            capacity.add(match_obj)
+            running_per_group[group_id] += 1
+            started += 1
 
     return started
 
 
-def _start_queued_match(match_id: int, launcher: Callable[[], None]) -> bool:
-    """Flip a Queued match to Pending and launch it.  Returns True on success."""
+def _start_queued_match(match, launcher: Callable[[], None]) -> bool:
+    """Flip a Queued match to Running and launch it.  Returns True on success."""
     from .models import Match
-    try:
-        match = Match.objects.get(id=match_id)
-        if match.result != 'Queued':
-            return False
-        match.result = 'Pending'
-        match.save()
-    except Match.DoesNotExist:
+    running = {'status': 'Running', 'result': 'Pending', 'launched_at': timezone.now()}
+    if not Match.objects.filter(id=match.id, status='Queued').update(**running):
         return False
+    if match.opponent_bot_id or match.opponent_commit_hash:
+        Match.objects.filter(batch_leader_id=match.id, status='Queued').update(**running)
+    _ledger_add(match)
 
-    logger.info('Match %d: starting from queue', match_id)
+    logger.info('Match %d: starting from queue', match.id)
     try:
         launcher()
         return True
     except Exception:
-        logger.exception('Match %d: failed to start from queue', match_id)
+        logger.exception('Match %d: failed to start from queue', match.id)
+        _ledger_remove(match.id)
         return False
 
 
@@ -214,17 +524,21 @@ def _rebuild_launcher(match) -> Callable[[], None] | None:
         logger.info('Match %d: rebuilding aiarena launcher from run dir', match_id)
 
         def _launch_aiarena():
-            thread = threading.Thread(
-                target=aiarena_runner._run_docker_match,
-                args=(run_dir, match_id, log_file_path),
-                daemon=True,
-            )
-            thread.start()
+            aiarena_runner._run_docker_match(run_dir, match_id, log_file_path)
 
         return _launch_aiarena
 
-    # --- Single-container matches (all use a single docker-compose.yml) ---
-    from .views import DOCKER_COMPOSE_PATH, _get_logs_dir
+    # --- Single-container matches ---
+    # Launched matches save their exact command next to the log file.
+    spec = _load_launch_spec(match_id)
+    if spec is not None:
+        logger.info('Match %d: rebuilding single-container launcher from launch spec', match_id)
+        return _make_sc_docker_launcher(
+            match_id, spec['command'], spec['cwd'], spec['log_file_path'],
+        )
+
+    # Older queued matches have no launch spec; rebuild from DB fields.
+    from .views import _get_logs_dir
     os.makedirs(_get_logs_dir(), exist_ok=True)
 
     if match.replay_test_id:
@@ -237,9 +551,37 @@ def _rebuild_launcher(match) -> Callable[[], None] | None:
     return None
 
 
+def _launch_spec_path(match_id: int) -> str:
+    from .views import _get_logs_dir
+    return os.path.join(_get_logs_dir(), f'{match_id}_launch.json')
+
+
+def save_launch_spec(match_id: int, command: list[str], cwd: str, log_file_path: str) -> None:
+    """Persist a single-container launch command so any process can start it.
+
+    The scheduler uses this to launch matches that were queued by a web
+    process.
+    """
+    path = _launch_spec_path(match_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'command': command, 'cwd': cwd, 'log_file_path': log_file_path}, f)
+
+
+def _load_launch_spec(match_id: int) -> dict | None:
+    """Return the saved launch spec for *match_id*, or None."""
+    try:
+        with open(_launch_spec_path(match_id)) as f:
+            spec = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not all(key in spec for key in ('command', 'cwd', 'log_file_path')):
+        return None
+    return spec
+
+
 def _get_source_override(match) -> str | None:
     """Resolve a branch worktree source override from the match's test group."""
-    from .models import TestGroup
     try:
         tg = TestGroup.objects.get(id=match.test_group_id)
     except TestGroup.DoesNotExist:
@@ -355,18 +697,9 @@ def _make_sc_docker_launcher(
     match_id: int, command: list[str], cwd: str, log_file_path: str,
 ) -> Callable[[], None]:
     """Create a launcher closure for a single-container Docker match."""
+    from .views import _run_sc_docker_match
+
     def _launcher():
-        def _run():
-            try:
-                with open(log_file_path, 'w') as log:
-                    proc = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=log)
-                proc.wait(timeout=7200)
-            except Exception:
-                logger.exception('Single-container match %d: error', match_id)
-            finally:
-                notify_match_finished()
-
-        thread = threading.Thread(target=_run, daemon=True)
-        thread.start()
+        _run_sc_docker_match(match_id, command, cwd, log_file_path)
 
     return _launcher
@@ -0,0 +1,182 @@
+"""Reuse of completed match results for identical configurations.
+
+Every match launched by a test suite is stamped with a configuration
+fingerprint — a hash of everything that determines how the game is
+played:
+
+- the test bot's git commit (only when its working tree is clean) and
+  its aiarena overlay files,
+- the opponent: Blizzard AI race/build/difficulty, custom bot commit and
+  overlay, or past-version commit hash,
+- the friendly and opponent build configs,
+- the map the match was played on, race override and replay test
+  parameters.
+
+When a suite with ``TestSuite.reuse_results`` is run again, completed
+results with the fingerprint of a cell (one column of the results
+table) are copied into the new test group instead of being played
+again, and only the samples still missing to reach
+``TestSuite.target_samples_per_cell`` are launched.  A suite without a
+fixed map accepts results from any map (each fingerprinted with its
+own), so new samples still follow the usual map choice.  Copies point
+at the match they were taken from via ``reused_from``.
+
+A bot whose source has uncommitted changes (or is not a git checkout)
+gets no fingerprint, so its matches are always played.
+"""
+
+import hashlib
+import logging
+import os
+import subprocess
+
+logger = logging.getLogger('test_lab')
+
+# Results that count as a completed sample.
+COMPLETED_RESULTS = ('Victory', 'Defeat', 'Tie')
+
+# Match fields copied from the original onto a reused copy.
+_COPIED_FIELDS = (
+    'start_timestamp', 'end_timestamp', 'map_name', 'opponent_race',
+    'opponent_difficulty', 'opponent_build', 'opponent_bot_id', 'test_bot_id',
+    'result', 'duration_in_game_time', 'friendly_race', 'replay_file',
+    'replay_takeover_game_loop', 'opponent_commit_hash', 'replay_test_id',
+    'friendly_build', 'config_fingerprint', 'status', 'queued_at', 'launched_at',
+    'finished_at', 'exit_code', 'failure_kind',
+)
+
+
+def _hash_directory(path: str) -> str:
+    """Return a hash of every file (relative path and contents) under *path*."""
+    digest = hashlib.sha256()
+    if not os.path.isdir(path):
+        return ''
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            file_path = os.path.join(root, filename)
+            digest.update(os.path.relpath(file_path, path).replace('\\', '/').encode())
+            try:
+                with open(file_path, 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+            except OSError:
+                digest.update(b'?')
+    return digest.hexdigest()
+
+
+def get_clean_commit(repo_path: str) -> str | None:
+    """Return the HEAD commit of *repo_path*, or None if it has local changes.
+
+    Untracked files count as changes since they are mounted into the
+    match as well.
+    """
+    if not repo_path or not os.path.isdir(repo_path):
+        return None
+    try:
+        status = subprocess.run(
+            ['git', 'status', '--porcelain'],
+            cwd=repo_path, capture_output=True, text=True, timeout=30,
+        )
+        if status.returncode != 0 or status.stdout.strip():
+            return None
+        head = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=repo_path, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if head.returncode != 0:
+        return None
+    return head.stdout.strip() or None
+
+
+def get_bot_state(bot, source_override: str | None = None) -> str | None:
+    """Return a hash of the code and overlay files a bot plays with.
+
+    Returns None when the code cannot be pinned to a commit.
+    """
+    from .aiarena_runner import AIARENA_BOTS_DIR
+
+    bot_dir = bot.bot_directory or bot.name
+    source = source_override or bot.source_path
+    if source:
+        commit = get_clean_commit(source)
+        if commit is None:
+            return None
+    else:
+        # No live source: the bot runs from its aiarena directory as-is.
+        commit = 'aiarena'
+    overlay = _hash_directory(os.path.join(AIARENA_BOTS_DIR, bot_dir))
+    return f'{commit}:{overlay}'
+
+
+def get_build_state(bot, build_name: str) -> str:
+    """Return a hash of a bot's build config overlay (empty for the default build)."""
+    from .aiarena_runner import AIARENA_CONFIGS_DIR
+
+    if not build_name:
+        return ''
+    bot_dir = bot.bot_directory or bot.name
+    return f'{build_name}:{_hash_directory(os.path.join(AIARENA_CONFIGS_DIR, bot_dir, build_name))}'
+
+
+def config_fingerprint(test_bot_state: str | None, **config) -> str:
+    """Return the fingerprint of a match configuration, or ``''``.
+
+    *test_bot_state* comes from ``get_bot_state``; the keyword arguments
+    describe the opponent, builds and map.  A None value anywhere means
+    the configuration cannot be pinned down and yields ``''``.
+    """
+    if test_bot_state is None or any(value is None for value in config.values()):
+        return ''
+    parts = [f'test_bot={test_bot_state}']
+    parts += [f'{key}={config[key]}' for key in sorted(config)]
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def reuse_results(fingerprints, test_group_id: int, limit: int) -> int:
+    """Copy up to *limit* completed results with one of *fingerprints* into a group.
+
+    The most recent originals are used first.  Returns the number copied.
+    """
+    from . import results_summary
+    from .models import Match
+
+    fingerprints = [fingerprint for fingerprint in fingerprints if fingerprint]
+    if not fingerprints or limit <= 0:
+        return 0
+    originals = list(
+        Match.objects
+        .filter(config_fingerprint__in=fingerprints, result__in=COMPLETED_RESULTS, reused_from__isnull=True)
+        .exclude(test_group_id=test_group_id)
+        .order_by('-id')[:limit]
+    )
+    Match.objects.bulk_create([
+        Match(
+            test_group_id=test_group_id,
+            reused_from_id=original.id,
+            **{field: getattr(original, field) for field in _COPIED_FIELDS},
+        )
+        for original in originals
+    ])
+    if originals:
+        results_summary.refresh_groups([test_group_id])
+    return len(originals)
+
+
+def get_artifact_match_id(match_id: int) -> int:
+    """Return the id of the match whose replay and logs belong to *match_id*.
+
+    That is the original of a reused copy, or the batch leader of a
+    batched match that hasn't been given its own run directory yet.
+    """
+    from .aiarena_runner import get_run_dir
+    from .models import Match
+    row = Match.objects.filter(id=match_id).values('reused_from_id', 'batch_leader_id').first()
+    if row is None:
+        return match_id
+    if row['reused_from_id']:
+        return row['reused_from_id']
+    if row['batch_leader_id'] and not os.path.isdir(get_run_dir(match_id)):
+        return row['batch_leader_id']
+    return match_id
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0044_remove_custombot_bot_class_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfig',
+            name='scheduler_heartbeat',
+            field=models.DateTimeField(blank=True, help_text='Last time the match scheduler (manage.py run_scheduler) reported in. While it is fresh, the scheduler owns queue draining and stale-match reconciliation and web requests only read state.', null=True),
+        ),
+    ]
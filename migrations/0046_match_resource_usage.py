@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0045_systemconfig_scheduler_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='peak_cpu_cores',
+            field=models.FloatField(blank=True, help_text="Highest CPU use seen across all of the match's containers, in cores (1.0 = one full core). Sampled by the scheduler and used to estimate the footprint of future matches.", null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='peak_memory_mb',
+            field=models.IntegerField(blank=True, help_text="Highest combined memory use (RSS) seen across all of the match's containers, in MB.", null=True),
+        ),
+        migrations.AddField(
+            model_name='systemconfig',
+            name='host_cpu_cores',
+            field=models.FloatField(default=0, help_text='CPU cores available to matches. 0 = detect from Docker.'),
+        ),
+        migrations.AddField(
+            model_name='systemconfig',
+            name='host_memory_mb',
+            field=models.IntegerField(default=0, help_text='Memory available to matches, in MB. 0 = detect from Docker.'),
+        ),
+        migrations.AddField(
+            model_name='systemconfig',
+            name='resource_aware_scheduling',
+            field=models.BooleanField(default=False, help_text="Admit matches by packing their measured CPU and memory footprint against the host's cores and RAM instead of counting custom bot slots."),
+        ),
+        migrations.AlterField(
+            model_name='systemconfig',
+            name='max_concurrent_custom_bots',
+            field=models.IntegerField(default=0, help_text='Maximum number of custom bot instances that can run at the same time. vs Blizzard AI and replay tests count as 1; vs custom bot and vs past version count as 2. 0 = unlimited. When resource-aware scheduling is on this is only used as a fallback when the host capacity cannot be determined.'),
+        ),
+    ]
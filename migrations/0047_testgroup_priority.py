@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+def mark_adhoc_group_interactive(apps, schema_editor):
+    TestGroup = apps.get_model('test_lab', 'TestGroup')
+    TestGroup.objects.filter(id=-1).update(priority=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0046_match_resource_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testgroup',
+            name='priority',
+            field=models.IntegerField(choices=[(1, 'Interactive'), (2, 'Ticket'), (3, 'Backfill')], default=2, help_text="Scheduling class of the group's queued matches. Interactive matches (the ad-hoc group) start first; ticket and backfill groups share the remaining slots by weight."),
+        ),
+        migrations.RunPython(mark_adhoc_group_interactive, migrations.RunPython.noop),
+    ]
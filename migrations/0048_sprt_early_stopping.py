@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0047_testgroup_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testgroup',
+            name='sprt_baseline_win_rate',
+            field=models.FloatField(blank=True, help_text='Baseline win rate the SPRT compared this group against.', null=True),
+        ),
+        migrations.AddField(
+            model_name='testgroup',
+            name='sprt_llr',
+            field=models.FloatField(blank=True, help_text='Latest SPRT log-likelihood ratio for this group.', null=True),
+        ),
+        migrations.AddField(
+            model_name='testgroup',
+            name='sprt_result',
+            field=models.CharField(blank=True, choices=[('Better', 'Better'), ('Worse', 'Worse')], default='', help_text='Early-stopping decision against the baseline. Empty = undecided or not enabled.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='early_stopping',
+            field=models.BooleanField(default=False, help_text="Run a sequential probability ratio test (SPRT) on each group's win rate and cancel the remaining queued matches once the result is statistically decided."),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='sprt_error_rate',
+            field=models.FloatField(default=0.05, help_text='Accepted probability of a wrong early-stopping decision, in either direction.'),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='sprt_margin',
+            field=models.FloatField(default=0.1, help_text='Win-rate difference from the baseline that counts as better or worse (0-1). The test decides between baseline - margin and baseline + margin.'),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='sprt_target_win_rate',
+            field=models.FloatField(blank=True, help_text='Baseline win rate (0-1) for early stopping. Empty = the win rate of the previous group for the same bot and branch.', null=True),
+        ),
+    ]
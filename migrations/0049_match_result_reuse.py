@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0048_sprt_early_stopping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='config_fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Hash of the match configuration (test bot commit, opponent, builds, map). Empty when the test bot had uncommitted changes. See match_reuse.py.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='reused_from',
+            field=models.ForeignKey(blank=True, help_text='Set when this result was copied from an identical earlier match instead of played. Replays and logs belong to that match.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reuses', to='test_lab.match'),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='reuse_results',
+            field=models.BooleanField(default=True, help_text='Copy completed results of matches with an identical configuration (same test bot commit, opponent, builds and map) into new runs instead of playing them again.'),
+        ),
+        migrations.AddField(
+            model_name='testsuite',
+            name='target_samples_per_cell',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Number of results wanted for each opponent of the suite. Reused results count towards it; only the missing samples are played.'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0049_match_result_reuse'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfig',
+            name='supersede_policy',
+            field=models.CharField(choices=[('Off', 'Off'), ('Queued', 'Queued'), ('All', 'All')], default='Queued', help_text='What happens to an older test group when a new one starts for the same bot and branch. Off = nothing; Queued = cancel its queued matches; All = also stop its running matches.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='testgroup',
+            name='superseded_by',
+            field=models.ForeignKey(blank=True, help_text="Newer test group for the same bot and branch whose start cancelled this group's unfinished matches (see SystemConfig.supersede_policy).", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='superseded_groups', to='test_lab.testgroup'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0050_supersede_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='batch_leader',
+            field=models.ForeignKey(blank=True, help_text="Set on bot-vs-bot matches played in another match's compose stack (same bots and overlays, different map). The leader's run holds them and fans its results out.", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='batch_members', to='test_lab.match'),
+        ),
+        migrations.AddField(
+            model_name='systemconfig',
+            name='aiarena_batch_size',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Maximum number of bot-vs-bot matches of a test suite that differ only in map to play one after another in a single compose stack, paying container startup once. 1 = off. Only suites whose Samples per opponent is above 1 (default 1) have matches to batch.'),
+        ),
+    ]
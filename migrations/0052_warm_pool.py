@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0051_aiarena_batching'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfig',
+            name='warm_pool_size',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of idle SC2 controller containers the scheduler keeps running so bot-vs-bot matches skip the SC2 cold start. Each slot holds one idle container. 0 = off.'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0052_warm_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfig',
+            name='container_backend',
+            field=models.CharField(choices=[('Compose', 'Compose'), ('Engine', 'Engine')], default='Compose', help_text="How match containers are run. Compose = the docker compose CLI; Engine = the Docker Engine API via the optional 'docker' Python package (falls back to Compose when it is missing or the daemon can't be reached).", max_length=10),
+        ),
+    ]
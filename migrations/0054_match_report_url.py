@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0053_container_backend'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfig',
+            name='match_report_url',
+            field=models.CharField(blank=True, default='http://localhost:8000/test_lab/api/match-complete/', help_text="URL the runner scripts POST their result to the moment a single-container game ends, so the match's slot is freed before container teardown. The containers use host networking, so localhost is this machine. Blank = only parse the container log.", max_length=500),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-17 14:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0054_match_report_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchPrewarm',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('branch', models.CharField(max_length=200)),
+                ('head_commit', models.CharField(help_text='Worktree HEAD the prewarm ran for. A new HEAD starts a new prewarm.', max_length=40)),
+                ('status', models.CharField(choices=[('Running', 'Running'), ('Ready', 'Ready'), ('Failed', 'Failed')], default='Running', max_length=10)),
+                ('log_file', models.CharField(blank=True, default='', help_text="Host path of the prewarm container's log.", max_length=500)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('test_bot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='branch_prewarms', to='test_lab.custombot')),
+            ],
+            options={
+                'db_table': 'branch_prewarm',
+                'constraints': [models.UniqueConstraint(fields=('test_bot', 'branch'), name='branch_prewarm_bot_branch')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0055_branch_prewarm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='phases',
+            field=models.JSONField(blank=True, default=dict, help_text="Unix time each startup/teardown phase was reached (queued, launched, container_up, deps_installed, extensions_built, sc2_launched, game_created, first_step, game_end, teardown_done). Missing phases weren't reached or don't apply. See match_phases.py."),
+        ),
+    ]
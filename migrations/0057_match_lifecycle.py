@@ -0,0 +1,66 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:24
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def backfill_status(apps, schema_editor):
+    Match = apps.get_model('test_lab', 'Match')
+    Match.objects.update(queued_at=F('start_timestamp'))
+    Match.objects.filter(result='Pending').update(status='Running', launched_at=F('start_timestamp'))
+    Match.objects.filter(result='Cancelled').update(status='Cancelled', finished_at=F('end_timestamp'))
+    Match.objects.exclude(result__in=('Queued', 'Pending', 'Cancelled')).update(
+        status='Finished', finished_at=F('end_timestamp'), launched_at=F('start_timestamp'),
+    )
+    Match.objects.filter(result='Crash').update(failure_kind='Crash')
+    # Pending matches older than the queue's old 24 h window were never
+    # counted as running; record them as crashes without a result instead
+    # of letting them take a slot.
+    now = timezone.now()
+    Match.objects.filter(status='Running', start_timestamp__lt=now - timedelta(hours=24)).update(
+        status='Finished', result='Crash', failure_kind='NoResult', end_timestamp=now, finished_at=now,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0056_match_phases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='exit_code',
+            field=models.IntegerField(blank=True, help_text="Exit code of the match's containers. Empty if unknown (e.g. timed out or recovered).", null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='failure_kind',
+            field=models.CharField(blank=True, choices=[('Crash', 'Crash'), ('Timeout', 'Timeout'), ('NoResult', 'Noresult'), ('LaunchFailed', 'Launchfailed')], default='', help_text='Why the match failed: Crash (the game or bot crashed), Timeout (stopped after the time limit), NoResult (containers exited without a result) or LaunchFailed. Empty = no failure.', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, help_text='When the match finished or was cancelled.', null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='launched_at',
+            field=models.DateTimeField(blank=True, help_text="When the match's containers were launched (last launch, if it was retried).", null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='queued_at',
+            field=models.DateTimeField(blank=True, help_text='When the match entered the queue.', null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='status',
+            field=models.CharField(choices=[('Queued', 'Queued'), ('Running', 'Running'), ('Finished', 'Finished'), ('Cancelled', 'Cancelled')], db_index=True, default='Queued', help_text='Lifecycle state: Queued (waiting for capacity), Running (containers launched), Finished (result recorded) or Cancelled. ``result`` holds the outcome once finished.', max_length=10),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
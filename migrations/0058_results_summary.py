@@ -0,0 +1,70 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from ..results_summary import MATCH_FIELDS, summarize
+
+
+def build_summaries(apps, schema_editor):
+    Match = apps.get_model('test_lab', 'Match')
+    GroupOpponentSummary = apps.get_model('test_lab', 'GroupOpponentSummary')
+    OpponentMapSummary = apps.get_model('test_lab', 'OpponentMapSummary')
+    group_ids = Match.objects.exclude(test_group_id=-1).values_list('test_group_id', flat=True).distinct()
+    for group_id in group_ids:
+        matches = Match.objects.filter(test_group_id=group_id).order_by('id').values(*MATCH_FIELDS)
+        cells, maps = summarize(matches)
+        GroupOpponentSummary.objects.bulk_create(
+            [GroupOpponentSummary(test_group_id=group_id, **cell) for cell in cells]
+        )
+        OpponentMapSummary.objects.bulk_create(
+            [OpponentMapSummary(test_group_id=group_id, **row) for row in maps]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0057_match_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupOpponentSummary',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('opponent_key', models.CharField(help_text="Pivot column: '<race>-<build>', 'bot_<id>_<build>', 'version_<short hash>' or 'replay_<id>'.", max_length=150)),
+                ('kind', models.CharField(choices=[('Computer', 'Computer'), ('CustomBot', 'Custombot'), ('PastVersion', 'Pastversion'), ('Replay', 'Replay')], max_length=12)),
+                ('opponent_difficulty', models.CharField(blank=True, default='', max_length=11)),
+                ('earliest_match_id', models.IntegerField(help_text="Id of the cell's first match (orders the past-version columns).")),
+                ('victories', models.PositiveIntegerField(default=0)),
+                ('total_games', models.PositiveIntegerField(default=0, help_text='Played (not reused) matches that ended in a Victory or Defeat.')),
+                ('match', models.ForeignKey(help_text='Most recent match of the cell; the one shown on the results page.', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='test_lab.match')),
+                ('test_bot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_lab.custombot')),
+                ('test_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opponent_summaries', to='test_lab.testgroup')),
+            ],
+            options={
+                'db_table': 'group_opponent_summary',
+            },
+        ),
+        migrations.CreateModel(
+            name='OpponentMapSummary',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('opponent_key', models.CharField(max_length=150)),
+                ('kind', models.CharField(choices=[('Computer', 'Computer'), ('CustomBot', 'Custombot'), ('PastVersion', 'Pastversion'), ('Replay', 'Replay')], max_length=12)),
+                ('opponent_difficulty', models.CharField(blank=True, default='', max_length=11)),
+                ('map_name', models.CharField(max_length=100)),
+                ('fastest_victory', models.IntegerField(blank=True, help_text='Game seconds.', null=True)),
+                ('slowest_loss', models.IntegerField(blank=True, help_text='Game seconds.', null=True)),
+                ('fastest_victory_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_lab.match')),
+                ('slowest_loss_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_lab.match')),
+                ('test_bot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='test_lab.custombot')),
+                ('test_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='map_summaries', to='test_lab.testgroup')),
+            ],
+            options={
+                'db_table': 'opponent_map_summary',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
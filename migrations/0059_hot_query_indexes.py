@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0058_results_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupopponentsummary',
+            index=models.Index(fields=['test_bot', 'test_group'], name='summary_bot_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['test_group', 'status'], name='match_group_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['test_bot', 'opponent_race', 'opponent_build', 'opponent_difficulty'], name='match_opponent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchevent',
+            index=models.Index(fields=['type', 'match'], name='match_event_type_match_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0059_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testgroup',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented whenever the group changes: one of its matches is created, launched, finishes, is cancelled or is reused, or its SPRT decision or supersession changes. Lets readers tell whether the group changed, e.g. to key the cached rows of the Test Groups tab.'),
+        ),
+    ]
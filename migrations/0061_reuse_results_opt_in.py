@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:52
+
+from django.db import migrations, models
+
+
+def turn_off_reuse(apps, schema_editor):
+    # Suites got reuse switched on by default; it is now opt-in.
+    TestSuite = apps.get_model('test_lab', 'TestSuite')
+    TestSuite.objects.update(reuse_results=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_lab', '0060_test_group_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='testsuite',
+            name='reuse_results',
+            field=models.BooleanField(default=False, help_text='Copy completed results of matches with an identical configuration (same test bot commit, opponent, builds and map) into new runs instead of playing them again. Without a fixed map, results from any map are reused.'),
+        ),
+        migrations.RunPython(turn_off_reuse, migrations.RunPython.noop),
+    ]
@@ -158,6 +158,37 @@ class TestSuite(models.Model):
         default='',
         help_text='Force all matches in this suite to use a specific map. Empty = auto-select.',
     )
+    early_stopping = models.BooleanField(
+        default=False,
+        help_text="Run a sequential probability ratio test (SPRT) on each group's win rate and cancel "
+                  "the remaining queued matches once the result is statistically decided.",
+    )
+    sprt_target_win_rate = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Baseline win rate (0-1) for early stopping. Empty = the win rate of the previous "
+                  "group for the same bot and branch.",
+    )
+    sprt_margin = models.FloatField(
+        default=0.1,
+        help_text="Win-rate difference from the baseline that counts as better or worse (0-1). "
+                  "The test decides between baseline - margin and baseline + margin.",
+    )
+    sprt_error_rate = models.FloatField(
+        default=0.05,
+        help_text="Accepted probability of a wrong early-stopping decision, in either direction.",
+    )
+    reuse_results = models.BooleanField(
+        default=False,
+        help_text="Copy completed results of matches with an identical configuration (same test bot "
+                  "commit, opponent, builds and map) into new runs instead of playing them again. "
+                  "Without a fixed map, results from any map are reused.",
+    )
+    target_samples_per_cell = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="Number of results wanted for each opponent of the suite. Reused results count "
+                  "towards it; only the missing samples are played.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     @property
@@ -180,6 +211,9 @@ class TestGroup(models.Model):
     class Meta:
         db_table = 'test_group'
 
+    Priority = models.IntegerChoices('Priority', 'INTERACTIVE TICKET BACKFILL')
+    SprtResult = models.TextChoices('SprtResult', 'Better Worse')
+
     id = models.AutoField(primary_key=True)
     description = models.CharField(max_length=255, blank=True, default='')
     test_suite = models.ForeignKey(
@@ -193,6 +227,41 @@ class TestGroup(models.Model):
         default='',
         help_text="Git branch the test was run against. Empty = current working directory (default).",
     )
+    priority = models.IntegerField(
+        choices=Priority,
+        default=Priority.TICKET,
+        help_text="Scheduling class of the group's queued matches. Interactive matches (the ad-hoc "
+                  "group) start first; ticket and backfill groups share the remaining slots by weight.",
+    )
+    superseded_by = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='superseded_groups',
+        help_text="Newer test group for the same bot and branch whose start cancelled this group's "
+                  "unfinished matches (see SystemConfig.supersede_policy).",
+    )
+    sprt_result = models.CharField(
+        max_length=10,
+        choices=SprtResult,
+        blank=True,
+        default='',
+        help_text="Early-stopping decision against the baseline. Empty = undecided or not enabled.",
+    )
+    sprt_llr = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Latest SPRT log-likelihood ratio for this group.",
+    )
+    sprt_baseline_win_rate = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Baseline win rate the SPRT compared this group against.",
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text="Incremented whenever the group changes: one of its matches is created, launched, finishes, is "
+                  "cancelled or is reused, or its SPRT decision or supersession changes. Lets readers tell "
+                  "whether the group changed, e.g. to key the cached rows of the Test Groups tab.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -207,12 +276,23 @@ class TestGroup(models.Model):
 class Match(models.Model):
     class Meta:
         db_table = 'match'
+        indexes = [
+            # Queued/running matches of a group (cancel, supersede, early stopping).
+            models.Index(fields=['test_group', 'status'], name='match_group_status_idx'),
+            # Recent results per opponent config (get_least_used_map).
+            models.Index(
+                fields=['test_bot', 'opponent_race', 'opponent_build', 'opponent_difficulty'],
+                name='match_opponent_idx',
+            ),
+        ]
 
     Race = models.TextChoices('Race','Protoss Terran Zerg Random')
     Difficulty = models.TextChoices('Difficulty',
         'Easy Medium MediumHard Hard Harder VeryHard CheatVision CheatMoney CheatInsane')
     Build = models.TextChoices('Build', 'Air Macro Power Rush Timing RandomBuild')
     Result = models.TextChoices('Result', 'Victory Defeat Tie Undecided')
+    Status = models.TextChoices('Status', 'Queued Running Finished Cancelled')
+    FailureKind = models.TextChoices('FailureKind', 'Crash Timeout NoResult LaunchFailed')
 
     id = models.AutoField(primary_key=True)
     test_group = models.ForeignKey(TestGroup, on_delete=models.CASCADE)
@@ -233,6 +313,32 @@ class Match(models.Model):
         help_text="The bot being tested (Player 1).",
     )
     result = models.CharField(max_length=50, choices=Result)
+    status = models.CharField(
+        max_length=10, choices=Status, default='Queued', db_index=True,
+        help_text="Lifecycle state: Queued (waiting for capacity), Running (containers launched), Finished "
+                  "(result recorded) or Cancelled. ``result`` holds the outcome once finished.",
+    )
+    queued_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the match entered the queue.",
+    )
+    launched_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the match's containers were launched (last launch, if it was retried).",
+    )
+    finished_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the match finished or was cancelled.",
+    )
+    exit_code = models.IntegerField(
+        null=True, blank=True,
+        help_text="Exit code of the match's containers. Empty if unknown (e.g. timed out or recovered).",
+    )
+    failure_kind = models.CharField(
+        max_length=12, choices=FailureKind, blank=True, default='',
+        help_text="Why the match failed: Crash (the game or bot crashed), Timeout (stopped after the time "
+                  "limit), NoResult (containers exited without a result) or LaunchFailed. Empty = no failure.",
+    )
     duration_in_game_time = models.IntegerField(null=True, blank=True)
     friendly_race = models.CharField(
         max_length=7, blank=True, default='',
@@ -259,11 +365,57 @@ class Match(models.Model):
         max_length=100, blank=True, default='',
         help_text="Build config name used by the test bot (from aiarena/configs/). Empty = default config.",
     )
+    peak_cpu_cores = models.FloatField(
+        null=True, blank=True,
+        help_text="Highest CPU use seen across all of the match's containers, in cores (1.0 = one full core). "
+                  "Sampled by the scheduler and used to estimate the footprint of future matches.",
+    )
+    peak_memory_mb = models.IntegerField(
+        null=True, blank=True,
+        help_text="Highest combined memory use (RSS) seen across all of the match's containers, in MB.",
+    )
+    batch_leader = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='batch_members',
+        help_text="Set on bot-vs-bot matches played in another match's compose stack (same bots and "
+                  "overlays, different map). The leader's run holds them and fans its results out.",
+    )
+    config_fingerprint = models.CharField(
+        max_length=64, blank=True, default='', db_index=True,
+        help_text="Hash of the match configuration (test bot commit, opponent, builds, map). "
+                  "Empty when the test bot had uncommitted changes. See match_reuse.py.",
+    )
+    reused_from = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='reuses',
+        help_text="Set when this result was copied from an identical earlier match instead of played. "
+                  "Replays and logs belong to that match.",
+    )
+    phases = models.JSONField(
+        default=dict, blank=True,
+        help_text="Unix time each startup/teardown phase was reached (queued, launched, container_up, "
+                  "deps_installed, extensions_built, sc2_launched, game_created, first_step, game_end, "
+                  "teardown_done). Missing phases weren't reached or don't apply. See match_phases.py.",
+    )
 
 
     # Non-database attributes (computed dynamically in views)
     is_best_time: bool = False
 
+    @property
+    def queue_wait_seconds(self) -> float | None:
+        """Seconds between entering the queue and launch."""
+        if self.queued_at and self.launched_at:
+            return (self.launched_at - self.queued_at).total_seconds()
+        return None
+
+    @property
+    def run_seconds(self) -> float | None:
+        """Seconds between launch and finishing."""
+        if self.launched_at and self.finished_at:
+            return (self.finished_at - self.launched_at).total_seconds()
+        return None
+
     @property
     def opponent_short_hash(self) -> str:
         """Return the first 7 characters of the opponent commit hash."""
@@ -366,6 +518,9 @@ class ReplayTest(models.Model):
 class MatchEvent(models.Model):
     class Meta:
         db_table = 'match_event'
+        indexes = [
+            models.Index(fields=['type', 'match'], name='match_event_type_match_idx'),
+        ]
 
     id = models.AutoField(primary_key=True)
     match = models.ForeignKey(Match, on_delete=models.CASCADE)
@@ -474,18 +629,172 @@ class Ticket(models.Model):
         return f"#{self.id}: {self.title} [{self.status}]"
 
 
+class BranchPrewarm(models.Model):
+    """Prewarm state of a bot's branch worktree (see ``prewarm.py``).
+
+    One row per bot and branch, for the worktree's current HEAD.  Queued
+    matches of that branch are held while the row is ``Running``.
+    """
+
+    class Meta:
+        db_table = 'branch_prewarm'
+        constraints = [
+            models.UniqueConstraint(fields=['test_bot', 'branch'], name='branch_prewarm_bot_branch'),
+        ]
+
+    Status = models.TextChoices('Status', 'Running Ready Failed')
+
+    id = models.AutoField(primary_key=True)
+    test_bot = models.ForeignKey(
+        CustomBot, on_delete=models.CASCADE,
+        related_name='branch_prewarms',
+    )
+    branch = models.CharField(max_length=200)
+    head_commit = models.CharField(
+        max_length=40,
+        help_text="Worktree HEAD the prewarm ran for. A new HEAD starts a new prewarm.",
+    )
+    status = models.CharField(max_length=10, choices=Status, default='Running')
+    log_file = models.CharField(
+        max_length=500, blank=True, default='',
+        help_text="Host path of the prewarm container's log.",
+    )
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.test_bot.name} [{self.branch}] @{self.head_commit[:7]} ({self.status})"
+
+
+class GroupOpponentSummary(models.Model):
+    """One cell of the Test Groups pivot (see ``results_summary.py``).
+
+    Aggregates a test group's matches against one opponent column, per
+    test bot and difficulty.  Rewritten whenever a match of the group is
+    created or gets its result.
+    """
+
+    class Meta:
+        db_table = 'group_opponent_summary'
+        indexes = [
+            # Most recent groups of a test bot (the pivot's group limit).
+            models.Index(fields=['test_bot', 'test_group'], name='summary_bot_group_idx'),
+        ]
+
+    Kind = models.TextChoices('Kind', 'Computer CustomBot PastVersion Replay')
+
+    id = models.AutoField(primary_key=True)
+    test_group = models.ForeignKey(TestGroup, on_delete=models.CASCADE, related_name='opponent_summaries')
+    test_bot = models.ForeignKey(CustomBot, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    opponent_key = models.CharField(
+        max_length=150,
+        help_text="Pivot column: '<race>-<build>', 'bot_<id>_<build>', 'version_<short hash>' or 'replay_<id>'.",
+    )
+    kind = models.CharField(max_length=12, choices=Kind)
+    opponent_difficulty = models.CharField(max_length=11, blank=True, default='')
+    match = models.ForeignKey(
+        Match, on_delete=models.CASCADE, related_name='+',
+        help_text="Most recent match of the cell; the one shown on the results page.",
+    )
+    earliest_match_id = models.IntegerField(
+        help_text="Id of the cell's first match (orders the past-version columns).",
+    )
+    victories = models.PositiveIntegerField(default=0)
+    total_games = models.PositiveIntegerField(
+        default=0,
+        help_text="Played (not reused) matches that ended in a Victory or Defeat.",
+    )
+
+
+class OpponentMapSummary(models.Model):
+    """Fastest victory and slowest loss of a test group per opponent, difficulty and map.
+
+    Maintained with ``GroupOpponentSummary`` (see ``results_summary.py``).
+    """
+
+    class Meta:
+        db_table = 'opponent_map_summary'
+
+    id = models.AutoField(primary_key=True)
+    test_group = models.ForeignKey(TestGroup, on_delete=models.CASCADE, related_name='map_summaries')
+    test_bot = models.ForeignKey(CustomBot, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    opponent_key = models.CharField(max_length=150)
+    kind = models.CharField(max_length=12, choices=GroupOpponentSummary.Kind)
+    opponent_difficulty = models.CharField(max_length=11, blank=True, default='')
+    map_name = models.CharField(max_length=100)
+    fastest_victory = models.IntegerField(null=True, blank=True, help_text="Game seconds.")
+    fastest_victory_match = models.ForeignKey(
+        Match, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+    )
+    slowest_loss = models.IntegerField(null=True, blank=True, help_text="Game seconds.")
+    slowest_loss_match = models.ForeignKey(
+        Match, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+    )
+
+
 class SystemConfig(models.Model):
     """Singleton table for system-wide settings."""
 
     class Meta:
         db_table = 'system_config'
 
+    SupersedePolicy = models.TextChoices('SupersedePolicy', 'Off Queued All')
+    ContainerBackend = models.TextChoices('ContainerBackend', 'Compose Engine')
+
     id = models.AutoField(primary_key=True)
     max_concurrent_custom_bots = models.IntegerField(
         default=0,
         help_text="Maximum number of custom bot instances that can run at the same time. "
                   "vs Blizzard AI and replay tests count as 1; vs custom bot and vs past version count as 2. "
-                  "0 = unlimited.",
+                  "0 = unlimited. When resource-aware scheduling is on this is only used as a fallback "
+                  "when the host capacity cannot be determined.",
+    )
+    resource_aware_scheduling = models.BooleanField(
+        default=False,
+        help_text="Admit matches by packing their measured CPU and memory footprint against the "
+                  "host's cores and RAM instead of counting custom bot slots.",
+    )
+    host_cpu_cores = models.FloatField(
+        default=0,
+        help_text="CPU cores available to matches. 0 = detect from Docker.",
+    )
+    host_memory_mb = models.IntegerField(
+        default=0,
+        help_text="Memory available to matches, in MB. 0 = detect from Docker.",
+    )
+    aiarena_batch_size = models.PositiveSmallIntegerField(
+        default=1,
+        help_text="Maximum number of bot-vs-bot matches of a test suite that differ only in map to play "
+                  "one after another in a single compose stack, paying container startup once. 1 = off. "
+                  "Only suites whose Samples per opponent is above 1 (default 1) have matches to batch.",
+    )
+    warm_pool_size = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of idle SC2 controller containers the scheduler keeps running so bot-vs-bot "
+                  "matches skip the SC2 cold start. Each slot holds one idle container. 0 = off.",
+    )
+    container_backend = models.CharField(
+        max_length=10,
+        choices=ContainerBackend,
+        default=ContainerBackend.Compose,
+        help_text="How match containers are run. Compose = the docker compose CLI; Engine = the Docker "
+                  "Engine API via the optional 'docker' Python package (falls back to Compose when it "
+                  "is missing or the daemon can't be reached).",
+    )
+    match_report_url = models.CharField(
+        max_length=500,
+        blank=True,
+        default='http://localhost:8000/test_lab/api/match-complete/',
+        help_text="URL the runner scripts POST their result to the moment a single-container game ends, "
+                  "so the match's slot is freed before container teardown. The containers use host "
+                  "networking, so localhost is this machine. Blank = only parse the container log.",
+    )
+    supersede_policy = models.CharField(
+        max_length=10,
+        choices=SupersedePolicy,
+        default=SupersedePolicy.Queued,
+        help_text="What happens to an older test group when a new one starts for the same bot and branch. "
+                  "Off = nothing; Queued = cancel its queued matches; All = also stop its running matches.",
     )
     sc2_switcher_path = models.CharField(
         max_length=500,
@@ -499,6 +808,13 @@ class SystemConfig(models.Model):
         default=r'C:\Program Files (x86)\StarCraft II\Maps',
         help_text="Host path to StarCraft II Maps directory (mounted into Docker containers).",
     )
+    scheduler_heartbeat = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last time the match scheduler (manage.py run_scheduler) reported in. "
+                  "While it is fresh, the scheduler owns queue draining and stale-match "
+                  "reconciliation and web requests only read state.",
+    )
 
     @property
     def is_configured(self) -> bool:
@@ -0,0 +1,264 @@
+"""Branch prewarm — get a branch worktree ready before its matches start.
+
+The first matches of a new ticket branch used to do all the setup inside
+their own containers: install the bot's requirements, compile its native
+extensions, then fail late if the entry point didn't import — with every
+parallel match racing to do the same work.
+
+When a test group starts on a branch (``views.start_test_suite``), the
+worktree's HEAD is compared with the bot's ``BranchPrewarm`` row.  For a
+new branch or a moved HEAD, one prewarm container is run with the same
+compose service, mounts and environment as a vs-computer match, but with
+``PREWARM=1``: ``run_docker.sh`` fills the shared dependency and
+extension caches (``runner/deps_env.sh``, ``runner/ext_cache.sh``),
+checks the entry point (``runner/prewarm_bot.py``) and exits.
+
+The container is watched by a ``PrewarmJob`` on the match supervisor's
+event loop (``supervisor.py``), like a match, so no thread blocks for
+the length of the prewarm.
+
+While a prewarm is ``Running`` the queue holds that branch's queued
+matches (``match_queue``); once it is ``Ready`` or ``Failed`` they start
+and find everything already built.  If the process watching a prewarm
+exits (e.g. a dev-server reload), ``reconcile_prewarms`` — run by the
+periodic reconcile and when a supervisor starts — finishes it from its
+log once its container is gone.  A prewarm that hasn't finished after
+``PREWARM_TIMEOUT`` no longer holds matches, and is rerun the next time
+the branch is tested.
+"""
+
+import logging
+import os
+import subprocess
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import container_backend, supervisor
+
+logger = logging.getLogger('test_lab')
+
+# Seconds a prewarm may run before it is stopped and its matches released.
+PREWARM_TIMEOUT = 1800
+
+# Time an unwatched prewarm is given to bring up its container before
+# ``reconcile_prewarms`` treats the missing container as finished.
+PREWARM_START_GRACE = timedelta(minutes=5)
+
+
+def get_head_commit(worktree_path: str) -> str:
+    """Return the commit checked out in *worktree_path*, or ``''``."""
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=worktree_path, capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return result.stdout.strip() if result.returncode == 0 else ''
+
+
+def _cutoff():
+    return timezone.now() - timedelta(seconds=PREWARM_TIMEOUT)
+
+
+def _project(prewarm_id: int) -> str:
+    """Return the compose project (and supervisor key) of a prewarm."""
+    return f'prewarm_{prewarm_id}'
+
+
+def ensure_prewarm(test_bot, branch: str, worktree_path: str):
+    """Start a prewarm for *branch* unless its current HEAD is already done.
+
+    Returns the bot's ``BranchPrewarm`` for the branch, or None if the
+    worktree's HEAD can't be read.  Must be called before the branch's
+    matches are enqueued so they are held from the start.
+    """
+    from .models import BranchPrewarm
+
+    head = get_head_commit(worktree_path)
+    if not head:
+        return None
+
+    now = timezone.now()
+    prewarm, created = BranchPrewarm.objects.get_or_create(
+        test_bot=test_bot, branch=branch,
+        defaults={'head_commit': head, 'status': 'Running', 'started_at': now},
+    )
+    if not created:
+        stale = prewarm.status == 'Running' and prewarm.started_at < _cutoff()
+        if prewarm.head_commit == head and not stale:
+            return prewarm
+        # Claim the rerun; another process may have claimed it first.
+        claimed = BranchPrewarm.objects.filter(
+            id=prewarm.id, head_commit=prewarm.head_commit, started_at=prewarm.started_at,
+        ).update(head_commit=head, status='Running', started_at=now, finished_at=None)
+        prewarm.refresh_from_db()
+        if not claimed:
+            return prewarm
+
+    try:
+        _start(prewarm, test_bot, worktree_path)
+    except Exception:
+        logger.exception('Prewarm of %s [%s]: could not start', test_bot.name, branch)
+        _finish(prewarm.id, head, 'Failed')
+    return prewarm
+
+
+def _start(prewarm, test_bot, worktree_path: str) -> None:
+    from .views import (
+        AIARENA_COMPOSE_PATH, _bot_identity_args, _bot_volume_args, _env_file_args,
+        _get_logs_dir, _write_sc_docker_env,
+    )
+
+    _write_sc_docker_env()
+    logs_dir = _get_logs_dir()
+    os.makedirs(logs_dir, exist_ok=True)
+    log_file_path = os.path.join(logs_dir, f'prewarm_{prewarm.id}_{prewarm.head_commit[:12]}.log')
+    prewarm.log_file = log_file_path
+    prewarm.save(update_fields=['log_file'])
+
+    command = [
+        'docker', 'compose',
+        '-f', 'docker-compose.vs_computer.yml',
+        '-p', _project(prewarm.id),
+        'run', '--rm', '--no-deps',
+        '-e', 'PREWARM=1',
+    ]
+    command += _bot_volume_args(test_bot, worktree_path)
+    command += _bot_identity_args(test_bot)
+    command += _env_file_args(test_bot)
+    command.append('bot')
+
+    logger.info(
+        'Prewarm of %s [%s] @%s: starting',
+        test_bot.name, prewarm.branch, prewarm.head_commit[:7],
+    )
+    supervisor.submit(PrewarmJob(prewarm.id, prewarm.head_commit, command, AIARENA_COMPOSE_PATH, log_file_path))
+
+
+class PrewarmJob(supervisor.MatchJob):
+    """Supervisor job running one prewarm container to completion.
+
+    Holds no queue slot (``match_id`` is None); ``finish`` records the
+    outcome read from the log, which starts the matches it was holding.
+    """
+
+    def __init__(self, prewarm_id: int, head: str, command: list[str], cwd: str, log_file_path: str):
+        super().__init__(None, PREWARM_TIMEOUT)
+        self.prewarm_id = prewarm_id
+        self.head = head
+        self.command = command
+        self.cwd = cwd
+        self.log_file_path = log_file_path
+        self.backend = container_backend.get_backend()
+        self.handle = None
+
+    @property
+    def key(self) -> str:
+        return _project(self.prewarm_id)
+
+    @property
+    def label(self) -> str:
+        return f'Prewarm {self.prewarm_id}'
+
+    def start(self) -> None:
+        self.handle = self.backend.start_service(self.command, self.cwd, self.log_file_path)
+
+    def poll(self) -> container_backend.RunResult | None:
+        return self.backend.poll(self.handle)
+
+    def stop(self) -> None:
+        if self.handle is not None:
+            self.backend.stop(self.handle)
+
+    def finish(self, run_result: container_backend.RunResult | None) -> None:
+        ok = run_result is not None and not run_result.timed_out and _read_outcome(self.log_file_path)
+        _finish(self.prewarm_id, self.head, 'Ready' if ok else 'Failed')
+
+
+def reconcile_prewarms() -> int:
+    """Finish the ``Running`` prewarms that no process is watching any more.
+
+    A prewarm not supervised here whose container is gone — or that has
+    run past ``PREWARM_TIMEOUT`` — is finished from its log:
+    ``'Ready'`` if it reported ``PREWARM_RESULT:ok``, else ``'Failed'``.
+    Prewarms younger than ``PREWARM_START_GRACE`` are left alone, as
+    their container may not be up yet.  Returns the number finished.
+    """
+    from .models import BranchPrewarm
+
+    now = timezone.now()
+    unwatched = [
+        p for p in BranchPrewarm.objects.filter(status='Running', started_at__lt=now - PREWARM_START_GRACE)
+        if not supervisor.is_supervised(_project(p.id))
+    ]
+    if not unwatched:
+        return 0
+    projects = container_backend.get_backend().list_projects()
+    if projects is None:
+        logger.warning('Could not list containers; leaving %d unwatched prewarm(s) running', len(unwatched))
+        return 0
+
+    finished = 0
+    for p in unwatched:
+        states = projects.get(_project(p.id), {}).values()
+        if any(state == 'running' for state in states) and p.started_at >= _cutoff():
+            continue
+        status = 'Ready' if _read_outcome(p.log_file) else 'Failed'
+        logger.warning('Prewarm %d: no longer watched; finishing it from its log as %s', p.id, status)
+        _finish(p.id, p.head_commit, status)
+        finished += 1
+    return finished
+
+
+def _read_outcome(log_file_path: str) -> bool:
+    """Return True if the prewarm log ends with ``PREWARM_RESULT:ok``."""
+    try:
+        with open(log_file_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            tail = f.read().decode('utf-8', errors='replace')
+    except OSError:
+        return False
+    return 'PREWARM_RESULT:ok' in tail
+
+
+def _finish(prewarm_id: int, head: str, status: str) -> None:
+    """Record *status* and start the matches the prewarm was holding."""
+    from . import match_queue
+    from .models import BranchPrewarm
+
+    # A newer HEAD may have restarted the prewarm meanwhile; leave it alone.
+    updated = BranchPrewarm.objects.filter(id=prewarm_id, head_commit=head, status='Running').update(
+        status=status, finished_at=timezone.now(),
+    )
+    if not updated:
+        return
+    logger.info('Prewarm %d @%s: %s', prewarm_id, head[:7], status)
+    try:
+        match_queue.drain_queue()
+    except Exception:
+        logger.exception('Prewarm %d: error draining the queue', prewarm_id)
+
+
+def get_held_branches() -> set[tuple[int, str]]:
+    """Return ``(test_bot_id, branch)`` for every prewarm still running."""
+    from .models import BranchPrewarm
+    return set(
+        BranchPrewarm.objects
+        .filter(status='Running', started_at__gte=_cutoff())
+        .values_list('test_bot_id', 'branch')
+    )
+
+
+def is_held(match) -> bool:
+    """Return True if *match* must wait for its branch's prewarm (one query)."""
+    from .models import BranchPrewarm, TestGroup
+
+    if not match.test_bot_id:
+        return False
+    return BranchPrewarm.objects.filter(
+        status='Running', started_at__gte=_cutoff(), test_bot_id=match.test_bot_id,
+        branch__in=TestGroup.objects.filter(id=match.test_group_id).exclude(branch='').values('branch'),
+    ).exists()
@@ -0,0 +1,285 @@
+"""Measured CPU / memory footprints for resource-aware match admission.
+
+The scheduler samples ``docker stats`` for every running match and keeps
+the peak CPU (in cores) and memory (in MB) on the Match row.  Completed
+matches then provide per-bot, per-match-type footprint estimates that
+``match_queue`` packs against the host's cores and RAM.
+
+Matches are grouped by "footprint key" — ``(test_bot_id, kind,
+opponent_bot_id)`` where *kind* is one of ``'blizzard'``, ``'replay'``,
+``'custom'`` or ``'past_version'``.  When a key has no history the
+estimate falls back to the same kind for any bot, and finally to the
+legacy slot cost (one core and ``DEFAULT_SLOT_MEMORY_MB`` per slot).
+"""
+
+import json
+import logging
+import re
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass
+
+logger = logging.getLogger('test_lab')
+
+# Footprint assumed per custom bot slot when nothing has been measured.
+DEFAULT_SLOT_CPU_CORES = 1.0
+DEFAULT_SLOT_MEMORY_MB = 1536
+
+# Only pack matches up to this fraction of the host so the OS, Docker
+# and the web server keep some breathing room.
+CAPACITY_HEADROOM = 0.9
+
+# Number of recent measured matches considered per footprint key.
+SAMPLES_PER_KEY = 20
+
+# Percentile of the samples used as the estimate (peaks are noisy, and
+# under-estimating overcommits the host).
+ESTIMATE_PERCENTILE = 0.9
+
+# Container names created by the aiarena runner (``aiarena_<id>-<service>-1``)
+# and single-container matches (``match_<id>-bot-run-<hash>``).
+_CONTAINER_NAME_RE = re.compile(r'^(?:aiarena|match)_(\d+)-')
+
+# Containers of a warm pool slot (``aiarena_warm_<slot>-<service>-1``),
+# counted towards the match that has claimed the slot.
+_WARM_CONTAINER_NAME_RE = re.compile(r'^aiarena_warm_(\d+)-')
+
+_UNIT_TO_MB = {
+    'b': 1 / (1024 * 1024),
+    'kib': 1 / 1024,
+    'kb': 1 / 1000,
+    'mib': 1.0,
+    'mb': 1.0,
+    'gib': 1024.0,
+    'gb': 1000.0,
+    'tib': 1024.0 * 1024.0,
+    'tb': 1000.0 * 1000.0,
+}
+
+_docker_capacity: 'Footprint | None' = None
+
+
+@dataclass(frozen=True)
+class Footprint:
+    """CPU cores and memory (MB) used by a match."""
+
+    cpu_cores: float = 0.0
+    memory_mb: float = 0.0
+
+    def __add__(self, other: 'Footprint') -> 'Footprint':
+        return Footprint(self.cpu_cores + other.cpu_cores, self.memory_mb + other.memory_mb)
+
+    def __sub__(self, other: 'Footprint') -> 'Footprint':
+        return Footprint(self.cpu_cores - other.cpu_cores, self.memory_mb - other.memory_mb)
+
+    def fits_within(self, capacity: 'Footprint') -> bool:
+        return self.cpu_cores <= capacity.cpu_cores and self.memory_mb <= capacity.memory_mb
+
+
+def match_kind(match) -> str:
+    """Return the footprint kind of a match."""
+    if match.opponent_commit_hash:
+        return 'past_version'
+    if match.opponent_bot_id:
+        return 'custom'
+    if match.replay_takeover_game_loop:
+        return 'replay'
+    return 'blizzard'
+
+
+def footprint_key(match) -> tuple[int | None, str, int | None]:
+    """Return the ``(test_bot_id, kind, opponent_bot_id)`` key for a match."""
+    return (match.test_bot_id, match_kind(match), match.opponent_bot_id)
+
+
+def default_footprint(match) -> Footprint:
+    """Return the slot-based footprint used when nothing has been measured."""
+    from .match_queue import match_custom_bot_cost
+    slots = match_custom_bot_cost(match)
+    return Footprint(slots * DEFAULT_SLOT_CPU_CORES, slots * DEFAULT_SLOT_MEMORY_MB)
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of *values* (must be non-empty)."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def load_footprint_estimates() -> dict:
+    """Estimate footprints from recently completed, measured matches.
+
+    Returns a dict keyed by footprint key, plus ``(None, kind, None)``
+    entries aggregated over all bots for each kind.  Runs one query.
+    """
+    from .models import Match
+
+    measured = (
+        Match.objects
+        .filter(peak_cpu_cores__isnull=False, peak_memory_mb__isnull=False)
+        .exclude(status__in=('Queued', 'Running'))
+        .order_by('-id')
+        .only(
+            'test_bot_id', 'opponent_bot_id', 'opponent_commit_hash',
+            'replay_takeover_game_loop', 'peak_cpu_cores', 'peak_memory_mb',
+        )[:2000]
+    )
+
+    samples: dict[tuple, list[tuple[float, float]]] = defaultdict(list)
+    for match in measured:
+        key = footprint_key(match)
+        sample = (match.peak_cpu_cores, float(match.peak_memory_mb))
+        if len(samples[key]) < SAMPLES_PER_KEY:
+            samples[key].append(sample)
+        kind_key = (None, key[1], None)
+        if len(samples[kind_key]) < SAMPLES_PER_KEY:
+            samples[kind_key].append(sample)
+
+    return {
+        key: Footprint(
+            _percentile([cpu for cpu, _ in values], ESTIMATE_PERCENTILE),
+            _percentile([mem for _, mem in values], ESTIMATE_PERCENTILE),
+        )
+        for key, values in samples.items()
+    }
+
+
+def estimate_footprint(match, estimates: dict) -> Footprint:
+    """Return the expected footprint of *match* given *estimates*."""
+    key = footprint_key(match)
+    if key in estimates:
+        return estimates[key]
+    kind_key = (None, key[1], None)
+    if kind_key in estimates:
+        return estimates[kind_key]
+    return default_footprint(match)
+
+
+# ---------------------------------------------------------------------------
+# Host capacity
+# ---------------------------------------------------------------------------
+
+def _detect_docker_capacity() -> Footprint | None:
+    """Return the CPUs and memory available to Docker, or None.
+
+    Queries ``docker info`` once per process; on Docker Desktop this is
+    the VM's allocation rather than the physical host's.
+    """
+    global _docker_capacity
+    if _docker_capacity is not None:
+        return _docker_capacity
+    try:
+        result = subprocess.run(
+            ['docker', 'info', '--format', '{{.NCPU}} {{.MemTotal}}'],
+            capture_output=True, text=True, timeout=30,
+        )
+        ncpu, mem_bytes = result.stdout.split()
+        _docker_capacity = Footprint(float(ncpu), int(mem_bytes) / (1024 * 1024))
+    except (OSError, ValueError, subprocess.SubprocessError):
+        logger.warning('Could not read host capacity from docker info')
+        return None
+    return _docker_capacity
+
+
+def get_host_capacity(config) -> Footprint | None:
+    """Return the footprint budget available to matches, or None if unknown.
+
+    Configured values on *config* (a ``SystemConfig``) take precedence;
+    zero means "detect from Docker".  The result already has
+    ``CAPACITY_HEADROOM`` applied.
+    """
+    cpu = config.host_cpu_cores
+    memory = config.host_memory_mb
+    if not cpu or not memory:
+        detected = _detect_docker_capacity()
+        if detected is None:
+            return None
+        cpu = cpu or detected.cpu_cores
+        memory = memory or detected.memory_mb
+    return Footprint(cpu * CAPACITY_HEADROOM, memory * CAPACITY_HEADROOM)
+
+
+# ---------------------------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------------------------
+
+def _parse_memory_mb(mem_usage: str) -> float:
+    """Parse the used part of a ``docker stats`` MemUsage value (``'1.2GiB / 15GiB'``)."""
+    used = mem_usage.split('/', 1)[0].strip()
+    match = re.match(r'^([\d.]+)\s*([a-zA-Z]+)$', used)
+    if not match:
+        return 0.0
+    return float(match.group(1)) * _UNIT_TO_MB.get(match.group(2).lower(), 0.0)
+
+
+def _read_docker_stats() -> dict[int, Footprint]:
+    """Return the current footprint of every running match, keyed by match id.
+
+    Uses a single ``docker stats --no-stream`` call for all containers.
+    """
+    from . import warm_pool
+
+    try:
+        result = subprocess.run(
+            ['docker', 'stats', '--no-stream', '--format', '{{json .}}'],
+            capture_output=True, text=True, timeout=60,
+        )
+    except (OSError, subprocess.SubprocessError):
+        logger.warning('docker stats failed; skipping resource sample')
+        return {}
+
+    warm_claims = warm_pool.get_claims()
+    usage: dict[int, Footprint] = defaultdict(Footprint)
+    for line in result.stdout.splitlines():
+        try:
+            stats = json.loads(line)
+        except ValueError:
+            continue
+        name = stats.get('Name', '')
+        warm_match = _WARM_CONTAINER_NAME_RE.match(name)
+        if warm_match:
+            match_id = warm_claims.get(int(warm_match.group(1)))
+            if match_id is None:
+                continue  # idle slot
+        else:
+            name_match = _CONTAINER_NAME_RE.match(name)
+            if not name_match:
+                continue
+            match_id = int(name_match.group(1))
+        try:
+            cpu = float(stats.get('CPUPerc', '0%').rstrip('%')) / 100
+        except ValueError:
+            cpu = 0.0
+        memory = _parse_memory_mb(stats.get('MemUsage', ''))
+        usage[match_id] = usage[match_id] + Footprint(cpu, memory)
+    return dict(usage)
+
+
+def sample_running_matches() -> int:
+    """Sample running containers and raise each match's recorded peaks.
+
+    Returns the number of matches whose peaks were updated.
+    """
+    from .models import Match
+
+    usage = _read_docker_stats()
+    if not usage:
+        return 0
+
+    updated = 0
+    pending = Match.objects.filter(id__in=list(usage), status='Running').only(
+        'peak_cpu_cores', 'peak_memory_mb',
+    )
+    for match in pending:
+        current = usage[match.id]
+        fields = []
+        if match.peak_cpu_cores is None or current.cpu_cores > match.peak_cpu_cores:
+            match.peak_cpu_cores = round(current.cpu_cores, 2)
+            fields.append('peak_cpu_cores')
+        if match.peak_memory_mb is None or current.memory_mb > match.peak_memory_mb:
+            match.peak_memory_mb = int(current.memory_mb)
+            fields.append('peak_memory_mb')
+        if fields:
+            match.save(update_fields=fields)
+            updated += 1
+    return updated
@@ -0,0 +1,236 @@
+"""Precomputed cells of the Test Groups results pivot.
+
+The Test Groups tab used to load every match of the visible groups and
+work out each cell, the per-opponent win rates and the fastest-win /
+slowest-loss markers in Python on every page view.  Those aggregates are
+now kept in two tables:
+
+- ``GroupOpponentSummary`` — one row per test group, test bot, opponent
+  column and difficulty: the match shown in the cell, plus the victories
+  and decided games behind the column's win rate.
+- ``OpponentMapSummary`` — one row per test group, test bot, opponent
+  column, difficulty and map: the fastest victory and slowest loss.
+
+A group's rows are recomputed from its matches, in a transaction,
+whenever one of its matches is created (``match_queue.enqueue``), is
+reused (``match_reuse``), gets its result or is cancelled, so the page
+only reads and decorates them.  The refresh also increments
+``TestGroup.version``, which keys the page's cached rows of finished
+groups and the ETags of the read API; ``touch_groups`` increments it
+alone for changes the summaries don't depend on (a match launched or
+its phases recorded, an SPRT decision).  The ad-hoc group (-1) isn't
+shown on the page and only gets its version bumped.
+
+Inside ``deferred_refresh`` (e.g. while ``views.start_test_suite``
+queues a group's matches) refreshes are collected and each group is
+recomputed once when the block ends, instead of once per match.
+
+``python test_lab/quickstart/manage.py rebuild_results_summary`` rebuilds
+every group, e.g. after matches or bots were deleted.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger('test_lab')
+
+# Per-thread set of the group ids whose refresh is deferred (see
+# ``deferred_refresh``); None outside a deferred block.
+_deferred = threading.local()
+
+# Match fields the summaries are computed from.
+MATCH_FIELDS = (
+    'id', 'test_bot_id', 'opponent_bot_id', 'opponent_build', 'opponent_commit_hash',
+    'replay_test_id', 'opponent_race', 'opponent_difficulty', 'map_name', 'result',
+    'duration_in_game_time', 'reused_from_id',
+)
+
+
+def get_opponent_key(match: dict) -> tuple[str, str]:
+    """Return ``(kind, opponent_key)`` of a match given as a ``MATCH_FIELDS`` dict."""
+    if match['replay_test_id']:
+        return 'Replay', f"replay_{match['replay_test_id']}"
+    if match['opponent_commit_hash']:
+        return 'PastVersion', f"version_{match['opponent_commit_hash'][:7]}"
+    if match['opponent_bot_id']:
+        return 'CustomBot', f"bot_{match['opponent_bot_id']}_{match['opponent_build']}"
+    return 'Computer', f"{match['opponent_race']}-{match['opponent_build']}"
+
+
+def summarize(matches) -> tuple[list[dict], list[dict]]:
+    """Compute the summary rows of one group's matches.
+
+    *matches* are ``MATCH_FIELDS`` dicts ordered by id.  Returns the
+    ``GroupOpponentSummary`` and ``OpponentMapSummary`` field values,
+    without ``test_group``.
+    """
+    cells: dict[tuple, dict] = {}
+    maps: dict[tuple, dict] = {}
+    for match in matches:
+        kind, opponent_key = get_opponent_key(match)
+        common = {
+            'test_bot_id': match['test_bot_id'], 'opponent_key': opponent_key,
+            'kind': kind, 'opponent_difficulty': match['opponent_difficulty'],
+        }
+        cell = cells.setdefault(
+            tuple(common.values()),
+            {**common, 'earliest_match_id': match['id'], 'victories': 0, 'total_games': 0},
+        )
+        cell['match_id'] = match['id']
+
+        # Reused copies repeat a result already counted for the original.
+        if match['result'] not in ('Victory', 'Defeat') or match['reused_from_id'] is not None:
+            continue
+        cell['total_games'] += 1
+        victory = match['result'] == 'Victory'
+        if victory:
+            cell['victories'] += 1
+        duration = match['duration_in_game_time']
+        if not duration or duration <= 0:
+            continue
+        row = maps.setdefault(
+            (*common.values(), match['map_name']),
+            {**common, 'map_name': match['map_name']},
+        )
+        if victory and (row.get('fastest_victory') is None or duration < row['fastest_victory']):
+            row['fastest_victory'] = duration
+            row['fastest_victory_match_id'] = match['id']
+        if not victory and (row.get('slowest_loss') is None or duration > row['slowest_loss']):
+            row['slowest_loss'] = duration
+            row['slowest_loss_match_id'] = match['id']
+    return list(cells.values()), list(maps.values())
+
+
+def map_breakdown(matches) -> list[dict]:
+    """Compute the per-map results of one group's matches.
+
+    *matches* are ``MATCH_FIELDS`` dicts ordered by id.  Returns one dict
+    per test bot, opponent column, difficulty and map with the victories,
+    decided games, average game length and the fastest victory / slowest
+    loss.  Like ``summarize``, only decided games that aren't reused
+    copies count.  Computed on request (read API), not stored.
+    """
+    rows: dict[tuple, dict] = {}
+    for match in matches:
+        if match['result'] not in ('Victory', 'Defeat') or match['reused_from_id'] is not None:
+            continue
+        kind, opponent_key = get_opponent_key(match)
+        row = rows.setdefault(
+            (match['test_bot_id'], opponent_key, match['opponent_difficulty'], match['map_name']),
+            {
+                'test_bot_id': match['test_bot_id'], 'opponent_key': opponent_key, 'kind': kind,
+                'opponent_difficulty': match['opponent_difficulty'], 'map_name': match['map_name'],
+                'victories': 0, 'total_games': 0, 'avg_duration': None,
+                'fastest_victory': None, 'fastest_victory_match_id': None,
+                'slowest_loss': None, 'slowest_loss_match_id': None,
+                'durations': [],
+            },
+        )
+        row['total_games'] += 1
+        victory = match['result'] == 'Victory'
+        if victory:
+            row['victories'] += 1
+        duration = match['duration_in_game_time']
+        if not duration or duration <= 0:
+            continue
+        row['durations'].append(duration)
+        if victory and (row['fastest_victory'] is None or duration < row['fastest_victory']):
+            row['fastest_victory'] = duration
+            row['fastest_victory_match_id'] = match['id']
+        if not victory and (row['slowest_loss'] is None or duration > row['slowest_loss']):
+            row['slowest_loss'] = duration
+            row['slowest_loss_match_id'] = match['id']
+    for row in rows.values():
+        durations = row.pop('durations')
+        if durations:
+            row['avg_duration'] = int(sum(durations) / len(durations))
+    return list(rows.values())
+
+
+def _refresh_group(group_id: int) -> None:
+    from .models import GroupOpponentSummary, Match, OpponentMapSummary, TestGroup
+
+    # Serialise concurrent refreshes of the group (the delete takes the
+    # write lock on SQLite).
+    if not TestGroup.objects.select_for_update().filter(id=group_id).exists():
+        return
+    TestGroup.objects.filter(id=group_id).update(version=F('version') + 1)
+    GroupOpponentSummary.objects.filter(test_group_id=group_id).delete()
+    OpponentMapSummary.objects.filter(test_group_id=group_id).delete()
+    matches = Match.objects.filter(test_group_id=group_id).order_by('id').values(*MATCH_FIELDS)
+    cells, maps = summarize(matches)
+    GroupOpponentSummary.objects.bulk_create(
+        [GroupOpponentSummary(test_group_id=group_id, **cell) for cell in cells]
+    )
+    OpponentMapSummary.objects.bulk_create(
+        [OpponentMapSummary(test_group_id=group_id, **row) for row in maps]
+    )
+
+
+def refresh_groups(group_ids) -> None:
+    """Recompute the summary rows of the given test groups and bump their versions.
+
+    Each group is rewritten atomically (a savepoint when called inside a
+    transaction).  Errors are logged, never raised, so they can't undo a
+    result saved in the same transaction; ``rebuild`` repairs them.
+    """
+    deferred = getattr(_deferred, 'group_ids', None)
+    if deferred is not None:
+        deferred.update(group_ids)
+        return
+    for group_id in sorted(set(group_ids)):
+        try:
+            if group_id == -1:
+                touch_groups([group_id])
+                continue
+            with transaction.atomic():
+                _refresh_group(group_id)
+        except Exception:
+            logger.exception('Test group %d: could not refresh the results summary', group_id)
+
+
+@contextmanager
+def deferred_refresh():
+    """Postpone the refreshes requested in this thread to the end of the block.
+
+    Each group refreshed inside the block is recomputed once when it
+    ends.  Nested blocks join the outermost one.  Also usable as a
+    decorator.
+    """
+    if getattr(_deferred, 'group_ids', None) is not None:
+        yield
+        return
+    _deferred.group_ids = set()
+    try:
+        yield
+    finally:
+        group_ids, _deferred.group_ids = _deferred.group_ids, None
+        refresh_groups(group_ids)
+
+
+def touch_groups(group_ids) -> None:
+    """Bump the version of the given test groups without recomputing their rows."""
+    from .models import TestGroup
+    TestGroup.objects.filter(id__in=list(group_ids)).update(version=F('version') + 1)
+
+
+def refresh_for_matches(match_ids) -> None:
+    """Recompute the summary rows of the groups of the given matches."""
+    from .models import Match
+    refresh_groups(Match.objects.filter(id__in=list(match_ids)).values_list('test_group_id', flat=True))
+
+
+def rebuild() -> int:
+    """Recompute the summary rows of every test group.  Returns the number of groups."""
+    from .models import GroupOpponentSummary, Match, OpponentMapSummary
+
+    group_ids = set(Match.objects.values_list('test_group_id', flat=True).distinct()) - {-1}
+    # Drop rows of groups that no longer have matches.
+    GroupOpponentSummary.objects.exclude(test_group_id__in=group_ids).delete()
+    OpponentMapSummary.objects.exclude(test_group_id__in=group_ids).delete()
+    refresh_groups(group_ids)
+    return len(group_ids)
@@ -0,0 +1,51 @@
+#!/bin/bash
+# Python dependency setup shared by run_docker.sh and
+# run_docker_continue_replay.sh.  Source it from the bot directory.
+#
+# - The sc2 runner dependencies are pre-installed in the vs-computer image
+#   (Dockerfile.vs_computer keeps a copy of the sc2_deps.txt it installed);
+#   they are only installed here when the mounted runner needs different ones.
+# - A bot's requirements.txt is installed once into /root/deps/<hash>, where
+#   the hash covers requirements.txt, sc2_deps.txt and the Python version.
+#   /root/deps is the shared "test_lab_deps" docker volume, so every later
+#   container with the same hash just adds the directory to PYTHONPATH.
+#
+# Exports DEPS_PATH (empty when the bot has no requirements.txt).
+
+DEPS_ROOT="${DEPS_ROOT:-/root/deps}"
+
+install_sc2_deps() {
+    if cmp -s /root/runner/sc2_deps.txt /root/sc2_deps.installed; then
+        echo "sc2 runner dependencies pre-installed in the image, skipping."
+    else
+        echo "Installing sc2 runner dependencies..."
+        uv pip install --system -r /root/runner/sc2_deps.txt
+    fi
+}
+
+install_bot_deps() {
+    DEPS_PATH=""
+    if [ ! -f "requirements.txt" ]; then
+        export DEPS_PATH
+        return
+    fi
+    local deps_hash
+    deps_hash=$( (cat requirements.txt /root/runner/sc2_deps.txt; python3 -V) | sha256sum | cut -c1-16)
+    DEPS_PATH="$DEPS_ROOT/$deps_hash"
+    if [ -d "$DEPS_PATH" ]; then
+        echo "Bot requirements cached in $DEPS_PATH, skipping install."
+    else
+        echo "Installing bot requirements into $DEPS_PATH..."
+        mkdir -p "$DEPS_ROOT"
+        # Install into a private directory and rename it into place, so a
+        # concurrent container never sees a half-installed environment.
+        local staging="$DEPS_PATH.tmp.$$"
+        rm -rf "$staging"
+        uv pip install --target "$staging" -r requirements.txt
+        if ! mv -T "$staging" "$DEPS_PATH" 2>/dev/null; then
+            # Another container finished first; use its copy.
+            rm -rf "$staging"
+        fi
+    fi
+    export DEPS_PATH
+}
@@ -0,0 +1,132 @@
+#!/bin/bash
+# Native-extension build cache shared by run_docker.sh and
+# run_docker_continue_replay.sh.  Source it from the bot directory.
+#
+# Compiled extensions are stored in /root/ext_cache/<name>/<hash>, where the
+# hash covers the extension's sources and the Python ABI (EXT_SUFFIX and,
+# when installed, the numpy version).  /root/ext_cache is the shared
+# "test_lab_ext_cache" docker volume: each unique extension is compiled once,
+# by the first container that needs it (under a lock), and every other
+# container - whatever branch it runs - only reads the finished entry.
+# Nothing is written back into the bind-mounted bot source directory.
+#
+# Exports EXT_PATH: the directories to prepend to PYTHONPATH (may be empty).
+
+EXT_CACHE_ROOT="${EXT_CACHE_ROOT:-/root/ext_cache}"
+# Container-local copies of packages whose extension must sit inside them.
+EXT_OVERLAY="/tmp/ext_overlay"
+
+EXT_PATH=""
+
+_ext_suffix() {
+    python3 -c "import sysconfig; print(sysconfig.get_config_var('EXT_SUFFIX'))"
+}
+
+# Print the cache key for the given source files.
+_ext_cache_key() {
+    (
+        _ext_suffix
+        python3 -c "import numpy; print('numpy', numpy.__version__)" 2>/dev/null || echo "numpy none"
+        for file in "$@"; do
+            echo "$file"
+            sha256sum < "$file"
+        done
+    ) | sha256sum | cut -c1-16
+}
+
+# Run "$3..." to fill a fresh directory unless <name>/<key> ($1/$2) is cached.
+# The command gets the staging directory as its last argument.  Prints the
+# entry directory; returns non-zero if the build failed or produced no
+# compiled module (nothing is cached then).
+_ext_cache_build() {
+    local name="$1" key="$2"
+    shift 2
+    local entry="$EXT_CACHE_ROOT/$name/$key"
+    mkdir -p "$EXT_CACHE_ROOT/$name"
+    (
+        # Only one container builds a given entry; the others wait for it.
+        flock 9
+        if [ -d "$entry" ]; then
+            echo "$name already built ($key), using the cached build." >&2
+            exit 0
+        fi
+        echo "Building $name ($key)..." >&2
+        local staging="$entry.tmp.$$"
+        rm -rf "$staging"
+        mkdir -p "$staging"
+        # The command runs in a condition, where set -e doesn't apply, so
+        # it must return non-zero itself; the module check catches the rest.
+        if ! "$@" "$staging" >&2 \
+                || [ -z "$(find "$staging" -name "*$(_ext_suffix)" -print -quit)" ]; then
+            echo "Building $name ($key) failed; not caching it." >&2
+            rm -rf "$staging"
+            exit 1
+        fi
+        mv -T "$staging" "$entry"
+    ) 9>"$EXT_CACHE_ROOT/$name/$key.lock" || return 1
+    echo "$entry"
+}
+
+_build_cython_extensions() {
+    local staging="$1"
+    # setup.py is run from the package's parent, as it would be from the bot dir.
+    uv pip install --system cython numpy setuptools \
+        && cp -a cython_extensions "$staging/" \
+        && (cd "$staging" && python3 cython_extensions/setup.py build_ext --inplace) \
+        || return 1
+    rm -rf "$staging/build"
+}
+
+_build_mapanalyzerext() {
+    local staging="$1"
+    local numpy_include python_include
+    numpy_include=$(python3 -c "import numpy; print(numpy.get_include())") || return 1
+    python_include=$(python3 -c "import sysconfig; print(sysconfig.get_path('include'))") || return 1
+    gcc -O2 -shared -fPIC \
+        -I"$numpy_include" \
+        -I"$python_include" \
+        "$BOT_DIR/MapAnalyzer/cext/src/ma_ext.c" \
+        -o "$staging/mapanalyzerext$(_ext_suffix)"
+}
+
+# Build (or reuse) the bot's native extensions and set EXT_PATH.
+#
+# - cython_extensions/ with a setup.py (e.g. BotTato): the entry holds the
+#   package with its compiled modules and goes first on PYTHONPATH.
+# - MapAnalyzer/cext/src/ma_ext.c: the entry holds mapanalyzerext<EXT_SUFFIX>.
+#   It is linked into a container-local copy of the MapAnalyzer package, so it
+#   wins over any stale mapanalyzerext.so shipped in the source tree, and the
+#   entry is also on PYTHONPATH for a top-level ``import mapanalyzerext``.
+build_extensions() {
+    EXT_PATH=""
+    local entry
+
+    if [ -f "cython_extensions/setup.py" ]; then
+        local sources
+        sources=$(find cython_extensions -maxdepth 1 -type f \
+            \( -name '*.pyx' -o -name '*.pxd' -o -name '*.c' -o -name 'setup.py' \) | sort)
+        # shellcheck disable=SC2086
+        if entry=$(_ext_cache_build cython_extensions "$(_ext_cache_key $sources)" _build_cython_extensions); then
+            EXT_PATH="$entry"
+        else
+            echo "WARNING: building cython_extensions failed; using the source tree as is."
+        fi
+    fi
+
+    if [ -f "MapAnalyzer/cext/src/ma_ext.c" ]; then
+        local sources
+        sources=$(find MapAnalyzer/cext/src -type f \( -name '*.c' -o -name '*.h' \) | sort)
+        # shellcheck disable=SC2086
+        if entry=$(_ext_cache_build mapanalyzerext "$(_ext_cache_key $sources)" _build_mapanalyzerext); then
+            mkdir -p "$EXT_OVERLAY"
+            rm -rf "$EXT_OVERLAY/MapAnalyzer"
+            cp -a MapAnalyzer "$EXT_OVERLAY/"
+            ln -sf "$entry/mapanalyzerext$(_ext_suffix)" "$EXT_OVERLAY/MapAnalyzer/cext/"
+            EXT_PATH="${EXT_PATH:+$EXT_PATH:}$EXT_OVERLAY:$entry"
+        else
+            echo "WARNING: building mapanalyzerext failed; using the source tree as is."
+        fi
+    fi
+
+    export EXT_PATH
+}
@@ -0,0 +1,175 @@
+"""Record a finished game for the test lab the moment it ends.
+
+Runs inside the Docker container, next to the run scripts.  The result
+is handed over in two ways:
+
+1. a small ``<MATCH_ID>_result.json`` sidecar written next to the
+   replay, which the host reads instead of scanning the container log,
+2. a POST to the host's ``api/match-complete/`` endpoint, so the match's
+   slot is freed before the container has shut down.
+
+The host passes the callback location via environment variables:
+
+  MATCH_REPORT_URL   - URL of the ``api/match-complete/`` endpoint
+                       (unset = don't post)
+  MATCH_REPORT_TOKEN - Per-match token proving the report is genuine
+  MATCH_ID           - Match row ID
+
+Both are best effort: the ``MATCH_RESULT:`` lines printed to stdout stay
+the fallback, so any failure here is only logged.
+
+The report includes the timestamps of the phases the match went through
+in the container (``match_phases.py`` on the host): the run scripts
+record theirs in ``MATCH_PHASES`` (``runner/phases.sh``), the Python
+runners add theirs with ``mark_phase`` and ``instrument_game``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+REPORT_TIMEOUT = 10
+
+# Mounted from the host's replays directory.
+RESULT_DIR = "/root/replays"
+
+
+# Phases recorded by this process: name -> Unix time.
+_phases: dict[str, float] = {}
+
+
+def mark_phase(name: str) -> None:
+    """Record that the match reached phase *name* now (first time only)."""
+    _phases.setdefault(name, time.time())
+
+
+def get_phases() -> dict[str, float]:
+    """Return the phases from ``MATCH_PHASES`` and those marked in this process."""
+    phases: dict[str, float] = {}
+    for item in os.environ.get("MATCH_PHASES", "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            phases[name] = float(value)
+        except ValueError:
+            continue
+    phases.update(_phases)
+    return phases
+
+
+def instrument_game(bot_instance=None) -> None:
+    """Mark ``sc2_launched``, ``game_created`` and the bot's ``first_step``.
+
+    Wraps python-sc2's ``_setup_host_game`` (called once the SC2 process
+    is up, returns once the game is created) and the bot's first
+    ``on_step`` call.  Does nothing for hooks this python-sc2 lacks.
+    """
+    try:
+        import sc2.main as sc2_main
+        setup_host_game = sc2_main._setup_host_game
+    except (ImportError, AttributeError):
+        setup_host_game = None
+    if setup_host_game is not None and not getattr(setup_host_game, "marks_phases", False):
+        async def _setup_host_game(*args, **kwargs):
+            mark_phase("sc2_launched")
+            client = await setup_host_game(*args, **kwargs)
+            mark_phase("game_created")
+            return client
+
+        _setup_host_game.marks_phases = True
+        sc2_main._setup_host_game = _setup_host_game
+
+    if bot_instance is not None and hasattr(bot_instance, "on_step"):
+        on_step = bot_instance.on_step
+
+        async def _first_on_step(*args, **kwargs):
+            mark_phase("first_step")
+            bot_instance.on_step = on_step
+            return await on_step(*args, **kwargs)
+
+        bot_instance.on_step = _first_on_step
+
+
+def get_step_time(bot_instance) -> dict | None:
+    """Return the bot's step-time stats in milliseconds, if python-sc2 tracks them."""
+    try:
+        step_min, step_avg, step_max, step_last = bot_instance.step_time
+    except Exception:
+        return None
+    return {"min": step_min, "avg": step_avg, "max": step_max, "last": step_last}
+
+
+def get_game_loop(bot_instance) -> int | None:
+    """Return the last game loop the bot saw, if any."""
+    try:
+        return int(bot_instance.state.game_loop)
+    except Exception:
+        return None
+
+
+def write_result_file(record: dict) -> bool:
+    """Write *record* to the result sidecar.  Returns True on success."""
+    match_id = os.environ.get("MATCH_ID")
+    if not match_id:
+        return False
+    path = os.path.join(RESULT_DIR, f"{match_id}_result.json")
+    try:
+        # Write then rename so the host never reads a partial file.
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(record, f)
+        os.replace(f"{path}.tmp", path)
+        return True
+    except OSError:
+        logger.warning("Could not write the result file %s", path, exc_info=True)
+        return False
+
+
+def post_result(record: dict) -> bool:
+    """POST *record* to the host.  Returns True if it was accepted."""
+    url = os.environ.get("MATCH_REPORT_URL")
+    match_id = os.environ.get("MATCH_ID")
+    if not url or not match_id:
+        return False
+
+    body = dict(record, match_id=int(match_id), token=os.environ.get("MATCH_REPORT_TOKEN", ""))
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=REPORT_TIMEOUT) as response:
+            return response.status == 200
+    except Exception:
+        logger.warning("Could not report the result to %s", url, exc_info=True)
+        return False
+
+
+def report_result(
+    result: str,
+    duration: int | None = None,
+    bot_race: str = "",
+    game_loop: int | None = None,
+    step_time: dict | None = None,
+) -> None:
+    """Write the result sidecar, then post the result to the host.
+
+    Marks the ``game_end`` phase and sends every phase recorded so far.
+    """
+    mark_phase("game_end")
+    record = {
+        "result": result,
+        "duration": duration,
+        "bot_race": bot_race,
+        "game_loop": game_loop,
+        "step_time": step_time,
+        "phases": get_phases(),
+    }
+    write_result_file(record)
+    post_result(record)
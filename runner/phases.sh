@@ -0,0 +1,9 @@
+#!/bin/bash
+# Phase timestamps for the run scripts (see match_phases.py on the host).
+#
+# mark_phase NAME appends NAME=<unix time> to MATCH_PHASES, which
+# runner/match_report.py sends to the host with the result.
+
+mark_phase() {
+    export MATCH_PHASES="${MATCH_PHASES:+$MATCH_PHASES,}$1=$(date +%s.%N)"
+}
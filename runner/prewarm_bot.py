@@ -0,0 +1,80 @@
+"""Check that a bot's entry point loads, without starting a game.
+
+Runs inside the Docker container as the last step of a branch prewarm
+(``run_docker.sh`` with ``PREWARM=1``), after the dependencies and native
+extensions have been set up exactly as a match would set them up.
+
+Prints ``PREWARM_RESULT:ok`` and exits 0 when the bot loads; otherwise
+prints the error and ``PREWARM_RESULT:failed`` and exits 1.
+
+Environment variables:
+  BOT_DIR    - Absolute path to the bot directory inside the container
+               (default: /root/bot_dir)
+  BOT_MODULE - Python module path to import the bot class from
+  BOT_CLASS  - Bot class name within the module
+  BOT_ENTRY  - Entry point filename for bots launched via their own run.py
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import py_compile
+import sys
+import traceback
+
+
+def _ladderbots_entry(bot_dir: str) -> str:
+    for filename in ("ladderbots.json", "LadderBots.json"):
+        path = os.path.join(bot_dir, filename)
+        if os.path.isfile(path):
+            with open(path) as f:
+                bots = json.load(f).get("Bots", {})
+            if bots:
+                return next(iter(bots.values())).get("FileName", "")
+    return ""
+
+
+def check_entry_point(bot_dir: str) -> str:
+    """Load the bot the way the runner would.  Returns a description of what was checked."""
+    from bot_import import try_load_bot_loader
+
+    loader = try_load_bot_loader(bot_dir)
+    if loader:
+        if not callable(getattr(loader, "create_bot", None)):
+            raise RuntimeError("bot_loader.py has no create_bot() function")
+        return "bot_loader.py"
+
+    bot_module_path = os.environ.get("BOT_MODULE") or ""
+    bot_class_name = os.environ.get("BOT_CLASS") or ""
+    if bot_module_path and bot_class_name:
+        getattr(importlib.import_module(bot_module_path), bot_class_name)
+        return f"{bot_module_path}.{bot_class_name}"
+
+    # Bots started through their own run.py: the script runs the game on
+    # import, so only check that it compiles.
+    entry = os.environ.get("BOT_ENTRY") or _ladderbots_entry(bot_dir) or "run.py"
+    path = os.path.join(bot_dir, entry)
+    if not os.path.isfile(path):
+        raise RuntimeError(f"Entry point {entry} not found in {bot_dir}")
+    py_compile.compile(path, doraise=True)
+    return entry
+
+
+def main() -> int:
+    bot_dir = os.environ.get("BOT_DIR", "/root/bot_dir")
+    os.chdir(bot_dir)
+    try:
+        checked = check_entry_point(bot_dir)
+    except Exception:
+        traceback.print_exc()
+        print("PREWARM_RESULT:failed", flush=True)
+        return 1
+    print(f"Entry point OK: {checked}")
+    print("PREWARM_RESULT:ok", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
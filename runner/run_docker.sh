@@ -4,12 +4,20 @@
 #
 # Environment:
 #   BOT_DIR  – path to the mounted bot directory (default: /root/bot_dir)
+#   PREWARM  – when set, only install dependencies, build extensions and
+#              check the entry point (runner/prewarm_bot.py), then exit
 
 set -e
 
 BOT_DIR="${BOT_DIR:-/root/bot_dir}"
 cd "$BOT_DIR"
 
+source /root/runner/phases.sh
+mark_phase container_up
+
+source /root/runner/deps_env.sh
+source /root/runner/ext_cache.sh
+
 # ---------------------------------------------------------------------------
 # Detect bot type from ladderbots.json (case-insensitive filename)
 # ---------------------------------------------------------------------------
@@ -47,67 +55,16 @@ echo "Bot dir:  $BOT_DIR"
 # ---------------------------------------------------------------------------
 case "$BOT_TYPE" in
     python)
-        # Install core sc2 library dependencies needed by the runner
-        echo "Installing sc2 runner dependencies..."
-        uv pip install --system -r /root/runner/sc2_deps.txt
-
-        # Install bot-specific requirements if present
-        if [ -f "requirements.txt" ]; then
-            echo "Installing bot requirements..."
-            uv pip install --system -r requirements.txt
-        fi
+        # sc2 runner dependencies and bot requirements (cached, see deps_env.sh)
+        install_sc2_deps
+        install_bot_deps
+        export PYTHONPATH="${DEPS_PATH}${PYTHONPATH:+:$PYTHONPATH}"
+        mark_phase deps_installed
 
-        # Build Cython extensions if the bot ships a setup.py (e.g. BotTato)
-        # Build in a container-local temp directory to avoid races — the bot
-        # source dir is a bind-mount shared by all concurrent containers.
-        CYTHON_BUILD=""
-        if [ -d "cython_extensions" ] && [ -f "cython_extensions/setup.py" ]; then
-            PYTHON_VERSION=$(python3 -c 'import sys; print(f"{sys.version_info.major}{sys.version_info.minor}")')
-            CYTHON_BUILD="/tmp/cython_build"
-            mkdir -p "$CYTHON_BUILD"
-            cp -a cython_extensions "$CYTHON_BUILD/"
-
-            # Skip compilation if every .pyx already has a matching .so for
-            # this Python version (files persist on the host via bind-mount).
-            PYX_COUNT=$(find cython_extensions -maxdepth 1 -name '*.pyx' | wc -l)
-            SO_COUNT=$(find cython_extensions -maxdepth 1 -name "*cpython-${PYTHON_VERSION}*.so" | wc -l)
-
-            if [ "$PYX_COUNT" -gt 0 ] && [ "$SO_COUNT" -ge "$PYX_COUNT" ]; then
-                echo "Cython extensions already compiled for Python ${PYTHON_VERSION} (${SO_COUNT}/${PYX_COUNT}), skipping build."
-            else
-                echo "Building Cython extensions for Python ${PYTHON_VERSION} (${SO_COUNT}/${PYX_COUNT} pre-built)..."
-                uv pip install --system cython numpy setuptools
-                python3 "$CYTHON_BUILD/cython_extensions/setup.py" build_ext --inplace
-                # Persist compiled .so files back to the source dir so future containers skip the build.
-                find "$CYTHON_BUILD/cython_extensions" -maxdepth 1 -name "*cpython-${PYTHON_VERSION}*.so" \
-                    -exec cp -f {} cython_extensions/ \;
-                echo "Cython .so files persisted to source directory."
-            fi
-        fi
-
-        # Build and persist mapanalyzerext using the Python-version-specific
-        # EXT_SUFFIX (e.g. mapanalyzerext.cpython-312-x86_64-linux-gnu.so).
-        # Python's import machinery resolves the cpython-specific name before
-        # the plain mapanalyzerext.so, so both this container and the aiarena
-        # bot-vs-bot containers (which mount the same source dir but lack gcc)
-        # will use this freshly built binary automatically. Skip if already built.
-        if [ -f "$BOT_DIR/MapAnalyzer/cext/src/ma_ext.c" ]; then
-            EXT_SUFFIX=$(python3 -c "import sysconfig; print(sysconfig.get_config_var('EXT_SUFFIX'))")
-            MA_EXT="$BOT_DIR/MapAnalyzer/cext/mapanalyzerext${EXT_SUFFIX}"
-            if [ ! -f "$MA_EXT" ]; then
-                echo "Building mapanalyzerext${EXT_SUFFIX}..."
-                NUMPY_INCLUDE=$(python3 -c "import numpy; print(numpy.get_include())")
-                PYTHON_INCLUDE=$(python3 -c "import sysconfig; print(sysconfig.get_path('include'))")
-                gcc -O2 -shared -fPIC \
-                    -I"$NUMPY_INCLUDE" \
-                    -I"$PYTHON_INCLUDE" \
-                    "$BOT_DIR/MapAnalyzer/cext/src/ma_ext.c" \
-                    -o "$MA_EXT"
-                echo "mapanalyzerext persisted to $MA_EXT"
-            else
-                echo "mapanalyzerext already built (${EXT_SUFFIX}), skipping."
-            fi
-        fi
+        # Build native extensions (cython_extensions, mapanalyzerext) once
+        # per source hash, outside the shared source dir (see ext_cache.sh).
+        build_extensions
+        mark_phase extensions_built
 
         # Auto-discover common framework paths
         EXTRA_PATHS=""
@@ -115,9 +72,13 @@ case "$BOT_TYPE" in
             EXTRA_PATHS="$BOT_DIR/ares-sc2/src/ares:$BOT_DIR/ares-sc2/src:$BOT_DIR/ares-sc2"
         fi
 
-        export PYTHONPATH="${CYTHON_BUILD:+$CYTHON_BUILD:}${BOT_DIR}${EXTRA_PATHS:+:$EXTRA_PATHS}:/root/runner${PYTHONPATH:+:$PYTHONPATH}"
+        export PYTHONPATH="${EXT_PATH:+$EXT_PATH:}${BOT_DIR}${EXTRA_PATHS:+:$EXTRA_PATHS}:/root/runner${PYTHONPATH:+:$PYTHONPATH}"
         echo "PYTHONPATH=$PYTHONPATH"
 
+        if [ -n "$PREWARM" ]; then
+            exec python3 /root/runner/prewarm_bot.py
+        fi
+
         # If the bot ships a bot_loader.py or has BOT_MODULE/BOT_CLASS set,
         # use the standard runner (which handles both paths internally).
         # bot_loader.py avoids module-name collisions between the runner's
@@ -134,17 +95,21 @@ case "$BOT_TYPE" in
     dotnetcore|cpplinux|cppwin32|java|nodejs)
         # External (non-Python) bots: launch SC2 + create game via Python,
         # then spawn the bot process which connects via WebSocket.
-        echo "Installing sc2 runner dependencies..."
-        uv pip install --system -r /root/runner/sc2_deps.txt
+        install_sc2_deps
 
         # Install bot-specific npm packages if present
         if [ "$BOT_TYPE" = "nodejs" ] && [ -f "package.json" ]; then
             echo "Installing npm dependencies..."
             npm install --omit=dev 2>&1
         fi
+        mark_phase deps_installed
 
         export PYTHONPATH="/root/runner${PYTHONPATH:+:$PYTHONPATH}"
         echo "PYTHONPATH=$PYTHONPATH"
+        if [ -n "$PREWARM" ]; then
+            echo "PREWARM_RESULT:ok"
+            exit 0
+        fi
         exec python3 /root/runner/run_vs_computer_external.py "$BOT_TYPE"
         ;;
 
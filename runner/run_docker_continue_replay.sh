@@ -11,28 +11,20 @@ set -e
 BOT_DIR="${BOT_DIR:-/root/bot_dir}"
 cd "$BOT_DIR"
 
-# Install core sc2 library dependencies needed by the runner
-echo "Installing sc2 runner dependencies..."
-uv pip install --system -r /root/runner/sc2_deps.txt
+source /root/runner/phases.sh
+mark_phase container_up
 
-# Install bot-specific requirements if present
-if [ -f "requirements.txt" ]; then
-    echo "Installing bot requirements..."
-    uv pip install --system -r requirements.txt
-fi
+# sc2 runner dependencies and bot requirements (cached, see deps_env.sh)
+source /root/runner/deps_env.sh
+install_sc2_deps
+install_bot_deps
+export PYTHONPATH="${DEPS_PATH}${PYTHONPATH:+:$PYTHONPATH}"
+mark_phase deps_installed
 
-# Build Cython extensions if the bot ships a setup.py (e.g. BotTato)
-if [ -d "cython_extensions" ] && [ -f "cython_extensions/setup.py" ]; then
-    PYTHON_VERSION=$(python3 -c 'import sys; print(f"{sys.version_info.major}{sys.version_info.minor}")')
-    SO_FILES=$(ls cython_extensions/*.cpython-${PYTHON_VERSION}*.so 2>/dev/null | wc -l)
-    if [ "$SO_FILES" -lt 13 ]; then
-        echo "Building Cython extensions for Python ${PYTHON_VERSION}..."
-        uv pip install --system cython numpy setuptools
-        (cd cython_extensions && python3 setup.py build_ext --inplace)
-    else
-        echo "Cython extensions already built for Python ${PYTHON_VERSION}"
-    fi
-fi
+# Build native extensions once per source hash (see ext_cache.sh)
+source /root/runner/ext_cache.sh
+build_extensions
+mark_phase extensions_built
 
 # Auto-discover common framework paths
 EXTRA_PATHS=""
@@ -40,5 +32,5 @@ if [ -d "$BOT_DIR/ares-sc2/src" ]; then
     EXTRA_PATHS="$BOT_DIR/ares-sc2/src/ares:$BOT_DIR/ares-sc2/src:$BOT_DIR/ares-sc2"
 fi
 
-export PYTHONPATH="${BOT_DIR}${EXTRA_PATHS:+:$EXTRA_PATHS}:/root/runner${PYTHONPATH:+:$PYTHONPATH}"
+export PYTHONPATH="${EXT_PATH:+$EXT_PATH:}${BOT_DIR}${EXTRA_PATHS:+:$EXTRA_PATHS}:/root/runner${PYTHONPATH:+:$PYTHONPATH}"
 exec python3 /root/runner/run_from_replay.py "$@"
@@ -29,6 +29,7 @@ import sys
 logger = logging.getLogger(__name__)
 
 from config import BUILD_DICT, DIFFICULTY_DICT, RACE_DICT
+from match_report import get_game_loop, get_step_time, instrument_game, report_result
 from replay_continuation import run_game_from_replay
 from sc2.data import Difficulty, Race, Result
 from sc2.player import Bot, Computer
@@ -37,8 +38,9 @@ from sc2.player import Bot, Computer
 def main() -> str:
     """Run a continue-from-replay match and return the result string.
 
-    The result is also printed to stdout as ``MATCH_RESULT:<result>`` so
-    the host-side monitoring thread can parse it from the container log.
+    The result is posted to the host (``match_report.py``) and also
+    printed to stdout as ``MATCH_RESULT:<result>`` so the host can parse
+    it from the container log if the report doesn't arrive.
     """
     replay_path = os.environ.get("REPLAY_PATH")
     takeover_loop_str = os.environ.get("TAKEOVER_GAME_LOOP")
@@ -107,12 +109,14 @@ def main() -> str:
 
     output_replay_path = f"/root/replays/{match_id}_continued.SC2Replay"
 
+    bot_instance = bot_cls()
+    instrument_game(bot_instance)
     try:
         result, map_name = run_game_from_replay(
             replay_path=replay_path,
             target_game_loop=takeover_game_loop,
             players=[
-                Bot(bot_race, bot_cls(), bot_name),
+                Bot(bot_race, bot_instance, bot_name),
                 Computer(race, difficulty, ai_build=ai_build),
             ],
             bot_player_id=bot_player_id,
@@ -135,6 +139,11 @@ def main() -> str:
         result_str = "Crash"
 
     print(f"MATCH_RESULT:{result_str}", flush=True)
+    report_result(
+        result_str,
+        game_loop=get_game_loop(bot_instance),
+        step_time=get_step_time(bot_instance),
+    )
     return result_str
 
 
@@ -17,6 +17,8 @@ Environment variables:
   BOT_CLASS  - Bot class name within the module (e.g. 'BotTato')
   BOT_RACE   - Bot race: Protoss, Terran, Zerg, or Random
   BOT_NAME   - Display name for the bot (used in replay metadata)
+  MATCH_REPORT_URL, MATCH_REPORT_TOKEN
+             - Where to post the result when the game ends (see match_report.py)
 """
 
 from __future__ import annotations
@@ -29,6 +31,7 @@ import os
 logger = logging.getLogger(__name__)
 
 from config import BUILD_DICT, DIFFICULTY_DICT, RACE_DICT
+from match_report import get_game_loop, get_step_time, instrument_game, report_result
 from sc2 import maps
 from sc2.data import Race, Result
 from sc2.main import run_game
@@ -53,8 +56,9 @@ def _read_ladderbots(bot_dir: str) -> dict:
 def main() -> str:
     """Run a single match and return the result string.
 
-    The result is also printed to stdout as ``MATCH_RESULT:<result>`` so
-    the host-side monitoring thread can parse it from the container log.
+    The result is posted to the host (``match_report.py``) and also
+    printed to stdout as ``MATCH_RESULT:<result>`` so the host can parse
+    it from the container log if the report doesn't arrive.
     """
     bot_dir = os.environ.get("BOT_DIR", "/root/bot_dir")
     os.chdir(bot_dir)
@@ -108,6 +112,7 @@ def main() -> str:
     os.environ["TEST_MATCH_ID"] = match_id
 
     duration: int | None = None
+    instrument_game(bot_instance)
 
     try:
         result: Result | list[Result | None] = run_game(
@@ -141,11 +146,18 @@ def main() -> str:
     if duration is not None:
         print(f"MATCH_DURATION:{duration}", flush=True)
     # Report the resolved race (useful when bot was set to Random)
+    resolved_race = ""
     if hasattr(bot_instance, 'race') and bot_instance.race is not None:
         try:
-            print(f"BOT_RACE:{bot_instance.race.name}", flush=True)
+            resolved_race = bot_instance.race.name
+            print(f"BOT_RACE:{resolved_race}", flush=True)
         except Exception:
             pass
+    report_result(
+        result_str, duration, resolved_race,
+        game_loop=get_game_loop(bot_instance),
+        step_time=get_step_time(bot_instance),
+    )
     return result_str
 
 
@@ -20,6 +20,8 @@ Environment variables (same as run_vs_computer.py):
   BOT_ENTRY   - Entry point filename (e.g. 'norman.js'), read from
                 ladderbots.json FileName if not set
   BOT_RACE    - Bot race for createGame participant (default from ladderbots.json)
+  MATCH_REPORT_URL, MATCH_REPORT_TOKEN
+              - Where to post the result when the game ends (see match_report.py)
 """
 
 from __future__ import annotations
@@ -35,6 +37,7 @@ import aiohttp
 logger = logging.getLogger(__name__)
 
 from config import BUILD_DICT, DIFFICULTY_DICT, RACE_DICT
+from match_report import mark_phase, report_result
 from sc2 import maps
 from sc2.data import Race, Result
 from sc2.player import Computer
@@ -256,6 +259,7 @@ async def _run_match(bot_type: str) -> tuple[str, int | None]:
     patches: list[tuple[str, str | None]] = []
     try:
         controller = await sc2_proc.__aenter__()
+        mark_phase("sc2_launched")
         sc2_port = sc2_proc._port
 
         # Create the game: one Participant (the external bot) + one Computer
@@ -282,6 +286,7 @@ async def _run_match(bot_type: str) -> tuple[str, int | None]:
             if result.create_game.HasField("error_details"):
                 err += f": {result.create_game.error_details}"
             raise RuntimeError(err)
+        mark_phase("game_created")
 
         # Disconnect Python's WebSocket so the bot can connect to SC2
         logger.info(f"Game created on port {sc2_port}. Releasing WebSocket for bot.")
@@ -424,6 +429,7 @@ def main(bot_type: str) -> None:
     bot_race_name = os.environ.get('BOT_RACE', '')
     if bot_race_name:
         print(f"BOT_RACE:{bot_race_name}", flush=True)
+    report_result(result_str, duration, bot_race_name)
 
 
 if __name__ == "__main__":
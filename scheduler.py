@@ -0,0 +1,353 @@
+"""Match scheduler — a long-running process that owns the match queue.
+
+Run it alongside the web server::
+
+    python test_lab/quickstart/manage.py run_scheduler
+
+While the scheduler is alive it:
+
+- starts ``'Queued'`` matches as soon as capacity is available (web
+  processes only create the Match rows and leave them queued),
+- supervises the matches it launched on a single event loop
+  (``supervisor.py``), so they are never lost to a dev-server reload,
+- reconciles stale ``'Running'`` matches and orphaned branch prewarms
+  on a timer,
+- cancels the queued matches of test groups whose result has been
+  decided by early stopping (``early_stopping.py``),
+- samples the CPU and memory use of running matches so resource-aware
+  admission can learn each bot's footprint (``resource_usage.py``),
+- keeps the warm pool of idle SC2 controllers topped up
+  (``warm_pool.py``),
+- removes the least recently used match images (``image_cache.py``).
+
+Liveness is advertised through ``SystemConfig.scheduler_heartbeat``.  When
+no scheduler has reported in recently, web processes fall back to the
+old behaviour (launching in-process and reconciling on page load) so a
+plain ``runserver`` setup keeps working.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.utils import timezone
+
+logger = logging.getLogger('test_lab')
+
+# A heartbeat older than this means the scheduler is gone.
+HEARTBEAT_TIMEOUT = timedelta(seconds=60)
+
+# Worker threads for checking the pending matches that stopped running.
+RECONCILE_WORKERS = 4
+
+# A running single-container match with no containers and no result
+# this long after its launch never started or lost its result; it is
+# recorded as a crash so it stops taking a slot.
+ABANDONED_MATCH_GRACE = timedelta(minutes=15)
+
+# Set by ``run()`` so the scheduler process never defers to itself.
+_is_scheduler_process = False
+
+# Set to wake the scheduler loop early (e.g. when a match finishes).
+_wake_event = threading.Event()
+
+# Held while a warm pool maintenance pass is running.
+_warm_pool_lock = threading.Lock()
+
+# Held while unused match images are being removed.
+_image_gc_lock = threading.Lock()
+
+
+def is_scheduler_process() -> bool:
+    """Return True if the current process is running the scheduler loop."""
+    return _is_scheduler_process
+
+
+def is_scheduler_running() -> bool:
+    """Return True if a scheduler process has sent a heartbeat recently."""
+    from .models import SystemConfig
+    heartbeat = (
+        SystemConfig.objects
+        .filter(id=1)
+        .values_list('scheduler_heartbeat', flat=True)
+        .first()
+    )
+    if heartbeat is None:
+        return False
+    return timezone.now() - heartbeat < HEARTBEAT_TIMEOUT
+
+
+def owns_queue() -> bool:
+    """Return True if the current process should launch matches itself.
+
+    That is the case inside the scheduler, and in any process when no
+    scheduler is running.
+    """
+    return _is_scheduler_process or not is_scheduler_running()
+
+
+def wake() -> None:
+    """Wake the scheduler loop so it drains the queue without waiting."""
+    _wake_event.set()
+
+
+def record_heartbeat() -> None:
+    """Mark the scheduler as alive."""
+    from .models import SystemConfig
+    if not SystemConfig.objects.filter(id=1).update(scheduler_heartbeat=timezone.now()):
+        config = SystemConfig.load()
+        config.scheduler_heartbeat = timezone.now()
+        config.save(update_fields=['scheduler_heartbeat'])
+
+
+def clear_heartbeat() -> None:
+    """Mark the scheduler as stopped so web processes take over immediately."""
+    from .models import SystemConfig
+    SystemConfig.objects.filter(id=1).update(scheduler_heartbeat=None)
+
+
+def reconcile_stale_matches() -> dict[int, str]:
+    """Collect results for pending matches that no supervisor is watching.
+
+    One query lists the unwatched pending matches and one docker call
+    lists every compose project's containers.  Only matches whose
+    containers are no longer all running are checked further, on a small
+    worker pool, so the cost follows the number of matches that changed
+    rather than the number pending.
+
+    Returns a dict of ``{match_id: result}`` for recovered matches.
+    """
+    from . import container_backend, match_queue, warm_pool
+    from .models import Match
+
+    # Batch members follow their leader and have nothing of their own to check.
+    pending = list(
+        Match.objects
+        .filter(status='Running', batch_leader__isnull=True)
+        .exclude(id__in=match_queue.get_monitored_match_ids())
+    )
+    if not pending:
+        return {}
+
+    projects = container_backend.get_backend().list_projects()
+    if projects is None:
+        logger.warning('Could not list containers; checking all %d pending match(es)', len(pending))
+        changed = pending
+        # Unknown, so no match is treated as abandoned.
+        has_containers = [True] * len(changed)
+    else:
+        warm_projects = {
+            match_id: warm_pool.get_project_name(slot)
+            for slot, match_id in warm_pool.get_claims().items()
+        }
+        changed = [m for m in pending if not _is_playing(m.id, projects, warm_projects)]
+        has_containers = [bool(_container_states(m.id, projects, warm_projects)) for m in changed]
+    if not changed:
+        return {}
+
+    recovered: dict[int, str] = {}
+    with ThreadPoolExecutor(max_workers=RECONCILE_WORKERS, thread_name_prefix='reconcile') as pool:
+        for match, result in zip(changed, pool.map(_reconcile_match, changed, has_containers)):
+            if result:
+                recovered[match.id] = result
+    if recovered:
+        logger.info('Recovered %d stale match(es): %s', len(recovered), recovered)
+    return recovered
+
+
+def _container_states(
+    match_id: int, projects: dict[str, dict[str, str]], warm_projects: dict[int, str],
+) -> list[str]:
+    """Return the states of a match's containers."""
+    from . import warm_pool
+
+    if match_id in warm_projects:
+        containers = projects.get(warm_projects[match_id], {})
+        return [containers[s] for s in warm_pool.MATCH_SERVICES if s in containers]
+    states = list(projects.get(f'aiarena_{match_id}', {}).values())
+    states += projects.get(f'match_{match_id}', {}).values()
+    return states
+
+
+def _is_playing(match_id: int, projects: dict[str, dict[str, str]], warm_projects: dict[int, str]) -> bool:
+    """Return True if all of a match's containers are running."""
+    states = _container_states(match_id, projects, warm_projects)
+    return bool(states) and all(state == 'running' for state in states)
+
+
+def _reconcile_match(match, has_containers: bool = True) -> str | None:
+    """Collect the result of one pending match if it has finished (worker thread).
+
+    A match without run directory, containers or result well after its
+    launch is recorded as a ``'Crash'`` (``NoResult``).
+    """
+    from django.db import connection
+
+    from . import aiarena_runner
+    from .views import _recover_sc_docker_match, _save_sc_docker_result
+
+    try:
+        if os.path.isdir(aiarena_runner.get_run_dir(match.id)):
+            return aiarena_runner.collect_match_result(match.id)
+        result = _recover_sc_docker_match(match)
+        launched_at = match.launched_at or match.start_timestamp
+        if not result and not has_containers and timezone.now() - launched_at > ABANDONED_MATCH_GRACE:
+            logger.warning('Match %d: no containers and no result since %s; recording a crash',
+                           match.id, launched_at)
+            _save_sc_docker_result(match, 'Crash', {}, failure_kind='NoResult')
+            result = 'Crash'
+        return result
+    except Exception:
+        logger.exception('Error reconciling pending match %d', match.id)
+        return None
+    finally:
+        connection.close()
+
+
+def stop_decided_groups() -> None:
+    """Cancel the queued matches of early-stopping groups that are decided."""
+    from . import early_stopping
+    try:
+        early_stopping.evaluate_active_groups()
+    except Exception:
+        logger.exception('Error evaluating early stopping')
+
+
+def tick(reconcile: bool = True) -> int:
+    """Run one scheduling pass: reconcile stale matches, cancel the queues
+    of groups decided by early stopping, then drain the queue.
+
+    Returns the number of matches started.
+    """
+    from . import match_queue, prewarm
+
+    if reconcile:
+        reconcile_stale_matches()
+        prewarm.reconcile_prewarms()
+        match_queue.sync_ledger()
+    stop_decided_groups()
+    try:
+        return match_queue.drain_queue()
+    except Exception:
+        logger.exception('Error draining match queue')
+        return 0
+
+
+def sample_resources() -> None:
+    """Record the current CPU and memory use of running matches."""
+    from . import resource_usage
+    try:
+        resource_usage.sample_running_matches()
+    except Exception:
+        logger.exception('Error sampling match resource usage')
+
+
+def maintain_warm_pool() -> None:
+    """Top up the warm pool in the background.
+
+    Starting SC2 controllers can take minutes on first pull, so the pass
+    runs in its own thread and is skipped while the previous one is busy.
+    """
+    from . import warm_pool
+
+    if not _warm_pool_lock.acquire(blocking=False):
+        return
+
+    def _maintain():
+        try:
+            warm_pool.maintain()
+        except Exception:
+            logger.exception('Error maintaining the warm pool')
+        finally:
+            _warm_pool_lock.release()
+
+    threading.Thread(target=_maintain, daemon=True).start()
+
+
+def collect_image_garbage() -> None:
+    """Remove the match images beyond ``image_cache.MAX_CACHED_IMAGES`` in the background.
+
+    Each ``docker image rm`` may take a while, so the pass runs in its own
+    thread and is skipped while the previous one is busy.
+    """
+    from . import image_cache
+
+    if not _image_gc_lock.acquire(blocking=False):
+        return
+
+    def _collect():
+        try:
+            image_cache.collect_garbage()
+        except Exception:
+            logger.exception('Error removing unused match images')
+        finally:
+            _image_gc_lock.release()
+
+    threading.Thread(target=_collect, daemon=True).start()
+
+
+def run(
+    poll_interval: float = 2.0,
+    reconcile_interval: float = 30.0,
+    sample_interval: float = 10.0,
+    stop_event: threading.Event | None = None,
+) -> None:
+    """Run the scheduler loop until *stop_event* is set.
+
+    The queue is drained every *poll_interval* seconds (or immediately
+    when a match finishes in this process), stale matches are
+    reconciled every *reconcile_interval* seconds and running matches
+    are sampled for resource use every *sample_interval* seconds.
+    """
+    global _is_scheduler_process
+    _is_scheduler_process = True
+    stop_event = stop_event or threading.Event()
+    last_reconcile = float('-inf')
+    last_sample = float('-inf')
+
+    logger.info(
+        'Match scheduler started (poll every %.1fs, reconcile every %.1fs)',
+        poll_interval, reconcile_interval,
+    )
+    # Adopts the pending matches of a previous scheduler right away.
+    from . import supervisor
+    supervisor.start()
+    try:
+        while not stop_event.is_set():
+            try:
+                record_heartbeat()
+                now = time.monotonic()
+                reconcile = now - last_reconcile >= reconcile_interval
+                if reconcile:
+                    last_reconcile = now
+                    maintain_warm_pool()
+                    collect_image_garbage()
+                if now - last_sample >= sample_interval:
+                    last_sample = now
+                    sample_resources()
+                started = tick(reconcile=reconcile)
+                if started:
+                    logger.info('Scheduler started %d queued match(es)', started)
+            except Exception:
+                logger.exception('Match scheduler pass failed')
+            _wake_event.wait(poll_interval)
+            _wake_event.clear()
+    finally:
+        try:
+            clear_heartbeat()
+        except Exception:
+            logger.exception('Could not clear scheduler heartbeat')
+        try:
+            from . import warm_pool
+            if _warm_pool_lock.acquire(timeout=60):
+                try:
+                    warm_pool.shutdown()
+                finally:
+                    _warm_pool_lock.release()
+        except Exception:
+            logger.exception('Could not shut down the warm pool')
+        _is_scheduler_process = False
+        logger.info('Match scheduler stopped')
@@ -0,0 +1,58 @@
+"""Cancellation of test groups superseded by a newer run of the same branch.
+
+When a ticket branch gets a new commit, the test suite is triggered again
+and the previous group's results no longer matter.  Depending on
+``SystemConfig.supersede_policy`` the new group:
+
+- ``Off``    — leaves older groups alone,
+- ``Queued`` — cancels their queued matches (running ones finish),
+- ``All``    — also cancels their running matches and stops the
+  containers with ``docker compose down``.
+
+Superseded groups point at their replacement via
+``TestGroup.superseded_by``.
+"""
+
+import logging
+
+logger = logging.getLogger('test_lab')
+
+
+def supersede_previous_groups(new_group, test_bot) -> list[int]:
+    """Cancel unfinished matches of older groups for the same bot and branch.
+
+    Call before launching the new group's matches so the freed capacity
+    goes to them.  Returns the ids of the groups that were superseded.
+    """
+    from django.db.models import F
+    from . import match_queue
+    from .models import SystemConfig, TestGroup
+
+    if not new_group.branch or test_bot is None:
+        return []
+    policy = SystemConfig.load().supersede_policy
+    if policy == SystemConfig.SupersedePolicy.Off:
+        return []
+
+    old_groups = list(
+        TestGroup.objects
+        .filter(
+            branch=new_group.branch, id__lt=new_group.id, superseded_by__isnull=True,
+            match__test_bot_id=test_bot.id, match__status__in=('Queued', 'Running'),
+        )
+        .exclude(id=-1)
+        .distinct()
+        .values_list('id', flat=True)
+    )
+    for group_id in old_groups:
+        cancelled = match_queue.cancel_queued_matches(group_id)
+        stopped: list[int] = []
+        if policy == SystemConfig.SupersedePolicy.All:
+            stopped = match_queue.cancel_running_matches(group_id)
+        logger.info(
+            'Test group %d superseded by %d (branch %s): cancelled %d queued, stopped %d running match(es)',
+            group_id, new_group.id, new_group.branch, cancelled, len(stopped),
+        )
+    if old_groups:
+        TestGroup.objects.filter(id__in=old_groups).update(superseded_by=new_group, version=F('version') + 1)
+    return old_groups
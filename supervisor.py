@@ -0,0 +1,316 @@
+"""Match supervisor — one asyncio event loop that watches every running match.
+
+Launching a match used to start a daemon thread that blocked on the
+docker process for up to two hours.  Now a launch submits a ``MatchJob``
+to the supervisor, which runs each job as a coroutine on a single event
+loop thread:
+
+1. ``start`` launches the containers through the container backend,
+2. ``poll`` is awaited every ``POLL_INTERVAL`` seconds until the match
+   has finished (``stop`` is called once the job's timeout passes),
+3. ``finish`` collects the result, then the queue is notified.
+
+The blocking steps (docker calls, file and database access) run on two
+small fixed worker pools, so the thread count stays the same however
+many matches are running: one for the quick polls, one for launching,
+stopping and collecting results, which can take minutes (image builds,
+``docker compose down``) without delaying the polls of other matches.
+
+``_jobs`` is changed from the launching threads as well as the loop, so
+it is only touched under ``_jobs_lock``.
+
+A second coroutine releases a match's queue slot as soon as its result
+is in the database — e.g. posted by the runner script to
+``api_match_complete`` when the game ends — without waiting for the
+containers to be torn down.
+
+When the loop starts it also adopts the ``'Running'`` matches that no
+thread is watching — matches launched by a process that has since
+exited (e.g. a dev-server reload) — and polls their recovery path until
+their result is in, instead of waiting for the periodic reconcile.
+
+Branch prewarms (``prewarm.py``) run on the same loop as jobs without a
+match; they hold no queue slot, so the queue is not notified for them.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.utils import timezone
+
+from .container_backend import RunResult
+
+logger = logging.getLogger('test_lab')
+
+# Seconds between polls of a running match.
+POLL_INTERVAL = 2.0
+
+# Worker threads for the polls of all jobs.
+MAX_WORKERS = 4
+
+# Worker threads for the start, stop and finish steps of all jobs.
+MAX_STEP_WORKERS = 4
+
+# Time allowed for one game before a match is stopped.
+MATCH_TIMEOUT = 7200
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_executor: ThreadPoolExecutor | None = None
+_step_executor: ThreadPoolExecutor | None = None
+_jobs_lock = threading.Lock()
+_jobs: dict[int | str, 'MatchJob'] = {}
+
+
+class MatchJob:
+    """A running match.  Subclasses implement the blocking steps.
+
+    *match_id* is None for a job that runs no match (a prewarm); such a
+    job overrides ``key`` and ``label``.
+    """
+
+    def __init__(self, match_id: int | None, timeout: float = MATCH_TIMEOUT):
+        self.match_id = match_id
+        self.timeout = timeout
+        # Set once the queue has been told the match finished.
+        self.released = False
+
+    @property
+    def key(self) -> int | str:
+        """Key of the job in the supervisor (unique per process)."""
+        return self.match_id
+
+    @property
+    def label(self) -> str:
+        """Name of the job in log messages."""
+        return f'Match {self.match_id}'
+
+    def start(self) -> None:
+        """Launch the match's containers."""
+        raise NotImplementedError
+
+    def poll(self) -> RunResult | None:
+        """Return the run result once the match has finished, else None."""
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        """Stop the match after its timeout."""
+
+    def finish(self, run_result: RunResult | None) -> None:
+        """Record the result.  *run_result* is None if starting or polling failed."""
+        raise NotImplementedError
+
+
+def failure_kind(result: str | None, run_result: RunResult | None) -> str:
+    """Return the ``Match.failure_kind`` of a finished match.
+
+    *result* is the result the match reported, or None if it reported
+    none; *run_result* is what ``MatchJob.finish`` was given.
+    """
+    if result and result != 'Crash':
+        return ''
+    if run_result is None:
+        return 'LaunchFailed'
+    if run_result.timed_out:
+        return 'Timeout'
+    return 'Crash' if result else 'NoResult'
+
+
+class _AdoptedMatchJob(MatchJob):
+    """A pending match launched by another (gone) process.
+
+    Polls the stale-match recovery path, which records the result as
+    soon as the docker process or containers have finished.
+    """
+
+    def __init__(self, match_id: int, is_aiarena: bool, timeout: float):
+        super().__init__(match_id, timeout)
+        self.is_aiarena = is_aiarena
+        self.started_at = timezone.now()
+
+    def start(self) -> None:
+        pass
+
+    def poll(self) -> RunResult | None:
+        from . import aiarena_runner
+        from .models import Match
+        from .views import _recover_sc_docker_match
+
+        match = Match.objects.filter(id=self.match_id, status='Running').first()
+        if match is not None:
+            if self.is_aiarena:
+                result = aiarena_runner.collect_match_result(self.match_id)
+            else:
+                result = _recover_sc_docker_match(match)
+            if result is None:
+                return None  # still running
+        return RunResult(None, self.started_at, timezone.now())
+
+    def finish(self, run_result: RunResult | None) -> None:
+        pass
+
+
+def start() -> asyncio.AbstractEventLoop:
+    """Start the event loop thread (once per process) and return the loop."""
+    global _loop, _thread, _executor, _step_executor
+    with _lock:
+        if _loop is not None and _thread is not None and _thread.is_alive():
+            return _loop
+        _loop = asyncio.new_event_loop()
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='match-supervisor')
+        _loop.set_default_executor(_executor)
+        _step_executor = ThreadPoolExecutor(max_workers=MAX_STEP_WORKERS, thread_name_prefix='match-steps')
+        _thread = threading.Thread(target=_loop.run_forever, name='match-supervisor', daemon=True)
+        _thread.start()
+        asyncio.run_coroutine_threadsafe(_adopt_orphaned_matches(), _loop)
+        asyncio.run_coroutine_threadsafe(_release_reported_matches(), _loop)
+        logger.info('Match supervisor started')
+        return _loop
+
+
+def submit(job: MatchJob) -> None:
+    """Start supervising *job*.  Returns immediately."""
+    from . import match_queue
+
+    if job.match_id is not None:
+        match_queue.monitor_started(job.match_id)
+    loop = start()
+    with _jobs_lock:
+        _jobs[job.key] = job
+    asyncio.run_coroutine_threadsafe(_supervise(job), loop)
+
+
+def _job_list() -> list[MatchJob]:
+    with _jobs_lock:
+        return list(_jobs.values())
+
+
+def get_supervised_match_ids() -> set[int]:
+    """Return the ids of the matches the supervisor is watching."""
+    return {job.match_id for job in _job_list() if job.match_id is not None}
+
+
+def is_supervised(key: int | str) -> bool:
+    """Return True if the job with *key* is being watched in this process."""
+    with _jobs_lock:
+        return key in _jobs
+
+
+async def _supervise(job: MatchJob) -> None:
+    from . import match_queue
+
+    loop = asyncio.get_running_loop()
+    run_result: RunResult | None = None
+    try:
+        await loop.run_in_executor(_step_executor, job.start)
+        started_at = timezone.now()
+        deadline = loop.time() + job.timeout
+        while True:
+            run_result = await loop.run_in_executor(None, job.poll)
+            if run_result is not None:
+                break
+            if loop.time() >= deadline:
+                logger.warning('%s: timed out after %.0fs', job.label, job.timeout)
+                await loop.run_in_executor(_step_executor, job.stop)
+                run_result = RunResult(None, started_at, timezone.now(), timed_out=True)
+                break
+            await asyncio.sleep(POLL_INTERVAL)
+    except Exception:
+        logger.exception('%s: supervision failed', job.label)
+        run_result = None
+
+    try:
+        await loop.run_in_executor(_step_executor, job.finish, run_result)
+    except Exception:
+        logger.exception('%s: error recording the result', job.label)
+    finally:
+        with _jobs_lock:
+            _jobs.pop(job.key, None)
+        # Decrement the active count and start any queued matches.
+        if job.match_id is not None:
+            try:
+                await loop.run_in_executor(None, match_queue.notify_match_finished, job.match_id)
+            except Exception:
+                logger.exception('Match %d: error notifying queue after completion', job.match_id)
+
+
+def _find_finished_match_ids(match_ids: list[int]) -> list[int]:
+    from .models import Match
+    return list(Match.objects.filter(id__in=match_ids).exclude(status='Running').values_list('id', flat=True))
+
+
+async def _release_reported_matches() -> None:
+    """Free the slots of supervised matches whose result is already recorded."""
+    from . import match_queue
+
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        # Any error is logged and the next pass retries; the loop must not end.
+        try:
+            jobs = {job.match_id: job for job in _job_list() if job.match_id is not None and not job.released}
+            if not jobs:
+                continue
+            finished = await loop.run_in_executor(None, _find_finished_match_ids, list(jobs))
+            for match_id in finished:
+                job = jobs[match_id]
+                if job.released:
+                    continue
+                job.released = True
+                logger.info('Match %d: result recorded, releasing its slot before teardown', match_id)
+                await loop.run_in_executor(None, match_queue.notify_match_finished, match_id)
+        except Exception:
+            logger.exception('Could not release reported matches')
+
+
+def _find_orphaned_matches() -> list[tuple[int, bool, float]]:
+    """Return ``(match_id, is_aiarena, remaining_timeout)`` for unwatched running matches."""
+    from . import aiarena_runner, match_queue, scheduler
+    from .models import Match
+
+    if not scheduler.owns_queue():
+        return []
+    watched = match_queue.get_monitored_match_ids()
+    orphans = []
+    running = (
+        Match.objects
+        .filter(status='Running', batch_leader__isnull=True)
+        .exclude(id__in=watched)
+    )
+    for match in running:
+        is_aiarena = os.path.isdir(aiarena_runner.get_run_dir(match.id))
+        games = aiarena_runner._count_matches_in_file(aiarena_runner.get_run_dir(match.id)) if is_aiarena else 1
+        launched_at = match.launched_at or match.start_timestamp
+        remaining = MATCH_TIMEOUT * games - (timezone.now() - launched_at).total_seconds()
+        # Long-overdue matches are left to the periodic reconcile.
+        if remaining > 0:
+            orphans.append((match.id, is_aiarena, remaining))
+    return orphans
+
+
+async def _adopt_orphaned_matches() -> None:
+    from . import match_queue, prewarm
+
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, prewarm.reconcile_prewarms)
+    except Exception:
+        logger.exception('Could not finish orphaned prewarms')
+    try:
+        orphans = await loop.run_in_executor(None, _find_orphaned_matches)
+    except Exception:
+        logger.exception('Could not look for orphaned matches')
+        return
+    for match_id, is_aiarena, timeout in orphans:
+        job = _AdoptedMatchJob(match_id, is_aiarena, timeout)
+        with _jobs_lock:
+            if match_id in _jobs:
+                continue
+            _jobs[match_id] = job
+        logger.info('Match %d: adopting orphaned match', match_id)
+        match_queue.monitor_started(match_id)
+        loop.create_task(_supervise(job))
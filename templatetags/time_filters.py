@@ -23,3 +23,17 @@ def format_duration(seconds):
             return f"{minutes}:{secs:02d}"
     except (ValueError, TypeError):
         return "-"
+
+
+@register.filter
+def startup_time(phases):
+    """Seconds from launch to the bot's first step, from ``Match.phases`` (None if unknown)."""
+    from .. import match_phases
+    return match_phases.startup_seconds(phases)
+
+
+@register.filter
+def phase_summary(phases):
+    """Per-phase breakdown of ``Match.phases`` as one line."""
+    from .. import match_phases
+    return match_phases.summary(phases)
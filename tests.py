@@ -1,3 +1,602 @@
-from django.test import TestCase
+import json
+import math
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from . import early_stopping, match_queue, match_reuse, results_summary, views
+from .models import (
+    CustomBot, GroupOpponentSummary, Match, OpponentMapSummary, SystemConfig, TestGroup, TestSuite,
+)
+
+
+class LabTestCase(TestCase):
+    """Base for tests touching test_lab models, which live in their own database."""
+
+    databases = {'default', 'sc_bot_test_lab'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = CustomBot.objects.create(name='TestBot', race='Protoss', bot_directory='testbot')
+
+    def make_group(self, suite=None, **fields):
+        return TestGroup.objects.create(test_suite=suite, **fields)
+
+    def make_match(self, group, result='', status='Finished', **fields):
+        fields.setdefault('map_name', 'PersephoneAIE')
+        fields.setdefault('opponent_race', 'Zerg')
+        return Match.objects.create(
+            test_group=group, test_bot=self.bot, start_timestamp=timezone.now(),
+            result=result, status=status, **fields,
+        )
+
+
+class SprtTests(LabTestCase):
+
+    def setUp(self):
+        early_stopping._evaluated.clear()
+        # Baseline 0.5 and margin 0.1: each win adds log(1.5), each loss subtracts it.
+        self.suite = TestSuite.objects.create(
+            name='SPRT', early_stopping=True, sprt_target_win_rate=0.5,
+            sprt_margin=0.1, sprt_error_rate=0.05,
+        )
+
+    def test_sprt_bounds_are_symmetric(self):
+        lower, upper = early_stopping.sprt_bounds(0.05)
+        self.assertAlmostEqual(upper, math.log(19))
+        self.assertAlmostEqual(lower, -math.log(19))
+
+    def test_log_likelihood_ratio(self):
+        llr = early_stopping.log_likelihood_ratio([1.0, 1.0, 0.0, 0.5], 0.4, 0.6)
+        # Two wins and a loss cancel to one win; a tie scores zero.
+        self.assertAlmostEqual(llr, math.log(1.5))
+
+    def test_wins_decide_better(self):
+        group = self.make_group(self.suite)
+        for _ in range(8):
+            self.make_match(group, 'Victory')
+
+        self.assertEqual(early_stopping.evaluate_group(group), TestGroup.SprtResult.Better)
+        group.refresh_from_db()
+        self.assertEqual(group.sprt_result, TestGroup.SprtResult.Better)
+        self.assertAlmostEqual(group.sprt_llr, 8 * math.log(1.5))
+        self.assertEqual(group.sprt_baseline_win_rate, 0.5)
+
+    def test_losses_decide_worse(self):
+        group = self.make_group(self.suite)
+        for _ in range(8):
+            self.make_match(group, 'Defeat')
+
+        self.assertEqual(early_stopping.evaluate_group(group), TestGroup.SprtResult.Worse)
+
+    def test_mixed_results_stay_undecided(self):
+        group = self.make_group(self.suite)
+        for result in ('Victory', 'Defeat') * 4 + ('Tie', 'Crash'):
+            self.make_match(group, result)
+
+        self.assertEqual(early_stopping.evaluate_group(group), '')
+        group.refresh_from_db()
+        self.assertEqual(group.sprt_result, '')
+        self.assertAlmostEqual(group.sprt_llr, 0.0)
+
+    def test_too_few_games_stay_undecided(self):
+        group = self.make_group(self.suite)
+        for _ in range(7):
+            self.make_match(group, 'Victory')
+
+        self.assertEqual(early_stopping.evaluate_group(group), '')
+
+    def test_disabled_suite_is_not_evaluated(self):
+        self.suite.early_stopping = False
+        self.suite.save()
+        group = self.make_group(self.suite)
+        for _ in range(8):
+            self.make_match(group, 'Victory')
+
+        self.assertEqual(early_stopping.evaluate_group(group), '')
+        group.refresh_from_db()
+        self.assertIsNone(group.sprt_llr)
+
+    def test_previous_group_is_the_baseline(self):
+        self.suite.sprt_target_win_rate = None
+        self.suite.save()
+        previous = self.make_group(self.suite)
+        for result in ('Victory', 'Defeat', 'Defeat', 'Defeat', 'Defeat'):
+            self.make_match(previous, result)
+        group = self.make_group(self.suite)
+        self.make_match(group, 'Victory')
+
+        self.assertAlmostEqual(early_stopping.get_baseline_win_rate(group), 0.2)
+
+    def test_decision_cancels_queued_matches(self):
+        group = self.make_group(self.suite)
+        for _ in range(8):
+            self.make_match(group, 'Victory')
+        running = self.make_match(group, status='Running')
+        queued = [self.make_match(group, status='Queued') for _ in range(3)]
+
+        decided = early_stopping.evaluate_active_groups()
+
+        self.assertEqual(decided, {group.id: TestGroup.SprtResult.Better})
+        for match in queued:
+            match.refresh_from_db()
+            self.assertEqual((match.status, match.result), ('Cancelled', 'Cancelled'))
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'Running')
+
+    def test_unchanged_group_is_not_evaluated_again(self):
+        group = self.make_group(self.suite)
+        self.make_match(group, 'Victory')
+        self.make_match(group, status='Queued')
+
+        early_stopping.evaluate_active_groups()
+        group.refresh_from_db()
+        llr = group.sprt_llr
+        self.make_match(group, 'Victory')
+        early_stopping.evaluate_active_groups()
+        group.refresh_from_db()
+        self.assertEqual(group.sprt_llr, llr)
+
+        TestGroup.objects.filter(id=group.id).update(version=group.version + 1)
+        early_stopping.evaluate_active_groups()
+        group.refresh_from_db()
+        self.assertAlmostEqual(group.sprt_llr, 2 * math.log(1.5))
+
+
+class MatchReuseTests(LabTestCase):
+
+    def test_fingerprint_ignores_key_order(self):
+        self.assertEqual(
+            match_reuse.config_fingerprint('abc:def', race='zerg', build='rush', map='PersephoneAIE'),
+            match_reuse.config_fingerprint('abc:def', map='PersephoneAIE', build='rush', race='zerg'),
+        )
+
+    def test_fingerprint_covers_every_field(self):
+        fingerprint = match_reuse.config_fingerprint('abc:def', race='zerg', map='PersephoneAIE')
+        self.assertNotEqual(fingerprint, match_reuse.config_fingerprint('abc:def', race='zerg', map='TorchesAIE'))
+        self.assertNotEqual(fingerprint, match_reuse.config_fingerprint('abc:xyz', race='zerg', map='PersephoneAIE'))
+
+    def test_unpinned_configuration_has_no_fingerprint(self):
+        self.assertEqual(match_reuse.config_fingerprint(None, race='zerg'), '')
+        self.assertEqual(match_reuse.config_fingerprint('abc:def', race='zerg', opponent=None), '')
+
+    def test_reuse_copies_up_to_limit(self):
+        previous = self.make_group()
+        originals = [self.make_match(previous, 'Victory', config_fingerprint='fp') for _ in range(3)]
+        self.make_match(previous, 'Crash', config_fingerprint='fp')
+        self.make_match(previous, 'Defeat', config_fingerprint='other')
+        group = self.make_group()
+
+        self.assertEqual(match_reuse.reuse_results(['fp'], group.id, 2), 2)
+
+        copies = Match.objects.filter(test_group=group).order_by('reused_from_id')
+        # The most recent originals are used first.
+        self.assertEqual([m.reused_from_id for m in copies], [originals[1].id, originals[2].id])
+        for copy in copies:
+            self.assertEqual((copy.result, copy.config_fingerprint), ('Victory', 'fp'))
+
+    def test_copies_are_not_reused_again(self):
+        previous = self.make_group()
+        original = self.make_match(previous, 'Victory', config_fingerprint='fp')
+        match_reuse.reuse_results(['fp'], self.make_group().id, 5)
+        group = self.make_group()
+
+        self.assertEqual(match_reuse.reuse_results(['fp', ''], group.id, 5), 1)
+        self.assertEqual(Match.objects.get(test_group=group).reused_from_id, original.id)
+
+    def test_nothing_to_reuse(self):
+        group = self.make_group()
+        self.assertEqual(match_reuse.reuse_results([''], group.id, 5), 0)
+        self.assertEqual(match_reuse.reuse_results(['fp'], group.id, 0), 0)
+
+
+class StartTestSuiteReuseTests(LabTestCase):
+
+    def setUp(self):
+        self.suite = TestSuite.objects.create(
+            name='Reuse', include_blizzard_ai=True, map_name='PersephoneAIE',
+            reuse_results=True, target_samples_per_cell=2,
+        )
+        patcher = mock.patch.object(match_reuse, 'get_bot_state', return_value='abc:def')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_launch(self, race, build, difficulty, test_bot, test_group_id=-1, map_name='', **kwargs):
+        match = self.make_match(
+            TestGroup.objects.get(id=test_group_id), 'Pending', status='Queued',
+            opponent_race=race.capitalize(), opponent_build=build, map_name=map_name,
+        )
+        return match.id
+
+    def blizzard_fingerprint(self, race, build):
+        return match_reuse.config_fingerprint(
+            'abc:def', map='PersephoneAIE', kind='blizzard', race=race, build=build,
+            difficulty='CheatInsane', friendly_build='', friendly_race='',
+        )
+
+    def test_only_missing_samples_are_launched(self):
+        previous = self.make_group(self.suite)
+        fingerprint = self.blizzard_fingerprint('protoss', 'rush')
+        original = self.make_match(previous, 'Victory', config_fingerprint=fingerprint)
+
+        with mock.patch.object(views, 'start_blizzard_ai_match', side_effect=self.fake_launch) as launch:
+            group_id, count = views.start_test_suite('reuse', self.bot, test_suite=self.suite)
+
+        # 15 cells of 2 samples, one of which is reused.
+        self.assertEqual((count, launch.call_count), (29, 29))
+        cell = Match.objects.filter(test_group_id=group_id, config_fingerprint=fingerprint)
+        self.assertEqual(cell.count(), 2)
+        self.assertEqual(cell.filter(reused_from=original).count(), 1)
+        launched = Match.objects.filter(test_group_id=group_id, reused_from__isnull=True)
+        self.assertFalse(launched.filter(config_fingerprint='').exists())
+        self.assertEqual(
+            set(launched.filter(opponent_race='Terran', opponent_build='air').values_list('config_fingerprint', flat=True)),
+            {self.blizzard_fingerprint('terran', 'air')},
+        )
+
+    def test_suite_without_reuse_plays_every_sample(self):
+        self.suite.reuse_results = False
+        self.suite.save()
+        previous = self.make_group(self.suite)
+        self.make_match(previous, 'Victory', config_fingerprint=self.blizzard_fingerprint('protoss', 'rush'))
+
+        with mock.patch.object(views, 'start_blizzard_ai_match', side_effect=self.fake_launch):
+            group_id, count = views.start_test_suite('reuse', self.bot, test_suite=self.suite)
+
+        self.assertEqual(count, 30)
+        self.assertFalse(Match.objects.filter(test_group_id=group_id, reused_from__isnull=False).exists())
+
+
+class PickNextGroupTests(SimpleTestCase):
+
+    def queues(self, **oldest_ids):
+        return {int(group_id[1:]): [SimpleNamespace(id=match_id)] for group_id, match_id in oldest_ids.items()}
+
+    def test_interactive_goes_first(self):
+        priorities = {1: TestGroup.Priority.TICKET, 2: TestGroup.Priority.INTERACTIVE}
+        queues = self.queues(g1=1, g2=10)
+
+        self.assertEqual(match_queue._pick_next_group(queues, {2: 5}, priorities), 2)
+
+    def test_groups_share_by_weight(self):
+        priorities = {1: TestGroup.Priority.TICKET, 2: TestGroup.Priority.BACKFILL}
+        queues = self.queues(g1=1, g2=2)
+
+        # A ticket match weighs a third of a backfill one.
+        self.assertEqual(match_queue._pick_next_group(queues, {1: 2, 2: 1}, priorities), 1)
+        self.assertEqual(match_queue._pick_next_group(queues, {1: 3, 2: 0}, priorities), 2)
+
+    def test_ties_go_to_higher_class_then_oldest(self):
+        priorities = {1: TestGroup.Priority.BACKFILL, 2: TestGroup.Priority.TICKET, 3: TestGroup.Priority.TICKET}
+        queues = self.queues(g1=1, g2=5, g3=3)
+
+        self.assertEqual(match_queue._pick_next_group(queues, {}, priorities), 3)
+
+
+class MatchQueueTests(LabTestCase):
+
+    def setUp(self):
+        match_queue._queued_launchers.clear()
+        match_queue.sync_ledger()
+        self.addCleanup(match_queue._queued_launchers.clear)
+        self.addCleanup(match_queue.sync_ledger)
+        self.config = SystemConfig.load()
+        self.config.max_concurrent_custom_bots = 4
+        self.config.save()
+
+    def queue_match(self, group, started, **fields):
+        match = self.make_match(group, 'Queued', status='Queued', queued_at=timezone.now(), **fields)
+        match_queue._queued_launchers[match.id] = lambda: started.append(match.id)
+        return match
+
+    def test_drain_order(self):
+        started = []
+        ticket = self.make_group(priority=TestGroup.Priority.TICKET)
+        backfill = self.make_group(priority=TestGroup.Priority.BACKFILL)
+        interactive = self.make_group(priority=TestGroup.Priority.INTERACTIVE)
+        tickets = [self.queue_match(ticket, started) for _ in range(3)]
+        backfills = [self.queue_match(backfill, started) for _ in range(3)]
+        adhoc = self.queue_match(interactive, started)
+
+        self.assertEqual(match_queue.drain_queue(), 4)
+
+        self.assertEqual(started, [adhoc.id, tickets[0].id, backfills[0].id, tickets[1].id])
+        self.assertEqual(Match.objects.filter(status='Running').count(), 4)
+        self.assertEqual(match_queue.get_running_custom_bot_count(), 4)
+
+    def test_slots_count_custom_bot_matches_twice(self):
+        opponent = CustomBot.objects.create(name='Opponent', race='Zerg')
+        group = self.make_group()
+        self.make_match(group, 'Pending', status='Running', opponent_bot=opponent)
+        match_queue.sync_ledger()
+        blizzard = SimpleNamespace(opponent_bot_id=None, opponent_commit_hash='')
+        custom = SimpleNamespace(opponent_bot_id=opponent.id, opponent_commit_hash='')
+
+        capacity = match_queue._Capacity()
+        self.assertEqual(capacity.slots_used, 2)
+        self.assertTrue(capacity.fits(custom))
+        capacity.add(blizzard)
+        self.assertFalse(capacity.fits(custom))
+        self.assertTrue(capacity.fits(blizzard))
+        capacity.add(blizzard)
+        self.assertFalse(capacity.fits())
+
+    def test_ledger_is_not_reloaded_per_check(self):
+        group = self.make_group()
+        running = self.make_match(group, 'Pending', status='Running')
+
+        self.assertEqual(match_queue._Capacity().slots_used, 0)
+        match_queue.sync_ledger()
+        self.assertEqual(match_queue._Capacity().slots_used, 1)
+        match_queue._ledger_remove(running.id)
+        self.assertEqual(match_queue._Capacity().slots_used, 0)
+
+    def test_footprints_pack_against_host(self):
+        self.config.resource_aware_scheduling = True
+        self.config.host_cpu_cores = 4
+        self.config.host_memory_mb = 10000
+        self.config.save()
+        group = self.make_group()
+        self.make_match(group, 'Victory', peak_cpu_cores=1.5, peak_memory_mb=2000)
+        self.make_match(group, 'Pending', status='Running')
+        match_queue.sync_ledger()
+        queued = self.make_match(group, 'Queued', status='Queued')
+
+        # 3.6 cores after headroom: room for one more 1.5-core match, not two.
+        capacity = match_queue._Capacity()
+        self.assertAlmostEqual(capacity.footprint_used.cpu_cores, 1.5)
+        self.assertTrue(capacity.fits(queued))
+        capacity.add(queued)
+        self.assertFalse(capacity.fits(queued))
+
+    def test_oversized_match_starts_when_idle(self):
+        self.config.resource_aware_scheduling = True
+        self.config.host_cpu_cores = 1
+        self.config.host_memory_mb = 1000
+        self.config.save()
+        group = self.make_group()
+        self.make_match(group, 'Victory', peak_cpu_cores=3.0, peak_memory_mb=4000)
+        queued = self.make_match(group, 'Queued', status='Queued')
+
+        capacity = match_queue._Capacity()
+        self.assertTrue(capacity.fits(queued))
+        capacity.add(queued)
+        self.assertFalse(capacity.fits(queued))
+
+
+class ScDockerResultTests(SimpleTestCase):
+
+    LOG = (
+        b'Starting game\n' + b'step\n' * 50
+        + b'MATCH_RESULT:Victory\nMATCH_DURATION:754\nBOT_RACE:Zerg\n'
+    )
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.logs_dir = tmp.name
+        patcher = mock.patch.object(views, '_get_logs_dir', return_value=self.logs_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_log(self, content: bytes) -> str:
+        path = os.path.join(self.logs_dir, '7_match.log')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_result_lines_split_across_blocks(self):
+        path = self.write_log(self.LOG)
+        # Every block size puts a block boundary somewhere else, including inside the result line.
+        for block in range(1, len(self.LOG) + 2):
+            with self.subTest(block=block), mock.patch.object(views, '_LOG_TAIL_BLOCK', block):
+                self.assertEqual(
+                    views._scan_sc_docker_log(path),
+                    {'result': 'Victory', 'duration': 754, 'bot_race': 'Zerg'},
+                )
+
+    def test_result_is_last_result_line(self):
+        path = self.write_log(b'MATCH_RESULT:Defeat\n' + self.LOG)
+        with mock.patch.object(views, '_LOG_TAIL_BLOCK', 8):
+            self.assertEqual(views._scan_sc_docker_log(path)['result'], 'Victory')
+
+    def test_log_without_result(self):
+        path = self.write_log(b'Starting game\n' + b'step\n' * 50 + b'Traceback: crash')
+        with mock.patch.object(views, '_LOG_TAIL_BLOCK', 16):
+            self.assertEqual(
+                views._scan_sc_docker_log(path),
+                {'result': None, 'duration': None, 'bot_race': ''},
+            )
+
+    def test_missing_log(self):
+        record = views._scan_sc_docker_log(os.path.join(self.logs_dir, 'missing.log'))
+        self.assertIsNone(record['result'])
+
+    def test_sidecar_wins_over_log(self):
+        path = self.write_log(self.LOG)
+        sidecar = {'result': 'Defeat', 'duration': 90, 'bot_race': 'Terran', 'game_loop': 2016}
+        with open(os.path.join(self.logs_dir, '7_result.json'), 'w', encoding='utf-8') as f:
+            json.dump(sidecar, f)
+
+        self.assertEqual(views._read_sc_docker_result(7, path), sidecar)
+
+    def test_sidecar_without_result_falls_back_to_log(self):
+        path = self.write_log(self.LOG)
+        with open(os.path.join(self.logs_dir, '7_result.json'), 'w', encoding='utf-8') as f:
+            f.write('{"result": null')
+
+        self.assertEqual(views._read_sc_docker_result(7, path)['result'], 'Victory')
+
+
+class ResultsSummaryTests(LabTestCase):
+
+    def summary_match(self, match_id, result, duration=None, map_name='PersephoneAIE', reused_from_id=None):
+        return {
+            'id': match_id, 'test_bot_id': 1, 'opponent_bot_id': None, 'opponent_build': 'rush',
+            'opponent_commit_hash': '', 'replay_test_id': None, 'opponent_race': 'Zerg',
+            'opponent_difficulty': 'CheatInsane', 'map_name': map_name, 'result': result,
+            'duration_in_game_time': duration, 'reused_from_id': reused_from_id,
+        }
+
+    def test_summarize_counts_decided_games(self):
+        cells, _ = results_summary.summarize([
+            self.summary_match(1, 'Victory', 300),
+            self.summary_match(2, 'Defeat', 400),
+            self.summary_match(3, 'Tie', 500),
+            self.summary_match(4, 'Crash'),
+            self.summary_match(5, 'Victory', 300, reused_from_id=1),
+        ])
+
+        self.assertEqual(len(cells), 1)
+        cell = cells[0]
+        self.assertEqual((cell['opponent_key'], cell['kind']), ('Zerg-rush', 'Computer'))
+        self.assertEqual((cell['earliest_match_id'], cell['match_id']), (1, 5))
+        # The reused copy, the tie and the crash are left out.
+        self.assertEqual((cell['victories'], cell['total_games']), (1, 2))
+
+    def test_summarize_marks_fastest_victory_and_slowest_loss_per_map(self):
+        _, maps = results_summary.summarize([
+            self.summary_match(1, 'Victory', 300),
+            self.summary_match(2, 'Victory', 200),
+            self.summary_match(3, 'Victory', 100, reused_from_id=9),
+            self.summary_match(4, 'Defeat', 400),
+            self.summary_match(5, 'Defeat', 600),
+            self.summary_match(6, 'Victory', 900, map_name='TorchesAIE'),
+            self.summary_match(7, 'Victory', 0, map_name='TorchesAIE'),
+        ])
+
+        rows = {row['map_name']: row for row in maps}
+        persephone = rows['PersephoneAIE']
+        self.assertEqual((persephone['fastest_victory'], persephone['fastest_victory_match_id']), (200, 2))
+        self.assertEqual((persephone['slowest_loss'], persephone['slowest_loss_match_id']), (600, 5))
+        torches = rows['TorchesAIE']
+        self.assertEqual((torches['fastest_victory'], torches['fastest_victory_match_id']), (900, 6))
+        self.assertNotIn('slowest_loss', torches)
+
+    def test_refresh_writes_rows_and_bumps_version(self):
+        group = self.make_group()
+        self.make_match(group, 'Victory', opponent_build='rush', duration_in_game_time=300)
+        loss = self.make_match(group, 'Defeat', opponent_build='rush', duration_in_game_time=400)
+
+        results_summary.refresh_groups([group.id])
+
+        summary = GroupOpponentSummary.objects.get(test_group=group)
+        self.assertEqual((summary.match_id, summary.victories, summary.total_games), (loss.id, 1, 2))
+        self.assertEqual(OpponentMapSummary.objects.get(test_group=group).slowest_loss_match_id, loss.id)
+        group.refresh_from_db()
+        self.assertEqual(group.version, 1)
+
+        loss.delete()
+        results_summary.refresh_groups([group.id])
+        self.assertEqual(GroupOpponentSummary.objects.get(test_group=group).total_games, 1)
+        self.assertFalse(OpponentMapSummary.objects.filter(slowest_loss__isnull=False).exists())
+        group.refresh_from_db()
+        self.assertEqual(group.version, 2)
+
+    def test_touch_bumps_version_only(self):
+        group = self.make_group()
+        self.make_match(group, 'Victory')
+
+        results_summary.touch_groups([group.id])
+
+        group.refresh_from_db()
+        self.assertEqual(group.version, 1)
+        self.assertFalse(GroupOpponentSummary.objects.filter(test_group=group).exists())
+
+    def test_deferred_refresh_recomputes_each_group_once(self):
+        first, second = self.make_group(), self.make_group()
+        with mock.patch.object(results_summary, '_refresh_group', wraps=results_summary._refresh_group) as refresh:
+            with results_summary.deferred_refresh():
+                for _ in range(3):
+                    results_summary.refresh_groups([first.id])
+                with results_summary.deferred_refresh():
+                    results_summary.refresh_groups([first.id, second.id])
+                self.assertEqual(refresh.call_count, 0)
+
+        self.assertEqual(sorted(call.args[0] for call in refresh.call_args_list), [first.id, second.id])
+        first.refresh_from_db()
+        self.assertEqual(first.version, 1)
+
+
+class ReadApiTests(LabTestCase):
+
+    def setUp(self):
+        self.group = self.make_group(branch='main')
+        self.matches = [self.make_match(self.group, 'Victory') for _ in range(5)]
+        self.url = reverse('api_matches')
+
+    def assertBadRequest(self, response, message):
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(message, response.json()['message'])
+
+    def test_cursor_pages_through_all_matches(self):
+        ids = []
+        url = f'{self.url}?limit=2&fields=id'
+        pages = 0
+        while url:
+            page = self.client.get(url).json()
+            ids += [row['id'] for row in page['results']]
+            url = page['next']
+            pages += 1
+            if pages == 1:
+                # Rows added meanwhile don't shift the following pages.
+                self.make_match(self.group, 'Defeat')
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, [m.id for m in reversed(self.matches)])
+
+    def test_last_page_has_no_cursor(self):
+        page = self.client.get(f'{self.url}?limit=5').json()
+        self.assertEqual(len(page['results']), 5)
+        self.assertIsNone(page['next_cursor'])
+        self.assertIsNone(page['next'])
+
+    def test_fields_select_keys(self):
+        page = self.client.get(f'{self.url}?fields=result,status&limit=1').json()
+        self.assertEqual(page['results'], [{'result': 'Victory', 'status': 'Finished'}])
+
+        group = self.client.get(reverse('api_test_group_detail', args=[self.group.id]) + '?fields=id,done,priority')
+        self.assertEqual(group.json(), {'id': self.group.id, 'done': True, 'priority': 'ticket'})
+
+    def test_unknown_field(self):
+        self.assertBadRequest(self.client.get(f'{self.url}?fields=id,nope'), 'Unknown field(s) nope')
+        self.assertBadRequest(self.client.get(f"{reverse('api_test_groups')}?fields=nope"), 'Unknown field(s) nope')
+
+    def test_bad_parameters(self):
+        for limit in ('0', '-1', 'abc', '1001'):
+            with self.subTest(limit=limit):
+                self.assertBadRequest(self.client.get(f'{self.url}?limit={limit}'), 'limit must be between')
+        for cursor in ('zz!', 'YWJj'):
+            with self.subTest(cursor=cursor):
+                self.assertBadRequest(self.client.get(f'{self.url}?cursor={cursor}'), 'Invalid cursor')
+        self.assertBadRequest(self.client.get(f'{self.url}?status=Bogus'), 'status must be one of')
+        self.assertBadRequest(self.client.get(f'{self.url}?test_group=x'), 'test_group must be an id')
+
+    def test_status_filter(self):
+        queued = self.make_match(self.group, 'Queued', status='Queued')
+        page = self.client.get(f'{self.url}?status=Queued&fields=id').json()
+        self.assertEqual(page['results'], [{'id': queued.id}])
+
+    def test_etag_revalidation(self):
+        url = f'{self.url}?test_group={self.group.id}'
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        match_queue._set_batch_status(self.matches[0].id, 'Running')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_a_match_is_deleted(self):
+        url = reverse('api_test_group_detail', args=[self.group.id])
+        etag = self.client.get(url)['ETag']
+
+        self.matches[-1].delete()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -53,6 +53,12 @@ urlpatterns = [
     # API
     path('api/trigger-tests/', views.api_trigger_tests, name='api_trigger_tests'),
     path('api/trigger-ticket-tests/', views.api_trigger_ticket_tests, name='api_trigger_ticket_tests'),
+    path('api/match-complete/', views.api_match_complete, name='api_match_complete'),
+    path('api/test-groups/', views.api_test_groups, name='api_test_groups'),
+    path('api/test-groups/<int:test_group_id>/', views.api_test_group_detail, name='api_test_group_detail'),
+    path('api/test-groups/<int:test_group_id>/opponents/', views.api_test_group_opponents, name='api_test_group_opponents'),
+    path('api/test-groups/<int:test_group_id>/maps/', views.api_test_group_maps, name='api_test_group_maps'),
+    path('api/matches/', views.api_matches, name='api_matches'),
 
     # Tickets
     path('tickets/', views.tickets_page, name='tickets'),
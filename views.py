@@ -1,28 +1,36 @@
 import glob
+import hashlib
 import logging
 import os
 import random
 import subprocess
-import threading
 import tkinter as tk
 from collections import defaultdict
 from datetime import datetime
 from tkinter import filedialog
 
 from django.contrib import messages
-from django.db.models import Count, Max, Min, Q
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_GET, require_POST
 
-from . import aiarena_runner, bot_versions, match_queue, prompt_generator, worktrees
+from . import aiarena_runner, bot_versions, container_backend, match_phases, match_queue, match_reuse, prewarm, prompt_generator, results_summary, scheduler, supersede, supervisor, worktrees
 from .models import (
     CustomBot,
+    GroupOpponentSummary,
     Match,
     MatchEvent,
+    OpponentMapSummary,
     PromptTemplate,
     ReplayTest,
     SystemConfig,
@@ -33,30 +41,17 @@ from .models import (
 
 logger = logging.getLogger('test_lab')
 
+# Seconds a rendered Test Groups row of a finished test group stays cached.
+# Rows are keyed by TestGroup.version, so this only bounds how long a
+# renamed test bot keeps its old name there.
+RESULTS_ROW_CACHE_TIMEOUT = 24 * 60 * 60
 
 def _get_match_list_context(request):
     """Return context dict for the Test Groups tab."""
-    # Recover any stale pending matches whose docker process has finished
-    # but whose monitoring thread was killed (e.g. by a dev-server reload).
-    try:
-        recovered = aiarena_runner.check_stale_pending_matches()
-        if recovered:
-            logger.info('Recovered %d stale aiarena match(es): %s', len(recovered), recovered)
-    except Exception:
-        logger.exception('Error checking stale pending aiarena matches')
-
-    try:
-        sc_docker_recovered = _recover_stale_sc_docker_matches()
-        if sc_docker_recovered:
-            logger.info('Recovered %d stale single-container match(es): %s', len(sc_docker_recovered), sc_docker_recovered)
-    except Exception:
-        logger.exception('Error checking stale pending single-container matches')
-
-    # Start any queued matches that now have capacity.
-    try:
-        match_queue.drain_queue()
-    except Exception:
-        logger.exception('Error draining match queue')
+    # The scheduler daemon normally reconciles stale matches and drains
+    # the queue.  Without one, do it here so queued matches still start.
+    if not scheduler.is_scheduler_running():
+        scheduler.tick()
 
     # Get filters from request
     selected_test_bot = request.GET.get('test_bot', '')
@@ -67,112 +62,139 @@ def _get_match_list_context(request):
     selected_limit = request.GET.get('limit', '10')
     selected_branch = request.GET.get('branch', '')
 
-    matches = Match.objects.select_related('opponent_bot', 'test_group', 'test_bot', 'replay_test').exclude(test_group_id=-1)
+    # The cells come precomputed from the results summary tables
+    # (results_summary.py); only the matches shown are loaded.
+    summary_q = Q()
 
     # Apply test bot filter
     if selected_test_bot and selected_test_bot.isdigit():
-        matches = matches.filter(test_bot_id=int(selected_test_bot))
+        summary_q &= Q(test_bot_id=int(selected_test_bot))
 
-    # Apply branch filter — only include matches from test groups on this branch
+    # Apply branch filter — only include cells of test groups on this branch
     if selected_branch:
-        branch_group_ids = list(
-            TestGroup.objects.filter(branch=selected_branch).values_list('id', flat=True)
-        )
-        matches = matches.filter(test_group_id__in=branch_group_ids)
+        summary_q &= Q(test_group__branch=selected_branch)
 
     # Build inclusive match-type filter from blizzard/custom/past/replay controls.
-    # Each enabled type adds an OR clause; matches not matching any are excluded.
+    # Each enabled type adds an OR clause; cells not matching any are excluded.
     type_q = Q()
-    is_blizzard_q = Q(opponent_bot__isnull=True, opponent_commit_hash='', replay_test__isnull=True)
 
     if selected_blizzard == 'None':
         pass  # Don't include any blizzard AI matches
     elif selected_blizzard and selected_blizzard != 'All':
-        type_q |= is_blizzard_q & Q(opponent_difficulty=selected_blizzard)
+        type_q |= Q(kind='Computer', opponent_difficulty=selected_blizzard)
     else:
-        type_q |= is_blizzard_q
+        type_q |= Q(kind='Computer')
 
     if show_custom_bots:
-        type_q |= Q(opponent_bot__isnull=False)
+        type_q |= Q(kind='CustomBot')
     if show_past_versions:
-        type_q |= ~Q(opponent_commit_hash='')
+        type_q |= Q(kind='PastVersion')
     if show_replays:
-        type_q |= Q(replay_test__isnull=False)
+        type_q |= Q(kind='Replay')
 
-    matches = matches.filter(type_q)
+    summary_q &= type_q
+    summaries = GroupOpponentSummary.objects.exclude(test_group_id=-1).filter(summary_q)
 
-    # Apply test group limit — only include matches from the N most recent
-    # test groups that contain at least one match after the above filters.
+    # Apply test group limit — only include cells from the N most recent
+    # test groups that contain at least one cell after the above filters.
     if selected_limit and selected_limit.isdigit():
         recent_group_ids = list(
-            matches.values_list('test_group_id', flat=True)
+            summaries.values_list('test_group_id', flat=True)
             .distinct()
             .order_by('-test_group_id')[:int(selected_limit)]
         )
-        matches = matches.filter(test_group_id__in=recent_group_ids)
+        summaries = summaries.filter(test_group_id__in=recent_group_ids)
 
     # ------------------------------------------------------------------
-    # Group matches by test_group_id and create pivot structure
+    # Pick the match shown in each cell and sum the opponent win rates
     # ------------------------------------------------------------------
-    grouped_matches: dict[int, dict[str, Match]] = defaultdict(dict)
-    race_groups: dict[str, list[str]] = defaultdict(list)  # race -> builds
-    custom_bot_opponents: dict[str, tuple[CustomBot, str]] = {}  # "bot_id_build" -> (CustomBot, build)
-    version_opponents: dict[str, str] = {}  # short_hash -> opponent_key
-    version_ordering: dict[str, tuple[int, int]] = {}  # short_hash -> (max_test_group_id, match_id)
-    replay_test_opponents: dict[int, str] = {}  # replay_test_id -> name
-
     # Track win/loss counts for each opponent column
     opponent_stats: dict[str, dict] = defaultdict(lambda: {'victories': 0, 'total_games': 0})
+    version_ordering: dict[str, tuple[int, int]] = {}  # short_hash -> (max_test_group_id, match_id)
+    cell_match_ids: dict[tuple[int, str], int] = {}  # (test_group_id, opponent_key) -> match_id
+    cell_first_ids: dict[tuple[int, str], int] = {}  # (test_group_id, opponent_key) -> earliest match_id
+    opponent_kinds: dict[str, str] = {}  # opponent_key -> GroupOpponentSummary.Kind
 
-    # Track fastest victories / slowest losses per combination
-    fastest_victories: dict[tuple, tuple[int, int]] = {}
-    slowest_losses: dict[tuple, tuple[int, int]] = {}
-
-    for match in matches:
-        opp_bot = match.opponent_bot
-        if match.replay_test:
-            # Replay test match — key by replay test id
-            opponent_key = f"replay_{match.replay_test.id}"
-            replay_test_opponents[match.replay_test.id] = match.replay_test.name
-        elif match.opponent_commit_hash:
-            # Past-version opponent — key by short hash
-            short_hash = match.opponent_commit_hash[:7]
-            opponent_key = f"version_{short_hash}"
-            version_opponents[short_hash] = opponent_key
+    for cell in summaries.values(
+        'test_group_id', 'opponent_key', 'kind', 'match_id', 'earliest_match_id', 'victories', 'total_games',
+    ):
+        group_id, opponent_key = cell['test_group_id'], cell['opponent_key']
+        opponent_kinds[opponent_key] = cell['kind']
+        # Cells of several difficulties or test bots show the most recent match.
+        key = (group_id, opponent_key)
+        cell_match_ids[key] = max(cell['match_id'], cell_match_ids.get(key, 0))
+        cell_first_ids[key] = min(cell['earliest_match_id'], cell_first_ids.get(key, cell['earliest_match_id']))
+        opponent_stats[opponent_key]['victories'] += cell['victories']
+        opponent_stats[opponent_key]['total_games'] += cell['total_games']
+        if opponent_key.startswith('version_'):
             # Track ordering: prefer highest test_group_id, then lowest match_id
             # (lower offset = more recent commit = created first in a group)
-            group_id = match.test_group.id
+            short_hash = opponent_key[len('version_'):]
             prev = version_ordering.get(short_hash)
-            if prev is None or group_id > prev[0] or (group_id == prev[0] and match.id < prev[1]):
-                version_ordering[short_hash] = (group_id, match.id)
-        elif opp_bot is not None:
-            # Custom bot opponent — key by bot id + build
-            opponent_key = f"bot_{opp_bot.id}_{match.opponent_build}"
-            custom_bot_opponents[opponent_key] = (opp_bot, match.opponent_build)
-        else:
-            # Computer opponent — key by race-build
-            opponent_key = f"{match.opponent_race}-{match.opponent_build}"
-            race_groups[match.opponent_race].append(match.opponent_build)
-
-        grouped_matches[match.test_group.id][opponent_key] = match
-
-        if match.result in ('Victory', 'Defeat'):
-            opponent_stats[opponent_key]['total_games'] += 1
-            if match.result == 'Victory':
-                opponent_stats[opponent_key]['victories'] += 1
-                if match.duration_in_game_time and match.duration_in_game_time > 0:
-                    key = (opponent_key, match.opponent_difficulty, match.map_name)
-                    if key not in fastest_victories or match.duration_in_game_time < fastest_victories[key][0]:
-                        fastest_victories[key] = (match.duration_in_game_time, match.id)
-            else:
-                if match.duration_in_game_time and match.duration_in_game_time > 0:
-                    key = (opponent_key, match.opponent_difficulty, match.map_name)
-                    if key not in slowest_losses or match.duration_in_game_time > slowest_losses[key][0]:
-                        slowest_losses[key] = (match.duration_in_game_time, match.id)
+            match_id = cell['earliest_match_id']
+            if prev is None or group_id > prev[0] or (group_id == prev[0] and match_id < prev[1]):
+                version_ordering[short_hash] = (group_id, match_id)
+
+    sorted_groups = sorted({group_id for group_id, _ in cell_match_ids}, reverse=True)
+
+    # Fastest victories / slowest losses per (opponent, difficulty, map)
+    fastest_victories: dict[tuple, tuple[int, int]] = {}
+    slowest_losses: dict[tuple, tuple[int, int]] = {}
+    map_summaries = OpponentMapSummary.objects.filter(
+        summary_q, test_group_id__in=sorted_groups,
+    ).values(
+        'opponent_key', 'opponent_difficulty', 'map_name',
+        'fastest_victory', 'fastest_victory_match_id', 'slowest_loss', 'slowest_loss_match_id',
+    )
+    for row in map_summaries:
+        key = (row['opponent_key'], row['opponent_difficulty'], row['map_name'])
+        if row['fastest_victory'] is not None:
+            best = (row['fastest_victory'], row['fastest_victory_match_id'] or 0)
+            if key not in fastest_victories or best < fastest_victories[key]:
+                fastest_victories[key] = best
+        if row['slowest_loss'] is not None:
+            worst = (row['slowest_loss'], row['slowest_loss_match_id'] or 0)
+            prev = slowest_losses.get(key)
+            if prev is None or (-worst[0], worst[1]) < (-prev[0], prev[1]):
+                slowest_losses[key] = worst
 
     best_time_match_ids = {mid for _, mid in fastest_victories.values()}
     best_time_match_ids.update(mid for _, mid in slowest_losses.values())
 
+    # ------------------------------------------------------------------
+    # Collect the opponent columns from the cells' opponent keys
+    # ------------------------------------------------------------------
+    # (not from the matches, which are only loaded for rows that aren't cached)
+    race_groups: dict[str, list[str]] = defaultdict(list)  # race -> builds
+    custom_bot_opponents: dict[str, tuple[CustomBot, str]] = {}  # "bot_id_build" -> (CustomBot, build)
+    version_opponents: dict[str, str] = {}  # short_hash -> opponent_key
+    replay_test_opponents: dict[int, str] = {}  # replay_test_id -> name
+
+    opponent_bots = CustomBot.objects.in_bulk({
+        int(key.split('_')[1]) for key, kind in opponent_kinds.items() if kind == 'CustomBot'
+    })
+    replay_test_names = dict(ReplayTest.objects.filter(id__in={
+        int(key[len('replay_'):]) for key, kind in opponent_kinds.items() if kind == 'Replay'
+    }).values_list('id', 'name'))
+    for opponent_key, kind in opponent_kinds.items():
+        if kind == 'Replay':
+            # Replay test match — keyed by replay test id
+            replay_test_id = int(opponent_key[len('replay_'):])
+            if replay_test_id in replay_test_names:
+                replay_test_opponents[replay_test_id] = replay_test_names[replay_test_id]
+        elif kind == 'PastVersion':
+            # Past-version opponent — keyed by short hash
+            version_opponents[opponent_key[len('version_'):]] = opponent_key
+        elif kind == 'CustomBot':
+            # Custom bot opponent — keyed by bot id + build
+            bot_id, build = opponent_key[len('bot_'):].split('_', 1)
+            if int(bot_id) in opponent_bots:
+                custom_bot_opponents[opponent_key] = (opponent_bots[int(bot_id)], build)
+        else:
+            # Computer opponent — keyed by race-build
+            race, build = opponent_key.split('-', 1)
+            race_groups[race].append(build)
+
     # ------------------------------------------------------------------
     # Build sorted opponent columns and header structure
     # ------------------------------------------------------------------
@@ -322,13 +344,70 @@ def _get_match_list_context(request):
     # ------------------------------------------------------------------
     # Build pivot rows
     # ------------------------------------------------------------------
-    sorted_groups = sorted(grouped_matches.keys(), reverse=True)
-    test_groups = {tg.id: tg.description for tg in TestGroup.objects.filter(id__in=sorted_groups)}
+    group_info = {
+        tg['id']: tg for tg in TestGroup.objects.filter(id__in=sorted_groups).values(
+            'id', 'description', 'sprt_result', 'sprt_llr', 'sprt_baseline_win_rate',
+            'superseded_by_id', 'version',
+        )
+    }
+    test_groups = {group_id: tg['description'] for group_id, tg in group_info.items()}
     max_group_id = max(sorted_groups) if sorted_groups else -1
 
+    # The row of a group without queued or running matches only changes
+    # when its version is bumped (results_summary.refresh_groups), so it
+    # is rendered once and cached under the version, its cells, the
+    # columns and the star markers.
+    live_group_ids = set(
+        Match.objects.filter(test_group_id__in=sorted_groups, status__in=('Queued', 'Running'))
+        .values_list('test_group_id', flat=True).distinct()
+    )
+    row_cells: dict[int, list[tuple[str, int]]] = defaultdict(list)  # test_group_id -> (opponent_key, match_id)
+    for (group_id, opponent_key), match_id in sorted(cell_match_ids.items()):
+        row_cells[group_id].append((opponent_key, match_id))
+    row_cache_keys: dict[int, str] = {}
+    for group_id in sorted_groups:
+        if group_id in live_group_ids or group_id not in group_info:
+            continue
+        best_ids = [match_id for _, match_id in row_cells[group_id] if match_id in best_time_match_ids]
+        digest = hashlib.sha256(
+            repr((group_info[group_id], row_cells[group_id], best_ids, sorted_opponents)).encode()
+        ).hexdigest()
+        row_cache_keys[group_id] = f"test_lab:results_row:{group_id}:{group_info[group_id]['version']}:{digest}"
+    cached_rows = cache.get_many(list(row_cache_keys.values()))
+
+    # Load the matches shown in the rows that have to be rendered.
+    # Columns are added in the order their first match was played.
+    uncached_groups = {group_id for group_id in sorted_groups if row_cache_keys.get(group_id) not in cached_rows}
+    first_ids = {
+        cell_match_ids[key]: first_id for key, first_id in cell_first_ids.items() if key[0] in uncached_groups
+    }
+    cell_keys = {match_id: opponent_key for (_, opponent_key), match_id in cell_match_ids.items()}
+    grouped_matches: dict[int, dict[str, Match]] = defaultdict(dict)
+    phases_by_group: dict[int, list] = defaultdict(list)  # for the startup trend column
+    matches = Match.objects.filter(id__in=list(first_ids)).select_related(
+        'opponent_bot', 'test_group', 'test_bot', 'replay_test',
+    )
+    for match in sorted(matches, key=lambda m: first_ids[m.id]):
+        phases_by_group[match.test_group_id].append(match.phases)
+        grouped_matches[match.test_group_id][cell_keys[match.id]] = match
+    phase_trends = match_phases.group_trends(phases_by_group)
+
     pivot_data = []
+    rows_to_cache = {}
     for group_id in sorted_groups:
+        cache_key = row_cache_keys.get(group_id)
+        if cache_key in cached_rows:
+            pivot_data.append({'test_group_id': group_id, 'html': cached_rows[cache_key]})
+            continue
+
         row = {'test_group_id': group_id, 'results': [], 'difficulty': None, 'test_bot_name': ''}
+        row['startup'] = phase_trends[group_id]['startup']
+        row['phase_summary'] = phase_trends[group_id]['summary']
+        if group_id in group_info:
+            row['sprt_result'] = group_info[group_id]['sprt_result']
+            row['sprt_llr'] = group_info[group_id]['sprt_llr']
+            row['sprt_baseline_win_rate'] = group_info[group_id]['sprt_baseline_win_rate']
+            row['superseded_by_id'] = group_info[group_id]['superseded_by_id']
 
         # Get difficulty and test bot from first match in this group
         for m in grouped_matches[group_id].values():
@@ -350,7 +429,7 @@ def _get_match_list_context(request):
                 row['results'].append(None)
                 continue
 
-            if group_id != max_group_id and match_data.result in ('Pending', 'Queued'):
+            if group_id != max_group_id and match_data.status in ('Queued', 'Running'):
                 match_data.result = 'Aborted'
 
             match_data.is_best_time = match_data.id in best_time_match_ids
@@ -378,7 +457,11 @@ def _get_match_list_context(request):
         else:
             row['avg_duration'] = None
 
+        row['html'] = render_to_string('test_lab/results_row.html', {'row': row, 'test_groups': test_groups})
+        if cache_key:
+            rows_to_cache[cache_key] = row['html']
         pivot_data.append(row)
+    cache.set_many(rows_to_cache, RESULTS_ROW_CACHE_TIMEOUT)
 
     # ------------------------------------------------------------------
     # Context
@@ -440,6 +523,7 @@ def get_least_used_map(
             opponent_difficulty=opponent_difficulty,
             result__in=['Victory', 'Defeat'],
             test_group_id__gte=0,
+            reused_from__isnull=True,
         )
         .order_by('-id')
         .values_list('id', flat=True)[:15]
@@ -510,10 +594,13 @@ def _write_sc_docker_env() -> None:
     Writes to both the legacy single-container path and the aiarena
     vs-computer path so either compose file can resolve variables.
     """
+    from . import image_cache
     config = SystemConfig.load()
+    vs_computer_image = image_cache.use_image('aiarena/Dockerfile.vs_computer', DOCKER_COMPOSE_PATH)
     env_content = (
         f'SC2_MAPS_PATH={config.sc2_maps_path}\n'
         f'REPLAYS_DIR={BLIZZARD_AI_RUNS_DIR}\n'
+        f'VS_COMPUTER_IMAGE={vs_computer_image}\n'
     )
     for directory in (DOCKER_COMPOSE_PATH, AIARENA_COMPOSE_PATH):
         env_path = os.path.join(directory, '.env')
@@ -560,6 +647,26 @@ def _bot_identity_args(
     return args
 
 
+def _match_report_token(match_id: int) -> str:
+    """Return the token a match's runner sends with its completion report."""
+    return salted_hmac('test_lab.match_report', str(match_id)).hexdigest()
+
+
+def _match_report_args(match_id: int) -> list[str]:
+    """Return ``['-e', 'K=V', ...]`` flags telling the runner where to report its result.
+
+    Empty when ``SystemConfig.match_report_url`` is blank; the result is
+    then only read from the container log.
+    """
+    url = SystemConfig.load().match_report_url
+    if not url:
+        return []
+    return [
+        '-e', f'MATCH_REPORT_URL={url}',
+        '-e', f'MATCH_REPORT_TOKEN={_match_report_token(match_id)}',
+    ]
+
+
 def _bot_volume_args(
     test_bot: CustomBot, source_override: str | None = None,
 ) -> list[str]:
@@ -623,136 +730,205 @@ def _bot_volume_args(
     return args
 
 
-def _parse_sc_docker_result(log_file_path: str) -> str | None:
-    """Parse the match result from a single-container Docker log file.
+# Bytes read per step when scanning a container log backwards.
+_LOG_TAIL_BLOCK = 64 * 1024
 
-    Looks for a ``MATCH_RESULT:<result>`` line printed by the run script.
-    """
-    try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                if line.startswith('MATCH_RESULT:'):
-                    return line.strip().split(':', 1)[1]
-    except OSError:
-        pass
-    return None
 
+def _read_sc_docker_result(match_id: int, log_file_path: str) -> dict:
+    """Return the result record of a finished single-container match.
 
-def _parse_sc_docker_duration(log_file_path: str) -> int | None:
-    """Parse the match duration from a single-container Docker log file.
+    Reads the ``<match_id>_result.json`` sidecar the run script writes
+    next to the replay (``runner/match_report.py``).  Without one, the
+    result lines are taken from the end of the container log instead
+    (``_scan_sc_docker_log``).
 
-    Looks for a ``MATCH_DURATION:<seconds>`` line printed by the run script.
+    The record always has ``result`` (None if the game left no result),
+    ``duration`` and ``bot_race`` keys; the sidecar adds ``game_loop``,
+    ``step_time`` and ``phases`` (see ``match_phases.py``).
     """
+    import json
+    sidecar_path = os.path.join(_get_logs_dir(), f'{match_id}_result.json')
     try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                if line.startswith('MATCH_DURATION:'):
-                    return int(line.strip().split(':', 1)[1])
+        with open(sidecar_path, encoding='utf-8') as f:
+            record = json.load(f)
+        if isinstance(record, dict) and record.get('result'):
+            return record
     except (OSError, ValueError):
         pass
-    return None
+    return _scan_sc_docker_log(log_file_path)
 
 
-def _parse_sc_docker_bot_race(log_file_path: str) -> str:
-    """Parse the bot's actual race from a single-container Docker log file.
+def _scan_sc_docker_log(log_file_path: str) -> dict:
+    """Parse the result lines of a single-container Docker log in one backwards pass.
 
-    Looks for a ``BOT_RACE:<race>`` line printed by the run script.
-    Returns the race string (e.g. 'Terran') or empty string if not found.
+    The run scripts print ``MATCH_RESULT:<result>``, then
+    ``MATCH_DURATION:<seconds>`` and ``BOT_RACE:<race>`` at the very end,
+    so reading from the end usually stops within the first block however
+    large the log is.
     """
+    record: dict = {'result': None, 'duration': None, 'bot_race': ''}
+
+    def _parse_line(line: bytes) -> bool:
+        """Record one log line; return True once the result line is found."""
+        text = line.decode('utf-8', errors='replace')
+        if text.startswith('MATCH_RESULT:'):
+            record['result'] = text.strip().split(':', 1)[1]
+            return True
+        if text.startswith('MATCH_DURATION:') and record['duration'] is None:
+            try:
+                record['duration'] = int(text.strip().split(':', 1)[1])
+            except ValueError:
+                pass
+        elif text.startswith('BOT_RACE:') and not record['bot_race']:
+            record['bot_race'] = text.strip().split(':', 1)[1]
+        return False
+
     try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                if line.startswith('BOT_RACE:'):
-                    return line.strip().split(':', 1)[1]
+        with open(log_file_path, 'rb') as f:
+            position = f.seek(0, os.SEEK_END)
+            partial = b''
+            while position > 0:
+                size = min(_LOG_TAIL_BLOCK, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + partial).split(b'\n')
+                # The first piece may continue in the previous block.
+                partial = lines.pop(0) if position > 0 else b''
+                for line in reversed(lines):
+                    if _parse_line(line):
+                        return record
     except OSError:
         pass
-    return ''
+    return record
 
 
-def _recover_stale_sc_docker_matches() -> dict[int, str]:
-    """Scan for pending single-container Docker matches whose log file contains a result.
+def _recover_sc_docker_match(match_obj: Match) -> str | None:
+    """Record the result of one pending single-container match if it has finished.
 
-    When the Django server restarts, the daemon threads monitoring
-    Docker containers are killed.  The containers finish and write
-    ``MATCH_RESULT:<result>`` to their log files, but nobody reads it.
-    This function finds those orphaned results and updates the database.
-
-    Returns a dict of ``{match_id: result}`` for recovered matches.
+    Returns the result, or ``None`` if the container is still running or
+    the match is not a single-container match.
     """
-    logs_dir = _get_logs_dir()
-    if not os.path.isdir(logs_dir):
-        return {}
+    # Skip matches that have an aiarena run directory (handled separately)
+    if os.path.isdir(aiarena_runner.get_run_dir(match_obj.id)):
+        return None
 
-    recovered: dict[int, str] = {}
-    pending = Match.objects.filter(result='Pending')
+    # Look for a log file matching this match ID
+    log_files = glob.glob(os.path.join(_get_logs_dir(), f"{match_obj.id}_*.log"))
+    if not log_files:
+        return None
 
-    for match_obj in pending:
-        try:
-            # Skip matches that have an aiarena run directory (handled separately)
-            aiarena_run_dir = aiarena_runner.get_run_dir(match_obj.id)
-            if os.path.isdir(aiarena_run_dir):
-                continue
+    # Containers run through the Engine API keep running without the
+    # process that launched them; fetch their log once they exit.
+    backend = container_backend.get_backend()
+    project = f'match_{match_obj.id}'
+    if backend.is_running(project):
+        return None
+    if backend.collect_exited(project, log_files[0]):
+        backend.remove_stack(project, AIARENA_COMPOSE_PATH)
+
+    record = _read_sc_docker_result(match_obj.id, log_files[0])
+    result = record['result']
+    if result:
+        _save_sc_docker_result(match_obj, result, record, failure_kind='Crash' if result == 'Crash' else '')
+        match_phases.record(match_obj.id, record.get('phases'))
+    return result
+
+
+def _save_sc_docker_result(
+    match_obj: Match, result: str, record: dict, exit_code: int | None = None, failure_kind: str = '',
+) -> None:
+    """Record *result* and the duration and race from a result *record* on a Match."""
+    now = timezone.now()
+    match_obj.result = result
+    match_obj.status = 'Finished'
+    match_obj.end_timestamp = now
+    match_obj.finished_at = now
+    match_obj.exit_code = exit_code
+    match_obj.failure_kind = failure_kind
+    duration = record.get('duration')
+    if isinstance(duration, int):
+        match_obj.duration_in_game_time = duration
+    bot_race = record.get('bot_race')
+    if bot_race:
+        match_obj.friendly_race = bot_race
+    with transaction.atomic():
+        match_obj.save()
+        results_summary.refresh_groups([match_obj.test_group_id])
+
+
+class _SingleContainerMatchJob(supervisor.MatchJob):
+    """Supervisor job for a single-container Docker match.
+
+    Runs *command* through the configured container backend, then
+    reads the result (``_read_sc_docker_result``) and updates the database.
+    """
 
-            # Look for a log file matching this match ID
-            pattern = os.path.join(logs_dir, f"{match_obj.id}_*.log")
-            log_files = glob.glob(pattern)
-            if not log_files:
-                continue
+    def __init__(self, match_id: int, command: list[str], cwd: str, log_file_path: str):
+        super().__init__(match_id)
+        self.command = command
+        self.cwd = cwd
+        self.log_file_path = log_file_path
+        self.backend = container_backend.get_backend()
+        self.handle = None
+
+    def start(self) -> None:
+        match_phases.record(self.match_id, launched=None)
+        self.handle = self.backend.start_service(self.command, self.cwd, self.log_file_path)
+
+    def poll(self) -> container_backend.RunResult | None:
+        return self.backend.poll(self.handle)
+
+    def stop(self) -> None:
+        if self.handle is not None:
+            self.backend.stop(self.handle)
+
+    def finish(self, run_result: container_backend.RunResult | None) -> None:
+        match_id = self.match_id
+        if run_result is not None and run_result.timed_out:
+            logger.warning('Single-container match %d: timed out after 2h', match_id)
+        elif run_result is not None:
+            logger.info(
+                'Single-container match %d: container exited with code %s after %.0fs',
+                match_id, run_result.exit_code, run_result.seconds,
+            )
+        record = _read_sc_docker_result(match_id, self.log_file_path)
+        # `docker compose run --rm` has removed the container by now.
+        match_phases.record(match_id, record.get('phases'), teardown_done=None)
+        exit_code = run_result.exit_code if run_result is not None else None
+        try:
+            match = Match.objects.get(id=match_id)
+        except Match.DoesNotExist:
+            logger.error('Single-container match %d: Match record not found', match_id)
+            return
+        if match.status != 'Running':
+            # Cancelled, or already reported by the runner (api_match_complete).
+            logger.info('Single-container match %d: %s, not recording a result', match_id, match.result)
+            if exit_code is not None:
+                Match.objects.filter(id=match_id, exit_code__isnull=True).update(exit_code=exit_code)
+            return
+        _save_sc_docker_result(
+            match, record['result'] or 'Crash', record, exit_code=exit_code,
+            failure_kind=supervisor.failure_kind(record['result'], run_result),
+        )
 
-            result = _parse_sc_docker_result(log_files[0])
-            if result:
-                match_obj.result = result
-                match_obj.end_timestamp = timezone.now()
-                duration = _parse_sc_docker_duration(log_files[0])
-                if duration is not None:
-                    match_obj.duration_in_game_time = duration
-                bot_race = _parse_sc_docker_bot_race(log_files[0])
-                if bot_race:
-                    match_obj.friendly_race = bot_race
-                match_obj.save()
-                recovered[match_obj.id] = result
-        except Exception:
-            logger.exception('Error recovering single-container match %d', match_obj.id)
 
-    return recovered
+def _run_sc_docker_match(match_id: int, command: list[str], cwd: str, log_file_path: str) -> None:
+    """Hand a single-container Docker match to the match supervisor.  Returns immediately."""
+    supervisor.submit(_SingleContainerMatchJob(match_id, command, cwd, log_file_path))
 
 
 def _launch_sc_docker_match(match_id: int, command: list[str], cwd: str, log_file_path: str) -> bool:
     """Launch a single-container Docker match through the queue.
 
-    If at capacity the match is queued and started later.  A monitoring
-    thread waits for the process to finish, then parses the result from
-    the container log and updates the database.
+    If at capacity the match is queued and started later.  The command
+    is saved to disk first so the scheduler process can launch it.
 
     Returns ``True`` if started immediately, ``False`` if queued.
     """
-    def _launcher():
-        def _run():
-            try:
-                with open(log_file_path, 'w') as log:
-                    proc = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=log)
-                proc.wait(timeout=7200)
-                result = _parse_sc_docker_result(log_file_path)
-                try:
-                    match = Match.objects.get(id=match_id)
-                    match.result = result or 'Crash'
-                    match.end_timestamp = timezone.now()
-                    duration = _parse_sc_docker_duration(log_file_path)
-                    if duration is not None:
-                        match.duration_in_game_time = duration
-                    bot_race = _parse_sc_docker_bot_race(log_file_path)
-                    if bot_race:
-                        match.friendly_race = bot_race
-                    match.save()
-                except Match.DoesNotExist:
-                    logger.error('Single-container match %d: Match record not found', match_id)
-            except Exception:
-                logger.exception('Single-container match %d: error', match_id)
-            finally:
-                match_queue.notify_match_finished()
+    match_queue.save_launch_spec(match_id, command, cwd, log_file_path)
 
-        thread = threading.Thread(target=_run, daemon=True)
-        thread.start()
+    def _launcher():
+        _run_sc_docker_match(match_id, command, cwd, log_file_path)
 
     return match_queue.enqueue(match_id, _launcher)
 
@@ -767,6 +943,7 @@ def start_custom_bot_match(
     friendly_race: str = '',
     opponent_race_override: str = '',
     map_name: str = '',
+    batch_size: int = 1,
 ) -> int:
     """Launch a single Docker match against a custom bot.
     Returns the match ID.
@@ -785,6 +962,10 @@ def start_custom_bot_match(
     ``friendly_race`` overrides the test bot's race (Random → specific).
     ``opponent_race_override`` overrides the opponent's race similarly.
 
+    ``batch_size`` > 1 creates that many matches (on different maps unless
+    ``map_name`` is set) played in one compose stack; the others are
+    batch members of the returned match.
+
     For aiarena-type bots, uses the aiarena local-play-bootstrap infrastructure.
     For python_sc2 / external_python bots, uses the existing single-container approach.
     """
@@ -796,11 +977,11 @@ def start_custom_bot_match(
                 opponent_race_override = race
                 break
 
-    selected_map = map_name or random.choice(MAP_LIST)
-    match = Match(
+    selected_maps = _pick_batch_maps(map_name, batch_size)
+    selected_map = selected_maps[0]
+    match_fields = dict(
         test_group_id=test_group_id,
         start_timestamp=datetime.now(),
-        map_name=selected_map,
         opponent_race=opponent_race_override or custom_bot.race,
         opponent_difficulty='',
         opponent_build=opponent_build,
@@ -810,8 +991,15 @@ def start_custom_bot_match(
         friendly_build=friendly_build,
         friendly_race=friendly_race,
     )
+    match = Match(map_name=selected_map, **match_fields)
     match.save()
     match_id = match.id
+    batch = [
+        Match(map_name=batch_map, batch_leader=match, **match_fields)
+        for batch_map in selected_maps[1:]
+    ]
+    for member in batch:
+        member.save()
 
     if not custom_bot.is_aiarena:
         raise ValueError(
@@ -828,10 +1016,21 @@ def start_custom_bot_match(
         opponent_build=opponent_build,
         friendly_race=friendly_race,
         opponent_race_override=opponent_race_override,
+        batch=batch,
     )
     return match_id
 
 
+def _pick_batch_maps(map_name: str, count: int) -> list[str]:
+    """Return *count* maps for a batch: *map_name* repeated, or distinct random maps."""
+    if map_name:
+        return [map_name] * count
+    maps = random.sample(MAP_LIST, min(count, len(MAP_LIST)))
+    while len(maps) < count:
+        maps.append(random.choice(MAP_LIST))
+    return maps
+
+
 def start_blizzard_ai_match(
     race: str,
     build: str,
@@ -888,6 +1087,7 @@ def start_blizzard_ai_match(
         '-e', f'DIFFICULTY={difficulty}',
         '-e', f'MAP_NAME={match_obj.map_name}',
     ]
+    command += _match_report_args(match_id)
     command += _bot_volume_args(test_bot, source_override)
     if friendly_build:
         bot_dir = test_bot.bot_directory or test_bot.name
@@ -900,6 +1100,8 @@ def start_blizzard_ai_match(
     return match_id
 
 
+# The group's summary is recomputed once after all its matches are queued.
+@results_summary.deferred_refresh()
 def start_test_suite(
     description: str,
     test_bot: CustomBot,
@@ -909,6 +1111,7 @@ def start_test_suite(
     friendly_build: str = '',
     friendly_race: str = '',
     map_name: str = '',
+    priority: int = TestGroup.Priority.TICKET,
 ) -> tuple[int, int]:
     """
     Create a TestGroup and launch Docker match containers based on the
@@ -920,12 +1123,16 @@ def start_test_suite(
     When *branch* is provided, a git worktree is created for that branch
     and the bot source is mounted from the worktree instead of the live
     working directory.  This allows testing multiple branches simultaneously.
+    The worktree is prewarmed first (``prewarm.py``) and the group's matches
+    wait in the queue until that has finished.
 
     Returns (test_group_id, number of matches started).
     Raises FileNotFoundError if docker-compose.yml is missing.
 
     *test_bot* is the Player-1 bot.
     Custom bot matches run regardless of difficulty.
+
+    *priority* is the group's scheduling class (``TestGroup.Priority``).
     """
     compose_file = os.path.join(AIARENA_COMPOSE_PATH, 'docker-compose.vs_computer.yml')
     if not os.path.exists(compose_file):
@@ -959,24 +1166,79 @@ def start_test_suite(
         description=description[:255],
         test_suite=test_suite,
         branch=branch,
+        priority=priority,
     )
     test_group_id = test_group.id
+    supersede.supersede_previous_groups(test_group, test_bot)
+    if source_override:
+        # Holds this group's matches until the worktree's HEAD is prewarmed.
+        prewarm.ensure_prewarm(test_bot, branch, source_override)
+
+    # --- Result reuse (see match_reuse.py) ---
+    reuse = test_suite.reuse_results if test_suite else False
+    samples_per_cell = max(1, test_suite.target_samples_per_cell if test_suite else 1)
+    test_bot_state = match_reuse.get_bot_state(test_bot, source_override) if reuse else None
+    friendly_build_state = match_reuse.get_build_state(test_bot, friendly_build)
+
+    batch_size = max(1, SystemConfig.load().aiarena_batch_size)
 
     count = 0
+    reused = 0
+
+    def cell_fingerprints(**config) -> dict[str, str]:
+        """Return ``{map: fingerprint}`` for the maps a cell may be played on.
+
+        A suite map gives one entry.  Otherwise every map of ``MAP_LIST``
+        gets its own, so a result is reused as what it is — a result on
+        the map it was played on — and new matches follow the usual map
+        choice.  Empty if the cell can't be fingerprinted.
+        """
+        maps = [effective_map] if effective_map else MAP_LIST
+        fingerprints = {m: match_reuse.config_fingerprint(test_bot_state, map=m, **config) for m in maps}
+        return {m: fingerprint for m, fingerprint in fingerprints.items() if fingerprint}
+
+    def fill_cell(fingerprints: dict[str, str], launch, launch_batch=None) -> None:
+        """Reuse results for one cell and launch the samples still missing.
+
+        *fingerprints* maps each map to the cell's fingerprint on it (key
+        ``''`` for cells whose fingerprint has no map).  *launch* starts
+        one match and returns its id.  *launch_batch*, for bot-vs-bot
+        cells, takes a size and starts a batch of matches in one compose
+        stack, returning the leader's id.
+        """
+        nonlocal count, reused
+        cell_reused = match_reuse.reuse_results(fingerprints.values(), test_group_id, samples_per_cell)
+        reused += cell_reused
+        missing = samples_per_cell - cell_reused
+        while missing > 0:
+            size = min(batch_size, missing) if launch_batch is not None else 1
+            match_id = launch_batch(size) if size > 1 else launch()
+            if fingerprints:
+                launched = Match.objects.filter(Q(id=match_id) | Q(batch_leader_id=match_id))
+                for launched_id, launched_map in launched.values_list('id', 'map_name'):
+                    fingerprint = fingerprints.get(launched_map) or fingerprints.get('')
+                    if fingerprint:
+                        Match.objects.filter(id=launched_id).update(config_fingerprint=fingerprint)
+            count += size
+            missing -= size
 
     # --- Computer AI matches (15 = 3 races x 5 builds) ---
     if include_blizzard:
         for race in ('protoss', 'terran', 'zerg'):
             for build in ('rush', 'timing', 'macro', 'power', 'air'):
-                start_blizzard_ai_match(
+                fingerprints = cell_fingerprints(
+                    kind='blizzard', race=race, build=build,
+                    difficulty=difficulty, friendly_build=friendly_build_state,
+                    friendly_race=friendly_race,
+                )
+                fill_cell(fingerprints, lambda race=race, build=build: start_blizzard_ai_match(
                     race, build, difficulty, test_bot,
                     test_group_id=test_group_id,
                     source_override=source_override,
                     friendly_build=friendly_build,
                     friendly_race=friendly_race,
                     map_name=effective_map,
-                )
-                count += 1
+                ))
 
     # --- Custom bot matches ---
     # Resolve per-bot build overrides from the test suite
@@ -1005,17 +1267,26 @@ def start_test_suite(
             opp_builds = [opp_builds_raw]
         else:
             opp_builds = ['']  # single match with no build override
+        opponent_state = match_reuse.get_bot_state(bot) if test_bot_state else None
         for opp_build in opp_builds:
             try:
-                start_custom_bot_match(
-                    bot, test_bot=test_bot, test_group_id=test_group_id,
-                    source_override=source_override,
-                    friendly_build=friendly_build,
-                    opponent_build=opp_build,
+                fingerprints = cell_fingerprints(
+                    kind='custom', opponent=opponent_state,
+                    opponent_build=match_reuse.get_build_state(bot, opp_build),
+                    friendly_build=friendly_build_state,
                     friendly_race=friendly_race,
-                    map_name=effective_map,
                 )
-                count += 1
+                def launch_custom(size: int = 1, bot=bot, opp_build=opp_build) -> int:
+                    return start_custom_bot_match(
+                        bot, test_bot=test_bot, test_group_id=test_group_id,
+                        source_override=source_override,
+                        friendly_build=friendly_build,
+                        opponent_build=opp_build,
+                        friendly_race=friendly_race,
+                        map_name=effective_map,
+                        batch_size=size,
+                    )
+                fill_cell(fingerprints, launch_custom, launch_custom)
             except Exception:
                 # Don't let a single custom-bot failure abort the whole suite
                 pass
@@ -1029,36 +1300,58 @@ def start_test_suite(
             count=max_offset, repo_path=repo_path,
         )
         test_race = test_bot.race if test_bot else 'Terran'
+
+        def launch_past_version(commit, size: int = 1) -> int:
+            match_fields = dict(
+                test_group_id=test_group_id,
+                start_timestamp=datetime.now(),
+                opponent_race=test_race,
+                opponent_difficulty='',
+                opponent_build='',
+                result='Pending',
+                opponent_commit_hash=commit.hash,
+                test_bot=test_bot,
+                friendly_build=friendly_build,
+                friendly_race=friendly_race,
+            )
+            # One draw for the whole batch, so no member repeats the leader's map.
+            selected_maps = _pick_batch_maps(effective_map, size)
+            match = Match(map_name=selected_maps[0], **match_fields)
+            match.save()
+            batch = [
+                Match(map_name=batch_map, batch_leader=match, **match_fields)
+                for batch_map in selected_maps[1:]
+            ]
+            for member in batch:
+                member.save()
+            aiarena_runner.start_past_version_match(
+                match, commit.hash, commit.short_hash, test_bot=test_bot,
+                map_name=selected_maps[0],
+                source_override=source_override,
+                friendly_build=friendly_build,
+                friendly_race=friendly_race,
+                batch=batch,
+            )
+            return match.id
+
         for offset in version_offsets:
             # offsets are 1-based: offset 1 = commits[0] (HEAD~1)
             idx = offset - 1
             if idx < len(commits):
                 commit = commits[idx]
                 try:
-                    match = Match(
-                        test_group_id=test_group_id,
-                        start_timestamp=datetime.now(),
-                        map_name='TBD',
-                        opponent_race=test_race,
-                        opponent_difficulty='',
-                        opponent_build='',
-                        result='Pending',
-                        opponent_commit_hash=commit.hash,
-                        test_bot=test_bot,
-                        friendly_build=friendly_build,
+                    fingerprints = cell_fingerprints(
+                        kind='past_version', opponent_commit=commit.hash,
+                        friendly_build=friendly_build_state,
                         friendly_race=friendly_race,
                     )
-                    match.save()
-                    aiarena_runner.start_past_version_match(
-                        match, commit.hash, commit.short_hash, test_bot=test_bot,
-                        map_name=effective_map or None,
-                        source_override=source_override,
-                        friendly_build=friendly_build,
-                        friendly_race=friendly_race,
+                    fill_cell(
+                        fingerprints,
+                        lambda commit=commit: launch_past_version(commit),
+                        lambda size, commit=commit: launch_past_version(commit, size),
                     )
-                    count += 1
                 except Exception as e:
-                    logging.getLogger('test_lab').exception(
+                    logger.exception(
                         'Failed to start past-version match for offset %d (commit %s): %s',
                         offset, commit.short_hash, e,
                     )
@@ -1067,19 +1360,28 @@ def start_test_suite(
     replay_test_list = list(test_suite.replay_tests.all()) if test_suite else []
     for replay_test in replay_test_list:
         try:
-            _launch_replay_test_match(
+            fingerprint = match_reuse.config_fingerprint(
+                test_bot_state, kind='replay', replay_test=replay_test.id,
+                replay_file=replay_test.replay_file, state_db_file=replay_test.state_db_file,
+                start_time=replay_test.start_time, duration=replay_test.duration,
+                opponent=f'{replay_test.opponent_race}-{replay_test.opponent_build}-{replay_test.opponent_difficulty}',
+                bot_player_id=replay_test.bot_player_id,
+                friendly_build=friendly_build_state, friendly_race=friendly_race,
+            )
+            fill_cell({'': fingerprint} if fingerprint else {}, lambda replay_test=replay_test: _launch_replay_test_match(
                 replay_test, test_group_id=test_group_id, test_bot=test_bot,
                 source_override=source_override,
                 friendly_build=friendly_build,
                 friendly_race=friendly_race,
-            )
-            count += 1
+            ))
         except Exception as e:
-            logging.getLogger('test_lab').exception(
+            logger.exception(
                 'Failed to start replay test match for "%s": %s',
                 replay_test.name, e,
             )
 
+    if reused:
+        logger.info('Test group %d: reused %d result(s) from identical earlier matches', test_group_id, reused)
     return test_group_id, count
 
 
@@ -1148,6 +1450,8 @@ def api_trigger_tests(request):
       - branch (str): git branch to test against. When set, a git worktree
         is created and the bot source is mounted from the worktree.
         Multiple branches can be tested simultaneously.
+      - priority (str): scheduling class for the test group — ``interactive``,
+        ``ticket`` (default) or ``backfill``.
     """
     import json
     try:
@@ -1218,6 +1522,14 @@ def api_trigger_tests(request):
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
     # Standard test suite
+    priority_name = str(body.get('priority', 'ticket')).upper()
+    if priority_name not in TestGroup.Priority.names:
+        return JsonResponse(
+            {'status': 'error', 'message': f'Unknown priority "{body.get("priority")}"'},
+            status=400,
+        )
+    priority = TestGroup.Priority[priority_name]
+
     difficulty = body.get('difficulty', 'CheatInsane')
     test_suite = None
     test_suite_id = body.get('test_suite_id')
@@ -1248,6 +1560,7 @@ def api_trigger_tests(request):
             friendly_build=friendly_build,
             friendly_race=friendly_race,
             map_name=map_name,
+            priority=priority,
         )
         return JsonResponse({
             'status': 'ok',
@@ -1264,6 +1577,7 @@ def api_trigger_tests(request):
 
 def serve_replay(request, match_id):
     """Open replay files with StarCraft 2 locally."""
+    match_id = match_reuse.get_artifact_match_id(match_id)
     config = SystemConfig.load()
     sc2_switcher = config.sc2_switcher_path
 
@@ -1293,6 +1607,8 @@ def serve_log(request, match_id):
     """
     from django.http import FileResponse
 
+    match_id = match_reuse.get_artifact_match_id(match_id)
+
     # Check aiarena run directory first
     log_path = aiarena_runner.get_match_log_path(match_id)
     if log_path:
@@ -1319,6 +1635,7 @@ def serve_aiarena_bot_log(request, match_id, bot_name):
     stderr log is not available (e.g. match never ran or is still running).
     """
     from django.http import FileResponse
+    match_id = match_reuse.get_artifact_match_id(match_id)
     log_path = aiarena_runner.get_bot_log_path(match_id, bot_name)
     if not log_path:
         # Fall back to compose output log
@@ -1347,10 +1664,11 @@ def _get_map_breakdown_context(request):
 
     # Only blizzard AI and custom bot matches (exclude replay & past-version & unknown maps)
     matches = (
-        Match.objects.select_related('opponent_bot', 'test_bot')
+        Match.objects
         .filter(replay_test__isnull=True)
         .filter(opponent_commit_hash='')
-        .exclude(map_name='TBD (from replay)')
+        .filter(reused_from__isnull=True)
+        .exclude(map_name__in=('TBD', 'TBD (from replay)'))
     )
 
     if selected_test_bot and selected_test_bot.isdigit():
@@ -1374,157 +1692,110 @@ def _get_map_breakdown_context(request):
             Q(test_group_id=-1) | Q(test_group_id__in=recent_group_ids)
         )
 
-    # Collect stats keyed by (opponent_key, map_name)
-    stats = defaultdict(lambda: {
-        'victories': 0, 'total_games': 0,
-        'total_duration': 0, 'games_with_duration': 0,
-    })
+    # One grouped query: stats per (opponent_key, map_name).  Custom bots
+    # are keyed by bot, Blizzard AI by race/build.
+    has_duration = Q(duration_in_game_time__gt=0)
+    grouped = (
+        matches
+        .annotate(opp_key=Case(
+            When(opponent_bot__isnull=False, then=Concat(Value('bot_'), Cast('opponent_bot_id', CharField()))),
+            default=Concat('opponent_race', Value('/'), 'opponent_build'),
+            output_field=CharField(),
+        ))
+        .values('opp_key', 'map_name')
+        .annotate(
+            bot_name=Max('opponent_bot__name'),
+            race=Max('opponent_race'),
+            victories=Count('id', filter=Q(result='Victory')),
+            total_games=Count('id', filter=Q(result__in=('Victory', 'Defeat'))),
+            total_duration=Coalesce(Sum('duration_in_game_time', filter=has_duration), 0),
+            games_with_duration=Count('id', filter=has_duration),
+        )
+        .order_by()
+    )
+
+    stat_fields = ('victories', 'total_games', 'total_duration', 'games_with_duration')
+
+    def _totals():
+        return defaultdict(lambda: dict.fromkeys(stat_fields, 0))
+
+    stats = _totals()  # (opp_key, map_name) -> stats
     all_maps: set[str] = set()
     blizzard_keys: set[str] = set()
     custom_bot_keys: dict[str, str] = {}  # key -> display name
     custom_bot_race: dict[str, str] = {}  # key -> opponent race
 
-    for match in matches:
-        if match.map_name == 'TBD':
-            continue
-        all_maps.add(match.map_name)
-
-        if match.opponent_bot is not None:
-            opp_key = f'bot_{match.opponent_bot.id}'
-            custom_bot_keys[opp_key] = match.opponent_bot.name
-            if match.opponent_race:
-                custom_bot_race[opp_key] = match.opponent_race
+    for row in grouped:
+        opp_key, map_name = row['opp_key'], row['map_name']
+        all_maps.add(map_name)
+        if opp_key.startswith('bot_'):
+            custom_bot_keys[opp_key] = row['bot_name']
+            if row['race']:
+                custom_bot_race[opp_key] = row['race']
         else:
-            opp_key = f'{match.opponent_race}/{match.opponent_build}'
             blizzard_keys.add(opp_key)
-
-        cell = stats[(opp_key, match.map_name)]
-        if match.result in ('Victory', 'Defeat'):
-            cell['total_games'] += 1
-            if match.result == 'Victory':
-                cell['victories'] += 1
-        if match.duration_in_game_time and match.duration_in_game_time > 0:
-            cell['total_duration'] += match.duration_in_game_time
-            cell['games_with_duration'] += 1
+        stats[(opp_key, map_name)] = {field: row[field] for field in stat_fields}
+
+    # Row, column, race and grand totals in one pass over the cells
+    key_totals = _totals()  # opp_key -> stats
+    map_totals_by_name = _totals()  # map_name -> stats
+    race_stats = _totals()  # (race, map_name) -> stats
+    race_totals = _totals()  # race -> stats
+    grand = dict.fromkeys(stat_fields, 0)
+    for (opp_key, map_name), cell in list(stats.items()):
+        race = custom_bot_race.get(opp_key) if opp_key in custom_bot_keys else opp_key.split('/')[0]
+        targets = [key_totals[opp_key], map_totals_by_name[map_name], grand]
+        if race:
+            targets += [race_stats[(race, map_name)], race_totals[race]]
+        for target in targets:
+            for field in stat_fields:
+                target[field] += cell[field]
 
     sorted_maps = sorted(all_maps)
 
-    def _make_row(opp_key, label):
-        row_victories = 0
-        row_games = 0
-        row_duration = 0
-        row_dur_count = 0
-        cells = []
-        for map_name in sorted_maps:
-            s = stats[(opp_key, map_name)]
-            if s['total_games'] > 0:
-                wp = (s['victories'] / s['total_games']) * 100
-                win_rate_str = f'{wp:.0f}%'
-            else:
-                win_rate_str = None
-            avg_dur = int(s['total_duration'] / s['games_with_duration']) if s['games_with_duration'] else None
-            cells.append({
-                'win_rate': win_rate_str,
-                'avg_duration': avg_dur,
-                'wins': s['victories'],
-                'games_played': s['total_games'],
-            })
-            row_victories += s['victories']
-            row_games += s['total_games']
-            row_duration += s['total_duration']
-            row_dur_count += s['games_with_duration']
-
-        if row_games > 0:
-            overall_wp = f'{(row_victories / row_games) * 100:.0f}%'
-        else:
-            overall_wp = None
+    def _make_cell(s):
+        return {
+            'win_rate': f"{(s['victories'] / s['total_games']) * 100:.0f}%" if s['total_games'] else None,
+            'avg_duration': int(s['total_duration'] / s['games_with_duration']) if s['games_with_duration'] else None,
+            'wins': s['victories'],
+            'games_played': s['total_games'],
+        }
 
+    def _make_row(label, cells, total):
+        overall = _make_cell(total)
         return {
             'label': label,
-            'results': cells,
-            'overall_win_rate': overall_wp,
-            'overall_wins': row_victories,
-            'overall_games': row_games,
-            'overall_avg_duration': int(row_duration / row_dur_count) if row_dur_count else None,
+            'results': [_make_cell(s) for s in cells],
+            'overall_win_rate': overall['win_rate'],
+            'overall_wins': overall['wins'],
+            'overall_games': overall['games_played'],
+            'overall_avg_duration': overall['avg_duration'],
         }
 
+    def _make_opponent_row(opp_key, label):
+        return _make_row(label, [stats[(opp_key, m)] for m in sorted_maps], key_totals[opp_key])
+
     # --- Blizzard AI rows (sorted by race, then build) ---
     sorted_blizzard = sorted(blizzard_keys, key=lambda k: (
         k.split('/')[0],
         k.split('/')[1],
     ))
-    blizzard_rows = [_make_row(k, k) for k in sorted_blizzard]
+    blizzard_rows = [_make_opponent_row(k, k) for k in sorted_blizzard]
 
     # --- Custom bot rows (sorted alphabetically by name) ---
     sorted_custom = sorted(custom_bot_keys.items(), key=lambda item: item[1].lower())
-    custom_bot_rows = [_make_row(k, name) for k, name in sorted_custom]
+    custom_bot_rows = [_make_opponent_row(k, name) for k, name in sorted_custom]
 
     # --- Race summary rows (aggregate all keys by opponent race) ---
-    race_keys: dict[str, list[str]] = defaultdict(list)
-    for k in blizzard_keys:
-        race = k.split('/')[0]
-        race_keys[race].append(k)
-    for k, race in custom_bot_race.items():
-        race_keys[race].append(k)
-
-    def _make_aggregate_row(keys: list[str], label: str):
-        row_v = row_g = row_d = row_dc = 0
-        cells = []
-        for map_name in sorted_maps:
-            mv = mg = md = mdc = 0
-            for k in keys:
-                s = stats[(k, map_name)]
-                mv += s['victories']
-                mg += s['total_games']
-                md += s['total_duration']
-                mdc += s['games_with_duration']
-            cells.append({
-                'win_rate': f'{(mv / mg) * 100:.0f}%' if mg else None,
-                'avg_duration': int(md / mdc) if mdc else None,
-                'wins': mv,
-                'games_played': mg,
-            })
-            row_v += mv; row_g += mg; row_d += md; row_dc += mdc
-        return {
-            'label': label,
-            'results': cells,
-            'overall_win_rate': f'{(row_v / row_g) * 100:.0f}%' if row_g else None,
-            'overall_wins': row_v,
-            'overall_games': row_g,
-            'overall_avg_duration': int(row_d / row_dc) if row_dc else None,
-        }
-
-    race_summary_rows = []
-    for race in ('Protoss', 'Terran', 'Zerg', 'Random'):
-        keys = race_keys.get(race, [])
-        if keys:
-            race_summary_rows.append(_make_aggregate_row(keys, race))
+    race_summary_rows = [
+        _make_row(race, [race_stats[(race, m)] for m in sorted_maps], race_totals[race])
+        for race in ('Protoss', 'Terran', 'Zerg', 'Random')
+        if race in race_totals
+    ]
 
     # --- Per-map column totals ---
-    all_opp_keys = list(blizzard_keys) + list(custom_bot_keys.keys())
-    map_totals = []
-    grand_victories = 0
-    grand_games = 0
-    grand_duration = 0
-    grand_dur_count = 0
-    for map_name in sorted_maps:
-        mv = mg = md = mdc = 0
-        for opp_key in all_opp_keys:
-            s = stats[(opp_key, map_name)]
-            mv += s['victories']
-            mg += s['total_games']
-            md += s['total_duration']
-            mdc += s['games_with_duration']
-        map_totals.append({
-            'win_rate': f'{(mv / mg) * 100:.0f}%' if mg else None,
-            'avg_duration': int(md / mdc) if mdc else None,
-            'wins': mv,
-            'games_played': mg,
-        })
-        grand_victories += mv
-        grand_games += mg
-        grand_duration += md
-        grand_dur_count += mdc
+    map_totals = [_make_cell(map_totals_by_name[m]) for m in sorted_maps]
+    grand_cell = _make_cell(grand)
 
     test_subject_bots = CustomBot.objects.filter(is_test_subject=True).order_by('name')
 
@@ -1534,10 +1805,10 @@ def _get_map_breakdown_context(request):
         'custom_bot_rows': custom_bot_rows,
         'race_summary_rows': race_summary_rows,
         'map_totals': map_totals,
-        'grand_win_rate': f'{(grand_victories / grand_games) * 100:.0f}%' if grand_games else None,
-        'grand_wins': grand_victories,
-        'grand_games': grand_games,
-        'grand_avg_duration': int(grand_duration / grand_dur_count) if grand_dur_count else None,
+        'grand_win_rate': grand_cell['win_rate'],
+        'grand_wins': grand_cell['wins'],
+        'grand_games': grand_cell['games_played'],
+        'grand_avg_duration': grand_cell['avg_duration'],
         'selected_limit': selected_limit,
         'selected_test_bot': selected_test_bot,
         'selected_difficulty': selected_difficulty,
@@ -1721,6 +1992,12 @@ def config_page(request):
             'previous_versions': s.previous_versions,
             'custom_bot_builds': s.custom_bot_builds or {},
             'map_name': s.map_name,
+            'reuse_results': s.reuse_results,
+            'target_samples_per_cell': s.target_samples_per_cell,
+            'early_stopping': s.early_stopping,
+            'sprt_target_win_rate': s.sprt_target_win_rate,
+            'sprt_margin': s.sprt_margin,
+            'sprt_error_rate': s.sprt_error_rate,
         }
         for s in test_suites
     ])
@@ -1808,8 +2085,34 @@ def update_system_config(request):
         return redirect(config_url)
 
     max_concurrent = int(max_concurrent_raw)
+
+    try:
+        host_cpu_cores = float(request.POST.get('host_cpu_cores', '0').strip() or 0)
+        host_memory_mb = int(request.POST.get('host_memory_mb', '0').strip() or 0)
+        if host_cpu_cores < 0 or host_memory_mb < 0:
+            raise ValueError
+    except ValueError:
+        messages.error(request, 'Host CPU cores and memory must be non-negative numbers.')
+        return redirect(config_url)
+
     config = SystemConfig.load()
     config.max_concurrent_custom_bots = max_concurrent
+    config.resource_aware_scheduling = request.POST.get('resource_aware_scheduling') == 'on'
+    config.host_cpu_cores = host_cpu_cores
+    config.host_memory_mb = host_memory_mb
+    batch_size_raw = request.POST.get('aiarena_batch_size', '').strip()
+    if batch_size_raw.isdigit() and int(batch_size_raw) >= 1:
+        config.aiarena_batch_size = int(batch_size_raw)
+    warm_pool_raw = request.POST.get('warm_pool_size', '').strip()
+    if warm_pool_raw.isdigit():
+        config.warm_pool_size = int(warm_pool_raw)
+    backend = request.POST.get('container_backend', config.container_backend)
+    if backend in SystemConfig.ContainerBackend.values:
+        config.container_backend = backend
+    supersede_policy = request.POST.get('supersede_policy', config.supersede_policy)
+    if supersede_policy in SystemConfig.SupersedePolicy.values:
+        config.supersede_policy = supersede_policy
+    config.match_report_url = request.POST.get('match_report_url', config.match_report_url).strip()
     config.sc2_switcher_path = request.POST.get('sc2_switcher_path', '').strip()
     config.sc2_maps_path = request.POST.get('sc2_maps_path', '').strip()
     config.save()
@@ -1817,7 +2120,8 @@ def update_system_config(request):
     label = 'unlimited' if max_concurrent == 0 else str(max_concurrent)
     messages.success(request, f'System config updated (max concurrent custom bots: {label}).')
 
-    # Drain queue in case the new limit is higher
+    # Drain queue in case the new limit is higher (the scheduler picks
+    # the change up on its next pass when it is running).
     match_queue.drain_queue()
 
     return redirect(config_url)
@@ -1911,6 +2215,37 @@ def custom_plugin_page(request, plugin_name: str):
 
 
 
+def _parse_suite_run_options(post) -> dict:
+    """Parse the result-reuse and SPRT early-stopping fields of the test suite form.
+
+    Raises ``ValueError`` with a user-facing message on invalid input.
+    """
+    target_raw = post.get('sprt_target_win_rate', '').strip()
+    try:
+        target = float(target_raw) / 100 if target_raw else None
+        margin = float(post.get('sprt_margin', '').strip() or 10) / 100
+        error_rate = float(post.get('sprt_error_rate', '').strip() or 5) / 100
+    except ValueError:
+        raise ValueError('Early stopping values must be numbers.')
+    samples_raw = post.get('target_samples_per_cell', '').strip() or '1'
+    if not samples_raw.isdigit() or not 1 <= int(samples_raw) <= 100:
+        raise ValueError('Samples per opponent must be a whole number between 1 and 100.')
+    if target is not None and not 0 < target < 1:
+        raise ValueError('Early stopping target win rate must be between 0 and 100%.')
+    if not 0 < margin < 0.5:
+        raise ValueError('Early stopping margin must be between 0 and 50%.')
+    if not 0 < error_rate < 0.5:
+        raise ValueError('Early stopping error rate must be between 0 and 50%.')
+    return {
+        'reuse_results': post.get('reuse_results') == 'on',
+        'target_samples_per_cell': int(samples_raw),
+        'early_stopping': post.get('early_stopping') == 'on',
+        'sprt_target_win_rate': target,
+        'sprt_margin': margin,
+        'sprt_error_rate': error_rate,
+    }
+
+
 @require_POST
 def create_test_suite(request):
     """Create a new test suite from form data."""
@@ -1930,6 +2265,11 @@ def create_test_suite(request):
     selected_replay_test_ids = request.POST.getlist('replay_test_ids')
     previous_versions = request.POST.get('previous_versions', '').strip()
     suite_map_name = request.POST.get('map_name', '').strip()
+    try:
+        run_options = _parse_suite_run_options(request.POST)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect(config_url)
 
     # Parse per-bot build overrides from hidden JSON field
     import json as _json
@@ -1948,6 +2288,7 @@ def create_test_suite(request):
         previous_versions=previous_versions,
         custom_bot_builds=custom_bot_builds,
         map_name=suite_map_name,
+        **run_options,
     )
     if selected_bot_ids:
         suite.custom_bots.set(selected_bot_ids)
@@ -1999,6 +2340,12 @@ def update_test_suite(request, suite_id):
         messages.error(request, f'A test suite named "{name}" already exists.')
         return redirect(config_url)
 
+    try:
+        run_options = _parse_suite_run_options(request.POST)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect(config_url)
+
     # Parse per-bot build overrides from hidden JSON field
     import json as _json
     custom_bot_builds_raw = request.POST.get('custom_bot_builds', '').strip()
@@ -2015,6 +2362,8 @@ def update_test_suite(request, suite_id):
     suite.previous_versions = request.POST.get('previous_versions', '').strip()
     suite.custom_bot_builds = custom_bot_builds
     suite.map_name = request.POST.get('map_name', '').strip()
+    for field, value in run_options.items():
+        setattr(suite, field, value)
     suite.save()
 
     selected_bot_ids = request.POST.getlist('custom_bot_ids')
@@ -2539,6 +2888,7 @@ def run_replay_match(request):
             '-e', f'RACE={race.lower()}',
             '-e', f'MATCH_ID={match_id}',
         ]
+        command += _match_report_args(match_id)
 
         if container_state_db_path:
             command += ['-e', f'STATE_DB_PATH={container_state_db_path}']
@@ -2645,6 +2995,7 @@ def _launch_replay_test_match(
         '-e', f'RACE={rt_race.lower()}',
         '-e', f'MATCH_ID={match_id}',
     ]
+    command += _match_report_args(match_id)
 
     if container_state_db_path:
         command += ['-e', f'STATE_DB_PATH={container_state_db_path}']
@@ -3218,6 +3569,297 @@ def delete_ticket(request, ticket_id):
     return redirect('tickets')
 
 
+@csrf_exempt
+@require_POST
+def api_match_complete(request):
+    """Completion callback posted by the runner scripts when a game ends.
+
+    JSON body (see ``runner/match_report.py``):
+      - match_id (int): the match that finished
+      - token (str): the match's report token (``_match_report_token``)
+      - result (str): ``Victory``, ``Defeat``, ``Tie``, ``Crash``, ...
+      - duration (int): optional game duration in seconds
+      - bot_race (str): optional resolved race of the test bot
+      - phases (dict): optional Unix time of each phase reached in the
+        container (``match_phases.py``)
+
+    The result is recorded straight away, so the supervisor frees the
+    match's slot while the container is still shutting down.  Reports
+    for matches that are no longer running are ignored.
+    """
+    import json
+    try:
+        body = json.loads(request.body) if request.body else {}
+        match_id = int(body.get('match_id'))
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return JsonResponse(
+            {'status': 'error', 'message': 'match_id is required'}, status=400,
+        )
+    if not constant_time_compare(str(body.get('token', '')), _match_report_token(match_id)):
+        return JsonResponse(
+            {'status': 'error', 'message': 'Invalid token'}, status=403,
+        )
+
+    result = str(body.get('result') or 'Crash')[:50]
+    now = timezone.now()
+    updates = {
+        'result': result, 'status': 'Finished', 'end_timestamp': now, 'finished_at': now,
+        'failure_kind': 'Crash' if result == 'Crash' else '',
+    }
+    duration = body.get('duration')
+    if isinstance(duration, int):
+        updates['duration_in_game_time'] = duration
+    bot_race = body.get('bot_race')
+    if bot_race in ('Protoss', 'Terran', 'Zerg', 'Random'):
+        updates['friendly_race'] = bot_race
+
+    with transaction.atomic():
+        if not Match.objects.filter(id=match_id, status='Running').update(**updates):
+            return JsonResponse({'status': 'ignored'})
+        results_summary.refresh_for_matches([match_id])
+    match_phases.record(match_id, body.get('phases'))
+    logger.info('Match %d: result reported by the runner: %s', match_id, result)
+    return JsonResponse({'status': 'ok'})
+
+
+# ---------------------------------------------------------------------------
+# Read API
+# ---------------------------------------------------------------------------
+# Page size of the paginated read API endpoints (``?limit=``).
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Fields each read API resource returns; ``?fields=a,b`` selects a subset.
+TEST_GROUP_API_FIELDS = (
+    'id', 'description', 'branch', 'priority', 'test_suite_id', 'superseded_by_id',
+    'sprt_result', 'sprt_llr', 'sprt_baseline_win_rate', 'version', 'created_at',
+    'matches', 'queued', 'running', 'finished', 'cancelled', 'done',
+)
+MATCH_API_FIELDS = (
+    'id', 'test_group_id', 'test_bot_id', 'status', 'result', 'failure_kind', 'exit_code',
+    'map_name', 'opponent_race', 'opponent_build', 'opponent_difficulty', 'opponent_bot_id',
+    'opponent_commit_hash', 'replay_test_id', 'friendly_race', 'duration_in_game_time',
+    'reused_from_id', 'queued_at', 'launched_at', 'finished_at',
+)
+OPPONENT_API_FIELDS = (
+    'test_bot_id', 'opponent_key', 'kind', 'opponent_difficulty', 'match_id',
+    'victories', 'total_games', 'win_rate',
+)
+MAP_API_FIELDS = (
+    'test_bot_id', 'opponent_key', 'kind', 'opponent_difficulty', 'map_name', 'victories',
+    'total_games', 'avg_duration', 'fastest_victory', 'fastest_victory_match_id',
+    'slowest_loss', 'slowest_loss_match_id',
+)
+# Match counts per status of the test groups resource.
+_TEST_GROUP_STATUS_COUNTS = {
+    'queued': 'Queued', 'running': 'Running', 'finished': 'Finished', 'cancelled': 'Cancelled',
+}
+
+
+def _api_etag(request, test_group_id: int | None = None) -> str:
+    """ETag of a read API response.
+
+    Built from the request's path and query string, the versions of the
+    test groups the response covers (``TestGroup.version`` is bumped on
+    every match change) and the count and id sum of those groups and
+    their matches, so it also changes when groups or matches are deleted
+    (which bumps no version), even if others were added meanwhile.
+    """
+    groups = TestGroup.objects.all()
+    matches = Match.objects.all()
+    selected = test_group_id if test_group_id is not None else request.GET.get('test_group', '')
+    if str(selected).lstrip('-').isdigit():
+        groups = groups.filter(id=int(selected))
+        matches = matches.filter(test_group_id=int(selected))
+    group_marker = groups.aggregate(count=Count('id'), ids=Sum('id'), versions=Sum('version'))
+    match_marker = matches.aggregate(count=Count('id'), ids=Sum('id'))
+    return hashlib.sha256(
+        f"{request.get_full_path()}|{group_marker['count']}|{group_marker['ids']}|{group_marker['versions']}|"
+        f"{match_marker['count']}|{match_marker['ids']}".encode()
+    ).hexdigest()[:32]
+
+
+def _api_fields(request, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    """Return the fields selected with ``?fields=`` (default: all *allowed*)."""
+    selected = tuple(f for f in request.GET.get('fields', '').split(',') if f)
+    if not selected:
+        return allowed
+    unknown = sorted(set(selected) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown field(s) {', '.join(unknown)}; available: {', '.join(allowed)}")
+    return selected
+
+
+def _api_page(request, queryset) -> tuple[list[dict], str | None]:
+    """Return one page of *queryset* rows, newest first, and the next page's cursor.
+
+    Keyset pagination: the cursor encodes the id of the page's last row
+    and the next page continues below it, so pages stay stable while
+    new rows are added.  *queryset* must be a ``values()`` queryset that
+    includes ``id``.
+    """
+    limit = request.GET.get('limit', str(API_PAGE_SIZE))
+    if not limit.isdigit() or not 1 <= int(limit) <= API_MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {API_MAX_PAGE_SIZE}')
+    cursor = request.GET.get('cursor', '')
+    if cursor:
+        try:
+            queryset = queryset.filter(id__lt=int(urlsafe_base64_decode(cursor).decode()))
+        except ValueError:
+            raise ValueError('Invalid cursor') from None
+    rows = list(queryset.order_by('-id')[:int(limit) + 1])
+    if len(rows) <= int(limit):
+        return rows, None
+    rows = rows[:int(limit)]
+    return rows, urlsafe_base64_encode(str(rows[-1]['id']).encode())
+
+
+def _api_list_response(request, rows: list[dict], fields: tuple[str, ...], next_cursor: str | None):
+    """Return a paginated read API response with the selected *fields* of *rows*."""
+    next_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+    return JsonResponse({
+        'results': [{field: row[field] for field in fields} for row in rows],
+        'next_cursor': next_cursor,
+        'next': next_url,
+    })
+
+
+def _api_test_group_rows(groups, fields: tuple[str, ...]):
+    """Return a ``values()`` queryset of *groups* with the read API's computed fields added."""
+    db_fields = [f for f in fields if f in {field.attname for field in TestGroup._meta.fields}]
+    if set(fields) & {'matches', 'done', *_TEST_GROUP_STATUS_COUNTS}:
+        groups = groups.annotate(
+            matches=Count('match'),
+            **{
+                name: Count('match', filter=Q(match__status=status))
+                for name, status in _TEST_GROUP_STATUS_COUNTS.items()
+            },
+        )
+        db_fields += ['matches', *_TEST_GROUP_STATUS_COUNTS]
+    return groups.values(*dict.fromkeys(('id', *db_fields)))
+
+
+def _api_test_group_json(row: dict) -> dict:
+    """Fill in the computed fields of a test group row from ``_api_test_group_rows``."""
+    if 'priority' in row:
+        row['priority'] = TestGroup.Priority(row['priority']).name.lower()
+    if 'matches' in row:
+        # Finished = has matches and none are waiting or running.
+        row['done'] = row['matches'] > 0 and row['queued'] == 0 and row['running'] == 0
+    return row
+
+
+@require_GET
+@condition(etag_func=_api_etag)
+def api_test_groups(request):
+    """Read API: test groups, newest first, with their match counts.
+
+    Query parameters: ``branch``, ``fields``, ``limit``, ``cursor``.
+    """
+    try:
+        fields = _api_fields(request, TEST_GROUP_API_FIELDS)
+        groups = TestGroup.objects.all()
+        if 'branch' in request.GET:
+            groups = groups.filter(branch=request.GET['branch'])
+        rows, next_cursor = _api_page(request, _api_test_group_rows(groups, fields))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return _api_list_response(request, [_api_test_group_json(row) for row in rows], fields, next_cursor)
+
+
+@require_GET
+@condition(etag_func=_api_etag)
+def api_test_group_detail(request, test_group_id):
+    """Read API: one test group with its match counts (``fields`` selects fields)."""
+    try:
+        fields = _api_fields(request, TEST_GROUP_API_FIELDS)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    row = _api_test_group_rows(TestGroup.objects.filter(id=test_group_id), fields).first()
+    if row is None:
+        return JsonResponse({'status': 'error', 'message': 'Test group not found'}, status=404)
+    row = _api_test_group_json(row)
+    return JsonResponse({field: row[field] for field in fields})
+
+
+@require_GET
+@condition(etag_func=_api_etag)
+def api_matches(request):
+    """Read API: matches, newest first.
+
+    Query parameters: ``test_group``, ``test_bot``, ``status``, ``fields``,
+    ``limit``, ``cursor``.
+    """
+    try:
+        fields = _api_fields(request, MATCH_API_FIELDS)
+        matches = Match.objects.all()
+        for param, lookup in (('test_group', 'test_group_id'), ('test_bot', 'test_bot_id')):
+            value = request.GET.get(param, '')
+            if value:
+                if not value.lstrip('-').isdigit():
+                    raise ValueError(f'{param} must be an id')
+                matches = matches.filter(**{lookup: int(value)})
+        if request.GET.get('status'):
+            if request.GET['status'] not in Match.Status.values:
+                raise ValueError(f"status must be one of {', '.join(Match.Status.values)}")
+            matches = matches.filter(status=request.GET['status'])
+        rows, next_cursor = _api_page(request, matches.values(*dict.fromkeys(('id', *fields))))
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return _api_list_response(request, rows, fields, next_cursor)
+
+
+@require_GET
+@condition(etag_func=_api_etag)
+def api_test_group_opponents(request, test_group_id):
+    """Read API: a test group's results per test bot, opponent column and difficulty.
+
+    Read from the results summary (``results_summary.py``); ``match_id``
+    is the match shown in the results page cell.  Not paginated: a group
+    has one row per opponent.
+    """
+    try:
+        fields = _api_fields(request, OPPONENT_API_FIELDS)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    if not TestGroup.objects.filter(id=test_group_id).exists():
+        return JsonResponse({'status': 'error', 'message': 'Test group not found'}, status=404)
+    rows = GroupOpponentSummary.objects.filter(test_group_id=test_group_id).order_by('earliest_match_id').values(
+        'test_bot_id', 'opponent_key', 'kind', 'opponent_difficulty', 'match_id', 'victories', 'total_games',
+    )
+    results = []
+    for row in rows:
+        row['win_rate'] = row['victories'] / row['total_games'] if row['total_games'] else None
+        results.append({field: row[field] for field in fields})
+    return JsonResponse({'test_group_id': test_group_id, 'results': results})
+
+
+@require_GET
+@condition(etag_func=_api_etag)
+def api_test_group_maps(request, test_group_id):
+    """Read API: a test group's results per test bot, opponent column, difficulty and map.
+
+    Not paginated: a group has one row per opponent and map.
+    """
+    try:
+        fields = _api_fields(request, MAP_API_FIELDS)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    if not TestGroup.objects.filter(id=test_group_id).exists():
+        return JsonResponse({'status': 'error', 'message': 'Test group not found'}, status=404)
+    matches = Match.objects.filter(test_group_id=test_group_id).order_by('id').values(
+        *results_summary.MATCH_FIELDS,
+    )
+    results = [
+        {field: row[field] for field in fields} for row in results_summary.map_breakdown(matches)
+    ]
+    return JsonResponse({'test_group_id': test_group_id, 'results': results})
+
+
 @csrf_exempt
 @require_POST
 def api_trigger_ticket_tests(request):
@@ -0,0 +1,385 @@
+"""Warm pool of pre-started SC2 controllers for aiarena matches.
+
+Cold-starting ``aiarena/arenaclient-sc2`` dominates the wall time of
+short games.  With ``SystemConfig.warm_pool_size`` above 0 the scheduler
+keeps that many ``sc2_controller`` containers running idle, each in its
+own slot directory ``aiarena/warm/<slot>/`` and compose project
+``aiarena_warm_<slot>``.
+
+A launching aiarena match claims a free slot, copies its matches file,
+compose override and Dockerfiles into the slot and starts only the bot
+controllers and the proxy there (``MATCH_SERVICES``).  Bind mounts cannot
+be changed on a running container and the bot mounts differ per match,
+so those three containers are still created per game; the SC2
+controller is bot-agnostic and stays up between games.  Afterwards the
+results, replays and logs are copied back into the match's run
+directory and the slot is released by the job that claimed it.  A slot
+is recycled — its stack torn down and started fresh by the next
+maintenance pass — after ``RECYCLE_AFTER_MATCHES`` games or when a
+match in it fails.
+
+Matches that find no ready slot are started cold, as before.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+from datetime import timedelta
+
+from django.utils import timezone
+
+logger = logging.getLogger('test_lab')
+
+# A slot's stack is restarted after this many games.
+RECYCLE_AFTER_MATCHES = 20
+
+# The service kept running between matches and the ones started per match.
+WARM_SERVICE = 'sc2_controller'
+MATCH_SERVICES = ('bot_controller1', 'bot_controller2', 'proxy_controller')
+
+# A claim is only treated as abandoned once its match has been over this
+# long with nothing supervising it, so the job that owns the claim can
+# still collect its artifacts and release it.
+STALE_CLAIM_GRACE = timedelta(minutes=10)
+
+# Marker files in a slot directory.
+_READY_FILE = 'ready'   # the SC2 controller is up and idle
+_CLAIM_FILE = 'claim'   # id of the match using the slot
+_GAMES_FILE = 'games'   # games played since the stack was started
+
+# Marker in a match's run directory naming the slot it is playing in.
+_SLOT_MARKER = 'warm_slot'
+
+_PROJECT_RE = re.compile(r'^aiarena_warm_(\d+)$')
+
+
+def get_warm_dir() -> str:
+    """Return the directory holding the slot directories."""
+    from .aiarena_runner import AIARENA_DIR
+    return os.path.join(AIARENA_DIR, 'warm')
+
+
+def get_slot_dir(slot: int) -> str:
+    """Return the directory a slot's compose stack runs in."""
+    return os.path.join(get_warm_dir(), str(slot))
+
+
+def get_project_name(slot: int) -> str:
+    """Return the compose project name of a slot."""
+    return f'aiarena_warm_{slot}'
+
+
+def _compose_cmd(slot: int, *args: str) -> list[str]:
+    return [
+        'docker', 'compose',
+        '-f', 'docker-compose.yml',
+        '-f', 'docker-compose.override.yml',
+        '-p', get_project_name(slot),
+        *args,
+    ]
+
+
+def _read_int(path: str) -> int | None:
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _clear_directory(path: str, keep: tuple[str, ...] = ()) -> None:
+    """Delete the contents of *path* except the entries named in *keep*."""
+    if not os.path.isdir(path):
+        return
+    for name in os.listdir(path):
+        if name in keep:
+            continue
+        entry = os.path.join(path, name)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            _remove(entry)
+
+
+def _write_empty_results(path: str) -> None:
+    # Written in place: results.json is bind-mounted into the proxy, and
+    # replacing the file would leave the container with the old inode.
+    with open(path, 'w') as f:
+        json.dump({"results": []}, f)
+
+
+def _prepare_slot_dir(slot: int) -> str:
+    """Create a slot directory with the base compose files and no match."""
+    from .aiarena_runner import _BASE_FILES, AIARENA_DIR
+    from .models import SystemConfig
+
+    slot_dir = get_slot_dir(slot)
+    os.makedirs(os.path.join(slot_dir, 'logs'), exist_ok=True)
+    os.makedirs(os.path.join(slot_dir, 'replays'), exist_ok=True)
+    for filename in _BASE_FILES:
+        src = os.path.join(AIARENA_DIR, filename)
+        if os.path.isfile(src):
+            shutil.copy2(src, os.path.join(slot_dir, filename))
+    with open(os.path.join(slot_dir, '.env'), 'w') as f:
+        f.write(f'SC2_MAPS_PATH={SystemConfig.load().sc2_maps_path}\n')
+    # Until a match is loaded the override adds nothing.
+    with open(os.path.join(slot_dir, 'docker-compose.override.yml'), 'w') as f:
+        f.write('services: {}\n')
+    open(os.path.join(slot_dir, 'matches'), 'w').close()
+    _write_empty_results(os.path.join(slot_dir, 'results.json'))
+    return slot_dir
+
+
+def _start_slot(slot: int) -> bool:
+    """Start a slot's SC2 controller and mark the slot ready."""
+    slot_dir = _prepare_slot_dir(slot)
+    try:
+        result = subprocess.run(
+            _compose_cmd(slot, 'up', '-d', WARM_SERVICE),
+            cwd=slot_dir, capture_output=True, text=True, timeout=600,
+        )
+    except (OSError, subprocess.SubprocessError):
+        logger.exception('Warm slot %d: could not start %s', slot, WARM_SERVICE)
+        return False
+    if result.returncode != 0:
+        logger.warning('Warm slot %d: docker compose up failed: %s', slot, result.stderr.strip())
+        return False
+    with open(os.path.join(slot_dir, _GAMES_FILE), 'w') as f:
+        f.write('0')
+    open(os.path.join(slot_dir, _READY_FILE), 'w').close()
+    logger.info('Warm slot %d: %s started', slot, WARM_SERVICE)
+    return True
+
+
+def _stop_slot(slot: int) -> None:
+    """Tear down a slot's stack.  The slot is unready until started again."""
+    slot_dir = get_slot_dir(slot)
+    _remove(os.path.join(slot_dir, _READY_FILE))
+    if os.path.isfile(os.path.join(slot_dir, 'docker-compose.yml')):
+        try:
+            subprocess.run(
+                _compose_cmd(slot, 'down', '--remove-orphans'),
+                cwd=slot_dir, capture_output=True, timeout=120,
+            )
+        except (OSError, subprocess.SubprocessError):
+            logger.exception('Warm slot %d: docker compose down failed', slot)
+    _remove(os.path.join(slot_dir, _GAMES_FILE))
+
+
+def _existing_slots() -> list[int]:
+    warm_dir = get_warm_dir()
+    if not os.path.isdir(warm_dir):
+        return []
+    return sorted(int(name) for name in os.listdir(warm_dir) if name.isdigit())
+
+
+def _running_slots() -> set[int] | None:
+    """Return the slots whose SC2 controller is running (None if unknown)."""
+    try:
+        result = subprocess.run(
+            [
+                'docker', 'ps',
+                '--filter', f'label=com.docker.compose.service={WARM_SERVICE}',
+                '--format', '{{.Label "com.docker.compose.project"}}',
+            ],
+            capture_output=True, text=True, timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    running: set[int] = set()
+    for line in result.stdout.splitlines():
+        project_match = _PROJECT_RE.match(line.strip())
+        if project_match:
+            running.add(int(project_match.group(1)))
+    return running
+
+
+def get_claims() -> dict[int, int]:
+    """Return ``{slot: match_id}`` for every slot in use."""
+    claims: dict[int, int] = {}
+    for slot in _existing_slots():
+        match_id = _read_int(os.path.join(get_slot_dir(slot), _CLAIM_FILE))
+        if match_id is not None:
+            claims[slot] = match_id
+    return claims
+
+
+def claim_slot(match_id: int) -> int | None:
+    """Reserve a ready slot for a match, or return None if there is none.
+
+    The claim file is created exclusively, so two launching matches can
+    never get the same slot.
+    """
+    from .models import SystemConfig
+
+    size = SystemConfig.load().warm_pool_size
+    for slot in range(size):
+        slot_dir = get_slot_dir(slot)
+        if not os.path.isfile(os.path.join(slot_dir, _READY_FILE)):
+            continue
+        try:
+            fd = os.open(os.path.join(slot_dir, _CLAIM_FILE), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(match_id))
+        # The slot may have been recycled between the two checks.
+        if not os.path.isfile(os.path.join(slot_dir, _READY_FILE)):
+            _remove(os.path.join(slot_dir, _CLAIM_FILE))
+            continue
+        return slot
+    return None
+
+
+def load_match(slot: int, run_dir: str) -> None:
+    """Copy a match's matches file, override and Dockerfiles into its slot."""
+    slot_dir = get_slot_dir(slot)
+    for filename in ('matches', 'docker-compose.override.yml', '.env'):
+        shutil.copy2(os.path.join(run_dir, filename), os.path.join(slot_dir, filename))
+    for filename in os.listdir(run_dir):
+        if filename.startswith('Dockerfile'):
+            shutil.copy2(os.path.join(run_dir, filename), os.path.join(slot_dir, filename))
+    _write_empty_results(os.path.join(slot_dir, 'results.json'))
+    _clear_directory(os.path.join(slot_dir, 'replays'))
+    _clear_directory(os.path.join(slot_dir, 'logs'), keep=(WARM_SERVICE,))
+    with open(os.path.join(run_dir, _SLOT_MARKER), 'w') as f:
+        f.write(str(slot))
+
+
+def get_match_slot(run_dir: str) -> int | None:
+    """Return the slot the match in *run_dir* is playing in, if any."""
+    return _read_int(os.path.join(run_dir, _SLOT_MARKER))
+
+
+def collect_artifacts(slot: int, run_dir: str) -> None:
+    """Copy a finished match's results, replays and logs into its run directory."""
+    slot_dir = get_slot_dir(slot)
+    try:
+        shutil.copy2(os.path.join(slot_dir, 'results.json'), os.path.join(run_dir, 'results.json'))
+        shutil.copytree(os.path.join(slot_dir, 'replays'), os.path.join(run_dir, 'replays'), dirs_exist_ok=True)
+        shutil.copytree(os.path.join(slot_dir, 'logs'), os.path.join(run_dir, 'logs'), dirs_exist_ok=True)
+    except OSError:
+        logger.exception('Warm slot %d: could not copy match artifacts to %s', slot, run_dir)
+
+
+def stop_match(slot: int) -> None:
+    """Stop and remove the per-match containers of a slot."""
+    from . import container_backend
+    try:
+        container_backend.get_backend().remove_stack(
+            get_project_name(slot), get_slot_dir(slot), services=MATCH_SERVICES,
+        )
+    except Exception:
+        logger.exception('Warm slot %d: could not remove match containers', slot)
+
+
+def release_slot(slot: int, run_dir: str | None = None, failed: bool = False, match_id: int | None = None) -> None:
+    """Return a slot to the pool after a match, recycling it when due.
+
+    With *match_id*, nothing happens unless the slot is still claimed by
+    that match, so a late release can't free a slot another match holds.
+    """
+    slot_dir = get_slot_dir(slot)
+    if match_id is not None and _read_int(os.path.join(slot_dir, _CLAIM_FILE)) != match_id:
+        logger.warning('Warm slot %d: no longer claimed by match %d; not releasing it', slot, match_id)
+        return
+    stop_match(slot)
+    games = (_read_int(os.path.join(slot_dir, _GAMES_FILE)) or 0) + 1
+    if failed or games >= RECYCLE_AFTER_MATCHES:
+        logger.info('Warm slot %d: recycling after %d game(s)%s', slot, games, ' (failed)' if failed else '')
+        _stop_slot(slot)
+    else:
+        with open(os.path.join(slot_dir, _GAMES_FILE), 'w') as f:
+            f.write(str(games))
+    if run_dir:
+        _remove(os.path.join(run_dir, _SLOT_MARKER))
+    _remove(os.path.join(slot_dir, _CLAIM_FILE))
+
+
+def maintain() -> None:
+    """Bring the pool to ``SystemConfig.warm_pool_size`` ready slots.
+
+    Starts missing or dead SC2 controllers, releases abandoned claims
+    (``_abandoned_claims``) and tears down idle slots beyond the
+    configured size.
+    """
+    from .aiarena_runner import get_run_dir
+    from .models import SystemConfig
+
+    size = SystemConfig.load().warm_pool_size
+    running = _running_slots()
+    if running is None:
+        return
+
+    claims = get_claims()
+    for slot, match_id in _abandoned_claims(claims):
+        logger.info('Warm slot %d: releasing abandoned claim of match %d', slot, match_id)
+        run_dir = get_run_dir(match_id)
+        if get_match_slot(run_dir) == slot:
+            collect_artifacts(slot, run_dir)
+        else:
+            run_dir = None
+        release_slot(slot, run_dir, failed=True, match_id=match_id)
+        del claims[slot]
+
+    for slot in _existing_slots():
+        if slot >= size and slot not in claims:
+            _stop_slot(slot)
+            shutil.rmtree(get_slot_dir(slot), ignore_errors=True)
+
+    for slot in range(size):
+        if slot in claims:
+            continue
+        ready = os.path.isfile(os.path.join(get_slot_dir(slot), _READY_FILE))
+        if slot not in running or not ready:
+            _stop_slot(slot)
+            _start_slot(slot)
+
+
+def _abandoned_claims(claims: dict[int, int]) -> list[tuple[int, int]]:
+    """Return ``(slot, match_id)`` for claims no job will ever release.
+
+    Normally the job that claimed a slot releases it (or the recovery
+    path, ``aiarena_runner.collect_match_result``, if its process died).
+    A claim is abandoned only when no supervisor job in this process owns
+    it and its match has been over for ``STALE_CLAIM_GRACE``: e.g. its
+    result was posted and the process collecting it exited.
+    """
+    from . import supervisor
+    from .models import Match
+
+    if not claims:
+        return []
+    cutoff = timezone.now() - STALE_CLAIM_GRACE
+    over = set(
+        Match.objects
+        .filter(id__in=claims.values(), finished_at__lt=cutoff)
+        .exclude(status='Running')
+        .values_list('id', flat=True)
+    )
+    # Claims of deleted matches have nobody left to release them either.
+    existing = set(Match.objects.filter(id__in=claims.values()).values_list('id', flat=True))
+    return [
+        (slot, match_id) for slot, match_id in claims.items()
+        if (match_id in over or match_id not in existing) and not supervisor.is_supervised(match_id)
+    ]
+
+
+def shutdown() -> None:
+    """Tear down every idle slot (matches in progress keep theirs)."""
+    claims = get_claims()
+    for slot in _existing_slots():
+        if slot not in claims:
+            _stop_slot(slot)